@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+alert_cache.py
+flow_id → 최근 Suricata 경보 캐시
+
+Suricata는 Flow가 끝날 때 flow 이벤트를 기록하므로 같은 Flow의 alert 이벤트가 먼저 나옴.
+alert를 flow_id별로 잠시 보관했다가 flow 이벤트에 붙여 장치 2로 보내면,
+장치 2는 경보가 있는 Flow를 먼저 처리하거나 ML 추론을 생략할 수 있음.
+
+항목 수(capacity)와 Flow당 경보 수(per_flow)가 제한되고 오래된 항목은 TTL로 만료되므로
+Flow가 수백만 개여도 메모리 사용량이 일정함.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class AlertCache:
+    """
+    LRU + TTL 경보 캐시
+
+    Args:
+        capacity (int): 최대 flow_id 수 (넘으면 가장 오래된 항목부터 제거)
+        ttl (float): 항목 유지 시간 (초)
+        per_flow (int): flow_id당 보관할 최대 경보 수 (심각도 높은 순)
+        metrics (Metrics): 캐시 카운터
+    """
+
+    def __init__(self, capacity=200000, ttl=600, per_flow=4, metrics=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.per_flow = per_flow
+        self.metrics = metrics
+        self._items = OrderedDict()  # flow_id → (만료 시각, [(severity, sid, signature, category), ...])
+        self._lock = threading.Lock()
+
+        if metrics:
+            metrics.set_gauge('alert_cache_size', lambda: len(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, flow_id, sid, signature, severity, category=None, now=None):
+        """flow_id에 경보 하나 추가"""
+        if flow_id is None:
+            return
+        now = time.monotonic() if now is None else now
+        entry = (severity if severity is not None else 255, sid, signature, category)
+
+        with self._lock:
+            item = self._items.pop(flow_id, None)
+            alerts = item[1] if item and item[0] > now else []
+            if entry not in alerts:
+                alerts.append(entry)
+                alerts.sort(key=lambda alert: alert[0])
+                del alerts[self.per_flow:]
+            self._items[flow_id] = (now + self.ttl, alerts)
+
+            evicted = 0
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                evicted += 1
+            # 가장 오래된 쪽부터 만료된 항목 정리 (삽입 순서 = 갱신 순서)
+            while self._items:
+                oldest = next(iter(self._items.values()))
+                if oldest[0] > now:
+                    break
+                self._items.popitem(last=False)
+
+        if evicted and self.metrics:
+            self.metrics.inc('alert_cache_evicted', evicted)
+
+    def pop(self, flow_id, now=None):
+        """
+        flow_id의 경보 목록을 꺼냄 (flow 이벤트는 Flow당 한 번이므로 꺼내면서 삭제)
+
+        반환:
+            list: [{'sid', 'signature', 'severity', 'category'}, ...] (심각도 높은 순), 없으면 None
+        """
+        if flow_id is None:
+            return None
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            item = self._items.pop(flow_id, None)
+
+        if item is None or item[0] <= now:
+            return None
+        if self.metrics:
+            self.metrics.inc('alert_cache_hits')
+        return [
+            {'sid': sid, 'signature': signature, 'severity': severity if severity != 255 else None,
+             'category': category}
+            for severity, sid, signature, category in item[1]
+        ]
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+alert_rollup.py
+alert 시간 버킷 집계 (stats / timeline 엔드포인트용)
+
+alert를 넣을 때 분 단위 버킷에 총합 / severity별 / category별 / signature별 개수를 더해 두고,
+임의 구간·간격(1m, 5m, 1h, 1d) 질의는 해당 버킷만 더해서 응답 (alert 수와 무관, O(버킷 수)):
+
+- 버킷 키는 epoch 기준이므로 날짜가 다른 같은 시각이 섞이지 않음
+- minute_retention보다 오래된 분 버킷은 시간 버킷으로 합침 (메모리 제한)
+- hour_retention보다 오래된 시간 버킷은 삭제
+- 시계는 지금까지 들어온 가장 늦은 alert 시각 (기존 로그를 다시 적재해도 같은 결과)
+
+alert_store와 마찬가지로 이벤트 루프 한 곳에서만 사용 (잠금 없음).
+"""
+
+import heapq
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+
+# 질의 간격 이름 → 초
+INTERVALS = {'1m': MINUTE, '5m': 5 * MINUTE, '1h': HOUR, '1d': DAY}
+
+
+class Bucket:
+    """한 구간의 alert 개수"""
+
+    __slots__ = ('total', 'severity', 'category', 'signature')
+
+    def __init__(self):
+        self.total = 0
+        self.severity = {}
+        self.category = {}
+        self.signature = {}
+
+    def add(self, severity, category, signature):
+        self.total += 1
+        self.severity[severity] = self.severity.get(severity, 0) + 1
+        self.category[category] = self.category.get(category, 0) + 1
+        self.signature[signature] = self.signature.get(signature, 0) + 1
+
+    def merge(self, other):
+        self.total += other.total
+        for mine, theirs in ((self.severity, other.severity), (self.category, other.category),
+                             (self.signature, other.signature)):
+            for key, count in theirs.items():
+                mine[key] = mine.get(key, 0) + count
+
+
+class AlertRollup:
+    """
+    분 / 시간 버킷 집계
+
+    Args:
+        minute_retention (float): 분 단위로 보관할 기간 (초)
+        hour_retention (float): 시간 단위로 보관할 기간 (초)
+    """
+
+    def __init__(self, minute_retention=26 * HOUR, hour_retention=30 * DAY):
+        self.minute_retention = minute_retention
+        self.hour_retention = hour_retention
+        self.total = 0
+        self._minutes = {}  # 분(epoch // 60) → Bucket
+        self._hours = {}  # 시(epoch // 3600) → Bucket
+        self._latest_minute = None  # 지금까지 본 가장 늦은 분
+        self._downsampled = None  # 이 분 미만은 시간 버킷에만 있음
+
+    def add(self, ts, alert):
+        """alert 하나 집계 (ts: epoch 초, None이면 무시)"""
+        if ts is None:
+            return
+        minute = int(ts // MINUTE)
+        args = (alert.get('severity'), alert.get('category') or '', alert.get('signature') or '')
+        self.total += 1
+
+        if self._downsampled is not None and minute < self._downsampled:
+            # 이미 시간 버킷으로 합쳐진 구간에 늦게 도착한 alert
+            if minute * MINUTE >= self._latest_minute * MINUTE - self.hour_retention:
+                hour = minute * MINUTE // HOUR
+                self._hours.setdefault(hour, Bucket()).add(*args)
+            return
+
+        bucket = self._minutes.get(minute)
+        if bucket is None:
+            bucket = self._minutes[minute] = Bucket()
+        bucket.add(*args)
+
+        if self._latest_minute is None or minute > self._latest_minute:
+            self._latest_minute = minute
+            self._downsample()
+
+    def _downsample(self):
+        """오래된 분 버킷 → 시간 버킷, 오래된 시간 버킷 삭제 (새 분이 시작될 때마다)"""
+        now = self._latest_minute * MINUTE
+        cutoff = int((now - self.minute_retention) // HOUR) * HOUR // MINUTE  # 시간 경계에서 자름
+        if self._downsampled is None or cutoff > self._downsampled:
+            for minute in [m for m in self._minutes if m < cutoff]:
+                self._hours.setdefault(minute * MINUTE // HOUR, Bucket()).merge(self._minutes.pop(minute))
+            self._downsampled = cutoff
+
+            oldest_hour = int((now - self.hour_retention) // HOUR)
+            for hour in [h for h in self._hours if h < oldest_hour]:
+                del self._hours[hour]
+
+    def _buckets(self, start, end):
+        """[start, end) 구간의 (버킷 시작 epoch, Bucket) - 시간 버킷은 시작 시각이 구간 안이면 포함"""
+        first_minute = int(start // MINUTE) if start % MINUTE == 0 else int(start // MINUTE) + 1
+        last_minute = int((end - 1) // MINUTE)
+        if self._minutes:
+            low = max(first_minute, min(self._minutes))
+            high = min(last_minute, self._latest_minute)
+            for minute in range(low, high + 1):
+                bucket = self._minutes.get(minute)
+                if bucket is not None:
+                    yield minute * MINUTE, bucket
+        if self._hours:
+            first_hour = int(-(-start // HOUR))
+            last_hour = int((end - 1) // HOUR)
+            for hour in range(max(first_hour, min(self._hours)), min(last_hour, max(self._hours)) + 1):
+                bucket = self._hours.get(hour)
+                if bucket is not None:
+                    yield hour * HOUR, bucket
+
+    def summary(self, start, end, top=10):
+        """
+        구간 합계
+
+        반환:
+            dict: total, severity {값: 개수}, category / signature [(이름, 개수)] 상위 top개
+        """
+        merged = Bucket()
+        for _, bucket in self._buckets(start, end):
+            merged.merge(bucket)
+        return {
+            'total': merged.total,
+            'severity': merged.severity,
+            'category': heapq.nlargest(top, merged.category.items(), key=lambda item: item[1]),
+            'signature': heapq.nlargest(top, merged.signature.items(), key=lambda item: item[1]),
+        }
+
+    def series(self, start, end, step, utc_offset=0):
+        """
+        step초 간격 시계열 (개수가 있는 구간만, 오래된 순)
+
+        utc_offset만큼 밀어서 경계를 맞춤 (예: 1d 간격을 현지 자정 기준으로).
+        시간 버킷으로 합쳐진 구간은 step이 1시간보다 짧아도 시간 단위로만 나타남.
+
+        반환:
+            [(구간 시작 epoch, 총합, severity {값: 개수})]
+        """
+        slots = {}
+        for bucket_start, bucket in self._buckets(start, end):
+            slot_start = (bucket_start + utc_offset) // step * step - utc_offset
+            slot = slots.get(slot_start)
+            if slot is None:
+                slot = slots[slot_start] = Bucket()
+            slot.total += bucket.total
+            for severity, count in bucket.severity.items():
+                slot.severity[severity] = slot.severity.get(severity, 0) + count
+        return [(slot_start, slot.total, slot.severity) for slot_start, slot in sorted(slots.items())]
+
+    def stats(self):
+        return {
+            'total': self.total,
+            'minute_buckets': len(self._minutes),
+            'hour_buckets': len(self._hours),
+        }
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+alert_store.py
+API 서버용 메모리 alert 저장소 (링 버퍼 + 보조 인덱스)
+
+요청마다 eve.json 전체를 다시 읽어 파싱하지 않도록 tail 작업이 파싱한 alert를 한 번만 넣어 두고
+엔드포인트는 메모리에서 바로 응답:
+
+- 최근 capacity개만 보관하는 링 버퍼 (가장 오래된 alert부터 덮어씀)
+- 보조 인덱스: 분 단위 시간, severity, src_ip, dest_ip, sid, signature, category → 순번(seq) deque
+  각 deque는 seq 오름차순이므로 alert를 덮어쓸 때 해당 키 deque의 왼쪽 하나만 빼면 됨 (O(1))
+- 타임스탬프는 넣을 때 한 번만 파싱 (epoch 초)
+- 인덱스 키가 생기거나 사라지면 key_listeners에 알림 (검색 인덱스 search_index.AlertSearch가 사용)
+
+이벤트 루프 한 곳에서만 쓰고 읽는 것을 전제로 하므로 잠금 없음.
+"""
+
+import bisect
+from collections import deque
+from datetime import datetime
+
+INDEXED_FIELDS = ('severity', 'src_ip', 'dest_ip', 'sid', 'signature', 'category')
+
+
+def parse_timestamp(value):
+    """eve 타임스탬프 → epoch 초 (형식이 잘못되면 None)"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class AlertStore:
+    """
+    alert 링 버퍼
+
+    Args:
+        capacity (int): 보관할 최대 alert 수
+    """
+
+    def __init__(self, capacity=200000):
+        self.capacity = capacity
+        self.total = 0  # 지금까지 넣은 alert 수 (= 다음 seq)
+        self._alerts = [None] * capacity
+        self._times = [None] * capacity
+        self._indexes = {field: {} for field in INDEXED_FIELDS}  # 필드 → 값 → deque(seq)
+        self._minutes = {}  # 분(epoch // 60) → deque(seq)
+        self._minute_keys = []  # 정렬된 분 목록
+        self.key_listeners = []  # listener(field, value, present) - 인덱스 키 생성(True) / 제거(False)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    @property
+    def oldest_seq(self):
+        return max(0, self.total - self.capacity)
+
+    def add(self, alert, ts=None):
+        """
+        alert 하나 추가 (가득 차면 가장 오래된 alert 제거) → seq
+
+        ts: 이미 파싱한 타임스탬프 (epoch 초, 없으면 여기서 파싱)
+        """
+        seq = self.total
+        slot = seq % self.capacity
+        if seq >= self.capacity:
+            self._evict(seq - self.capacity, slot)
+
+        if ts is None:
+            ts = parse_timestamp(alert.get('timestamp'))
+        self._alerts[slot] = alert
+        self._times[slot] = ts
+        for field in INDEXED_FIELDS:
+            value = alert.get(field)
+            if value is not None:
+                index = self._indexes[field]
+                entries = index.get(value)
+                if entries is None:
+                    entries = index[value] = deque()
+                    for listener in self.key_listeners:
+                        listener(field, value, True)
+                entries.append(seq)
+        if ts is not None:
+            minute = int(ts // 60)
+            bucket = self._minutes.get(minute)
+            if bucket is None:
+                bucket = self._minutes[minute] = deque()
+                if self._minute_keys and minute < self._minute_keys[-1]:
+                    bisect.insort(self._minute_keys, minute)  # 순서가 어긋난 alert (드묾)
+                else:
+                    self._minute_keys.append(minute)
+            bucket.append(seq)
+        self.total += 1
+        return seq
+
+    def _evict(self, seq, slot):
+        alert = self._alerts[slot]
+        for field in INDEXED_FIELDS:
+            value = alert.get(field)
+            if value is not None and self._pop_index(self._indexes[field], value, seq):
+                for listener in self.key_listeners:
+                    listener(field, value, False)
+        ts = self._times[slot]
+        if ts is not None:
+            minute = int(ts // 60)
+            if self._pop_index(self._minutes, minute, seq):
+                index = bisect.bisect_left(self._minute_keys, minute)
+                del self._minute_keys[index]
+
+    @staticmethod
+    def _pop_index(index, key, seq):
+        """인덱스에서 seq 제거 (가장 오래된 항목이므로 왼쪽), 키가 비면 True"""
+        entries = index[key]
+        if entries and entries[0] == seq:
+            entries.popleft()
+        else:
+            entries.remove(seq)  # 같은 키에 순서가 어긋나게 들어간 경우 (드묾)
+        if not entries:
+            del index[key]
+            return True
+        return False
+
+    def values(self, field):
+        """필드의 현재 인덱스 키 목록"""
+        return list(self._indexes[field])
+
+    def postings(self, field, value):
+        """필드 값의 seq 목록 (오름차순, 없으면 빈 튜플)"""
+        return self._indexes[field].get(value, ())
+
+    def get(self, seq):
+        return self._alerts[seq % self.capacity] if self.oldest_seq <= seq < self.total else None
+
+    def recent(self, count=50, **filters):
+        """
+        최신순 alert 목록
+
+        Args:
+            count (int): 최대 개수
+            filters: INDEXED_FIELDS 중 하나 이상 (모두 만족)
+        """
+        return [self._alerts[seq % self.capacity] for seq in self._select(filters, count)]
+
+    def count(self, **filters):
+        """필터에 맞는 alert 수"""
+        if not filters:
+            return len(self)
+        if len(filters) == 1:
+            (field, value), = filters.items()
+            return len(self._indexes[field].get(value, ()))
+        return sum(1 for _ in self._select(filters, None))
+
+    def _select(self, filters, limit):
+        """필터에 맞는 seq를 최신순으로 (가장 작은 인덱스를 기준으로 나머지 조건 확인)"""
+        filters = {field: value for field, value in filters.items() if value is not None}
+        if not filters:
+            candidates = range(self.total - 1, self.oldest_seq - 1, -1)
+        else:
+            entries = []
+            for field, value in filters.items():
+                if field not in self._indexes:
+                    raise ValueError(f"인덱스 없는 필드: {field}")
+                entries.append(self._indexes[field].get(value, ()))
+            candidates = reversed(min(entries, key=len))
+
+        found = 0
+        for seq in candidates:
+            alert = self._alerts[seq % self.capacity]
+            if all(alert.get(field) == value for field, value in filters.items()):
+                yield seq
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+    def since(self, epoch):
+        """
+        epoch 초 이후 alert (오래된 분부터)
+        """
+        start = bisect.bisect_left(self._minute_keys, int(epoch // 60))
+        for minute in self._minute_keys[start:]:
+            for seq in self._minutes[minute]:
+                slot = seq % self.capacity
+                if self._times[slot] > epoch:
+                    yield self._alerts[slot], self._times[slot]
+
+    def __iter__(self):
+        """오래된 alert부터"""
+        for seq in range(self.oldest_seq, self.total):
+            yield self._alerts[seq % self.capacity]
+
+    def __reversed__(self):
+        """최신 alert부터"""
+        for seq in range(self.total - 1, self.oldest_seq - 1, -1):
+            yield self._alerts[seq % self.capacity]
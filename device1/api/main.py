@@ -4,6 +4,10 @@
 api/main.py
 FastAPI Backend - 실제 데이터 버전
 MCP 서버가 저장한 data/alerts.json, data/rules.json 읽기
+
+알림은 요청마다 eve.json을 다시 읽지 않고, 실시간 감시 작업이 파싱한 alert를
+메모리 저장소(alert_store.AlertStore)에 한 번만 넣어 두고 엔드포인트가 여기서 응답
+(시작 시 eve.json 끝부분 API_ALERT_BACKFILL_BYTES만큼 미리 적재)
 """
 
 from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
@@ -11,13 +15,22 @@ from fastapi.middleware.cors import CORSMiddleware
 from typing import Optional, Dict
 import json
 import re
+import sys
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
-from collections import Counter
 
 import uvicorn  # (if __name__ == "__main__" 에서 사용할 것이므로)
 import asyncio  # 실시간 감시(tail)를 위해
 from typing import List, Set # Set을 추가
+import os
+
+# device1/ 공용 모듈 (eve_tailer 등) import 경로
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from alert_rollup import INTERVALS, AlertRollup
+from alert_store import AlertStore, parse_timestamp
+from eve_decoder import ALERT_FIELDS, EveDecoder
+from eve_tailer import EveTailer
+from search_index import AlertSearch, RuleSearch
 
 app = FastAPI(
     title="Suricata Monitoring API",
@@ -29,9 +42,6 @@ app = FastAPI(
 # 현재 연결된 모든 클라이언트(대시보드)를 저장할 집합(Set)
 connected_clients: Set[WebSocket] = set()
 
-# 파일의 마지막으로 읽은 위치를 저장 (서버가 켜져 있는 동안)
-last_file_position = 0
-
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -44,59 +54,41 @@ app.add_middleware(
 ALERTS_FILE = Path("/var/log/suricata/eve.json")
 RULES_FILE = Path("/etc/suricata/rules/suricata.rules")
 
+# 설정 시 eve.json tail 대신 flow_extractor의 EVE fan-out 소켓에서 실시간 알림 수신
+# (flow_extractor를 FLOW_EVE_SOURCE=socket 으로 실행한 경우)
+EVE_FANOUT_SOCKET = os.environ.get("API_EVE_FANOUT_SOCKET")
+
+# 메모리에 보관할 최근 alert 수 (링 버퍼, 넘치면 오래된 것부터 제거)
+API_ALERT_CAPACITY = int(os.environ.get("API_ALERT_CAPACITY", "200000"))
+# 시작 시 미리 적재할 eve.json 끝부분 크기 (바이트, 0이면 시작 이후 alert만)
+API_ALERT_BACKFILL_BYTES = int(os.environ.get("API_ALERT_BACKFILL_BYTES", str(64 * 1024 * 1024)))
+# 통계용 집계 보관 기간: 분 단위 (시간), 그보다 오래된 구간은 시간 단위 (일)
+API_ROLLUP_MINUTE_HOURS = float(os.environ.get("API_ROLLUP_MINUTE_HOURS", "26"))
+API_ROLLUP_HOUR_DAYS = float(os.environ.get("API_ROLLUP_HOUR_DAYS", "30"))
+
+# 'alert' 이벤트만 파싱하여 평탄화된 dict로 변환
+ALERT_DECODER = EveDecoder(event_types=("alert",), fields=ALERT_FIELDS, require="alert")
+
+# 파싱된 alert 저장소 (이벤트 루프에서만 접근)
+alert_store = AlertStore(API_ALERT_CAPACITY)
+# 시간 버킷 집계 (stats/timeline, 링 버퍼 용량과 무관하게 들어온 모든 alert)
+alert_rollup = AlertRollup(minute_retention=API_ROLLUP_MINUTE_HOURS * 3600,
+                           hour_retention=API_ROLLUP_HOUR_DAYS * 86400)
+# alert 검색 인덱스 (저장소에 넣고 뺄 때 함께 갱신)
+alert_search = AlertSearch(alert_store)
+# 룰 목록 + 검색 인덱스 (룰 파일이 바뀌었을 때만 다시 파싱)
+rule_search = RuleSearch()
+rule_file_signature = None
+
 # ================== 데이터 로드 함수 ==================
 
-def load_alerts() -> list[dict]:
-    """알림 데이터 로드 (JSONL 형식 .json 파일 파서로 변경 및 데이터 평탄화)"""
+def decode_alerts(lines: list[bytes]) -> list[dict]:
+    """eve 줄 목록 → alert dict 목록 ('alert' 타입만 파싱 + 평탄화, 다른 이벤트는 JSON 파싱 생략)"""
     alerts_list = []
-    try:
-        if ALERTS_FILE.exists():
-            with open(ALERTS_FILE, "r") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    try:
-                        # 각 줄을 개별 JSON으로 파싱
-                        event_data = json.loads(line)
-                        
-                        # 'alert' 타입만 필터링
-                        if event_data.get("event_type") == "alert":
-                            
-                            alert_details = event_data.get('alert')
-                            if not alert_details:
-                                continue # alert 객체가 없는 경우 건너뛰기
-
-                            # (중요) 데이터를 평탄화(Flatten)하여 API의 다른 부분이 사용하기 쉽게 만듦
-                            alerts_list.append({
-                                "timestamp": event_data.get("timestamp"),
-                                "src_ip": event_data.get("src_ip"),
-                                "dest_ip": event_data.get("dest_ip"),
-                                "src_port": event_data.get("src_port"),
-                                "dest_port": event_data.get("dest_port"),
-                                "proto": event_data.get("proto"),
-                                
-                                # 'alert' 하위 객체에서 정보 추출
-                                "signature": alert_details.get("signature"),
-                                "severity": alert_details.get("severity"), # 1, 2, 3 등
-                                "category": alert_details.get("category"),
-                                
-                                # (선택) 원본 룰 SID
-                                "gid": alert_details.get("gid"),
-                                "sid": alert_details.get("signature_id") 
-                            })
-
-                    except json.JSONDecodeError as json_err:
-                        # 파일의 특정 줄 파싱 실패 (무시하고 계속)
-                        print(f"[API] ⚠️ 알림 JSONL 파싱 에러: {json_err} | 라인: {line[:100]}...")
-        else:
-             print(f"[API] ❌ 알림 파일 없음: {ALERTS_FILE}")
-             
-    except Exception as e:
-        print(f"[API] ❌ 알림 파일 읽기 실패: {e}")
-    
-    # data.get("alerts", []) 대신 파싱한 리스트를 직접 반환
+    for line in lines:
+        alert = ALERT_DECODER.decode(line)
+        if alert is not None:
+            alerts_list.append(alert)
     return alerts_list
 
 def parse_rule_metadata(metadata_str: str) -> dict:
@@ -160,28 +152,38 @@ def load_rules() -> list[dict]:
     
     return rules_list
 
+async def get_rule_search() -> RuleSearch:
+    """파싱된 룰 목록 + 검색 인덱스 (룰 파일의 inode/크기/수정 시각이 바뀌면 다시 생성)"""
+    global rule_search, rule_file_signature
+    try:
+        st = RULES_FILE.stat()
+        signature = (st.st_ino, st.st_size, st.st_mtime_ns)
+    except FileNotFoundError:
+        signature = None
+    if signature != rule_file_signature:
+        rule_search = await asyncio.to_thread(lambda: RuleSearch(load_rules()))
+        rule_file_signature = signature
+    return rule_search
+
 # ================== API 엔드포인트 ==================
 
 @app.get("/")
 async def root():
-    alerts = load_alerts()
-    rules = load_rules()
+    rules = (await get_rule_search()).rules
     
     return {
         "service": "Suricata Monitoring API",
         "version": "3.0.0",
         "status": "running",
-        "alerts_loaded": len(alerts),
+        "alerts_loaded": len(alert_store),
         "rules_generated": len(rules),
         "data_source": "MCP Server (/var/log/suricata/eve.json, /etc/suricata/rules/suricata.rules)"
     }
 
 @app.get("/api/stats/overview")
 async def get_stats_overview():
-    """전체 통계"""
-    alerts = load_alerts()
-    
-    if not alerts:
+    """전체 통계 (최근 24시간, 시간 버킷 합산)"""
+    if not alert_rollup.total:
         return {
             "total_alerts_24h": 0,
             "total_attacks_24h": 0,
@@ -195,105 +197,83 @@ async def get_stats_overview():
             }
         }
     
-    # (수정) 현재 시간을 UTC(시간대 정보 포함) 기준으로 변경
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=24)
-    recent_alerts = []
-    
-    for a in alerts:
-        try:
-            # (수정) .replace() 제거, fromisoformat이 +0900을 알아서 처리
-            alert_time = datetime.fromisoformat(a['timestamp'])
-            if alert_time > cutoff:
-                recent_alerts.append(a)
-        except (ValueError, TypeError):
-            # 타임스탬프 형식이 잘못된 경우 무시
-            continue
-            
-    by_severity = Counter(a['severity'] for a in recent_alerts)
+    now = datetime.now(timezone.utc)
+    summary = alert_rollup.summary((now - timedelta(hours=24)).timestamp(), now.timestamp() + 60)
+    by_severity = summary["severity"]
     
     return {
-        "total_alerts_24h": len(recent_alerts),
-        "total_attacks_24h": len(recent_alerts),
+        "total_alerts_24h": summary["total"],
+        "total_attacks_24h": summary["total"],
         "critical_alerts_24h": by_severity.get(1, 0),
         "detection_rate": 100,
-        "active_rules_count": len(load_rules()),
+        "active_rules_count": len((await get_rule_search()).rules),
         "severity_distribution": {
             "critical": by_severity.get(1, 0),
             "high": by_severity.get(2, 0),
             "medium": by_severity.get(3, 0),
             "low": by_severity.get(4, 0) + by_severity.get(5, 0) # (예시: 4 이상은 low)
-        }
+        },
+        "top_categories": [{"category": k, "count": v} for k, v in summary["category"]],
+        "top_signatures": [{"signature": k, "count": v} for k, v in summary["signature"]]
     }
 
 @app.get("/api/stats/timeline")
-async def get_stats_timeline(hours: int = 24):
-    """시간대별 타임라인"""
-    alerts = load_alerts()
-    
-    # (수정) 현재 시간을 UTC(시간대 정보 포함) 기준으로 변경
-    cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-    recent_alerts = []
+async def get_stats_timeline(hours: int = 24, interval: str = "1h"):
+    """
+    시간대별 타임라인 (interval: 1m, 5m, 1h, 1d)
 
-    for a in alerts:
-        try:
-            # (수정) .replace() 제거
-            alert_time = datetime.fromisoformat(a['timestamp'])
-            if alert_time > cutoff:
-                recent_alerts.append(a)
-        except (ValueError, TypeError):
-            continue
-
-    timeline = {}
-    for alert in recent_alerts:
-        # (수정) .replace() 제거
-        hour = datetime.fromisoformat(alert['timestamp']).strftime('%H:00')
-        timeline[hour] = timeline.get(hour, 0) + 1
-    
-    timeline_list = [{"time": k, "count": v} for k, v in sorted(timeline.items())]
+    구간은 서버 현지 시각 기준으로 나누고 날짜가 다른 구간은 따로 집계 (start에 전체 시각)
+    """
+    step = INTERVALS.get(interval)
+    if step is None:
+        raise HTTPException(status_code=400, detail=f"interval은 {', '.join(INTERVALS)} 중 하나")
+
+    now = datetime.now(timezone.utc)
+    local_tz = now.astimezone().tzinfo
+    utc_offset = int(now.astimezone().utcoffset().total_seconds())
+    label_format = '%m-%d' if step >= 86400 else '%H:%M'
+
+    timeline_list = []
+    for start, total, _ in alert_rollup.series((now - timedelta(hours=hours)).timestamp(),
+                                               now.timestamp() + 60, step, utc_offset):
+        start_time = datetime.fromtimestamp(start, local_tz)
+        timeline_list.append({"time": start_time.strftime(label_format),
+                              "start": start_time.isoformat(), "count": total})
     
-    return {"timeline": timeline_list}
+    return {"interval": interval, "timeline": timeline_list}
 
 @app.get("/api/logs/suricata")
-async def get_suricata_logs(count: int = 50, severity: Optional[str] = None):
-    """Suricata 로그 조회"""
-    alerts = load_alerts()
-    
-    # 최신순 정렬
-    alerts_sorted = sorted(alerts, key=lambda x: x['timestamp'], reverse=True)
-    logs = alerts_sorted[:count]
-    
+async def get_suricata_logs(count: int = 50, severity: Optional[str] = None,
+                            src_ip: Optional[str] = None, dest_ip: Optional[str] = None,
+                            sid: Optional[int] = None):
+    """Suricata 로그 조회 (최신순, 필터는 저장소 인덱스 사용)"""
+    sev_num = None
     if severity and severity != 'all':
         severity_map = {'critical': 1, 'high': 2, 'medium': 3, 'low': 3}
         sev_num = severity_map.get(severity.lower())
-        if sev_num:
-            logs = [log for log in logs if log['severity'] == sev_num]
+
+    # 필터를 먼저 적용한 뒤 최신 count개
+    logs = alert_store.recent(count, severity=sev_num, src_ip=src_ip, dest_ip=dest_ip, sid=sid)
     
     return {"count": len(logs), "logs": logs}
 
 @app.get("/api/logs/search")
 async def search_logs(query: str):
-    """로그 검색"""
-    alerts = load_alerts()
-    query_lower = query.lower()
-    results = []
-    
-    for alert in alerts:
-        if (query_lower in alert['src_ip'].lower() or
-            query_lower in alert['dest_ip'].lower() or
-            query_lower in alert['signature'].lower() or
-            query_lower in alert.get('category', '').lower()):
-            results.append(alert)
-    
-    # 최신순 정렬
-    results_sorted = sorted(results, key=lambda x: x['timestamp'], reverse=True)
+    """
+    로그 검색 (검색 인덱스 사용, 최신순 50개)
+
+    query: src_ip / dest_ip / signature / category 부분 문자열,
+           끝에 '*'면 접두사 (예: 10.0.*), 'IP/길이'면 CIDR 대역 (예: 192.168.0.0/24)
+    """
+    count, results = alert_search.search(query, limit=50)
     
-    return {"query": query, "count": len(results_sorted), "results": results_sorted[:50]}
+    return {"query": query, "count": count, "results": results}
 
 @app.get("/api/rules/active")
 async def get_active_rules(category: str = "all"):
     """활성 룰 조회 (실제 파싱된 룰 사용)"""
     
-    all_rules = load_rules() # <--- 실제 파싱된 룰을 가져옴
+    all_rules = (await get_rule_search()).rules # <--- 실제 파싱된 룰을 가져옴 (파일이 바뀔 때만 다시 파싱)
 
     if category != 'all' and category:
         # category가 N/A인 경우를 대비해 .get() 사용
@@ -304,38 +284,38 @@ async def get_active_rules(category: str = "all"):
 
 @app.get("/api/rules/search")
 async def search_rules(query: str):
-    """룰 검색 (새 기능!)"""
-    rules = load_rules()
-    query_lower = query.lower()
-    results = []
+    """룰 검색 (룰 본문 + msg/classtype/metadata 등 옵션, 단어 인덱스 사용)"""
+    rule_search = await get_rule_search()
     
-    for i, r in enumerate(rules):
-        rule_text = r.get("rule", "").lower()
-        alert_text = r.get("alert", "").lower()
-        
-        if query_lower in rule_text or query_lower in alert_text:
-            results.append({
-                "sid": 9000000 + i,
-                "action": "alert",
-                "message": r.get("alert", "AI Generated Rule"),
-                "category": "ai-generated",
-                "file": r.get("file", "auto_generated.rules"),
-                "rule": r.get("rule", ""),
-                "timestamp": r.get("timestamp", ""),
-                "severity": r.get("severity", 3)
-            })
+    # 응답 형식은 기존 /api/rules/search와 같음 (sid는 9000000 + 룰 번호)
+    results = []
+    for i in rule_search.numbers(query):
+        r = rule_search.rules[i]
+        results.append({
+            "sid": 9000000 + i,
+            "action": "alert",
+            "message": r.get("alert", "AI Generated Rule"),
+            "category": "ai-generated",
+            "file": r.get("file", "auto_generated.rules"),
+            "rule": r.get("rule", ""),
+            "timestamp": r.get("timestamp", ""),
+            "severity": r.get("severity", 3)
+        })
     
     return {"query": query, "count": len(results), "results": results}
 
 @app.get("/api/health")
 async def health_check():
-    alerts = load_alerts()
-    rules = load_rules()
+    rules = (await get_rule_search()).rules
     
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "alerts_count": len(alerts),
+        "alerts_count": len(alert_store),
+        "alerts_ingested": alert_store.total,
+        "alerts_capacity": alert_store.capacity,
+        "rollup": alert_rollup.stats(),
+        "search_values": alert_search.stats(),
         "rules_count": len(rules),
         "data_files": {
             "alerts": str(ALERTS_FILE.exists()),
@@ -362,81 +342,129 @@ async def websocket_endpoint(websocket: WebSocket):
         print(f"[API] WebSocket 클라이언트 연결 끊어짐. (남은 {len(connected_clients)} 명)")
 
 # --- 2. eve.json 파일을 실시간 감시(tail)하는 함수 ---
+async def push_alert(alert_payload: dict):
+    """alert 하나를 연결된 모든 클라이언트에게 PUSH"""
+    # (중요) 연결된 모든 클라이언트에게 새 알림 PUSH
+    # 여러 클라이언트가 동시에 연결되어 있을 수 있으므로 리스트 복사 후 전송
+    clients_to_send = list(connected_clients)
+    for client in clients_to_send:
+        try:
+            # JSON 문자열로 변환하여 전송
+            await client.send_text(json.dumps(alert_payload))
+        except Exception:
+            # 전송 실패 시 (연결 끊김 등) 집합에서 제거
+            connected_clients.discard(client)
+
+
+async def ingest_alerts(alerts: list[dict], push: bool = True):
+    """파싱된 alert를 저장소에 넣고 (push=True면) 클라이언트에게 PUSH"""
+    for alert in alerts:
+        ts = parse_timestamp(alert.get('timestamp'))
+        alert_store.add(alert, ts)
+        alert_rollup.add(ts, alert)
+    if push and connected_clients:
+        for alert in alerts:
+            await push_alert(alert)
+
+
+def open_backfill_tailer(use_inotify: bool = True):
+    """
+    eve.json 끝부분(API_ALERT_BACKFILL_BYTES)부터 읽는 tailer
+
+    반환:
+        (EveTailer, 첫 줄이 잘린 줄이라 버려야 하는지)
+    """
+    try:
+        size = ALERTS_FILE.stat().st_size
+    except FileNotFoundError:
+        return EveTailer(ALERTS_FILE, start_at='end', use_inotify=use_inotify), False
+
+    offset = max(0, size - API_ALERT_BACKFILL_BYTES)
+    partial = False
+    if offset:
+        # 시작 위치가 줄 중간이면 첫 줄은 잘린 줄
+        with open(ALERTS_FILE, 'rb') as f:
+            f.seek(offset - 1)
+            partial = f.read(1) != b'\n'
+    return EveTailer(ALERTS_FILE, start_at=offset, use_inotify=use_inotify), partial
+
+
+async def backfill_alert_store(tailer: EveTailer, partial: bool):
+    """tailer가 파일 끝에 닿을 때까지 읽어 저장소만 채움 (클라이언트 PUSH 없음)"""
+    loaded = 0
+    while True:
+        lines = await asyncio.to_thread(tailer.read_lines)
+        if not lines:
+            break
+        if partial:
+            lines, partial = lines[1:], False
+        alerts = await asyncio.to_thread(decode_alerts, lines)
+        await ingest_alerts(alerts, push=False)
+        loaded += len(alerts)
+    print(f"[API] 📥 기존 알림 적재: {loaded}건 (보관 {len(alert_store)}/{alert_store.capacity})")
+
+
 async def tail_eve_json_file():
     """
     FastAPI 서버 시작 시 백그라운드에서 실행될 함수.
-    eve.json 파일의 변경 사항을 감지하여 새 알림을 WebSocket으로 PUSH합니다.
+    eve.json 끝부분을 저장소에 적재한 뒤 변경 사항을 감지하여
+    새 알림을 저장소에 넣고 WebSocket으로 PUSH합니다.
     """
-    global last_file_position
     print("[API] 🚀 실시간 알림 감시 시작 (tail_eve_json_file)")
 
-    # 시작 시 파일의 현재 끝 위치 저장
-    try:
-        if ALERTS_FILE.exists():
-            with open(ALERTS_FILE, "r") as f:
-                f.seek(0, 2) # 파일의 맨 끝으로 이동
-                last_file_position = f.tell() # 현재 위치(파일 크기) 저장
-    except Exception as e:
-        print(f"[API] ❌ 초기 파일 위치 읽기 실패: {e}")
+    # 끝부분을 적재한 뒤 같은 위치부터 이어서 감시 (rotate/truncate는 EveTailer가 처리)
+    tailer, partial = open_backfill_tailer()
+    print(f"[API] 👀 감시 방식: {tailer.mode}")
+    await backfill_alert_store(tailer, partial)
 
     while True:
         try:
-            if ALERTS_FILE.exists():
-                with open(ALERTS_FILE, "r") as f:
-                    # 마지막으로 읽은 위치로 이동
-                    f.seek(last_file_position)
-                    new_lines = f.readlines()
-                    
-                    # 파일의 현재 끝 위치를 다음 루프를 위해 갱신
-                    last_file_position = f.tell()
+            new_lines = await asyncio.to_thread(tailer.read_lines)
+
+            if new_lines:
+                alerts = await asyncio.to_thread(decode_alerts, new_lines)
+                await ingest_alerts(alerts)
+            else:
+                # 새 데이터가 생길 때까지 대기 (inotify, 최대 1초)
+                await asyncio.to_thread(tailer.wait, 1.0)
 
-                for line in new_lines:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    try:
-                        event_data = json.loads(line)
-                        
-                        # (중요) 'alert' 타입만 필터링
-                        if event_data.get("event_type") == "alert":
-                            
-                            alert_details = event_data.get('alert')
-                            if not alert_details:
-                                continue
-
-                            # load_alerts에서 평탄화했던 데이터와 동일한 구조로 만듦
-                            alert_payload = {
-                                "timestamp": event_data.get("timestamp"),
-                                "src_ip": event_data.get("src_ip"),
-                                "dest_ip": event_data.get("dest_ip"),
-                                "src_port": event_data.get("src_port"),
-                                "dest_port": event_data.get("dest_port"),
-                                "proto": event_data.get("proto"),
-                                "signature": alert_details.get("signature"),
-                                "severity": alert_details.get("severity"),
-                                "category": alert_details.get("category"),
-                                "sid": alert_details.get("signature_id") 
-                            }
-                            
-                            # (중요) 연결된 모든 클라이언트에게 새 알림 PUSH
-                            # 여러 클라이언트가 동시에 연결되어 있을 수 있으므로 리스트 복사 후 전송
-                            clients_to_send = list(connected_clients) 
-                            for client in clients_to_send:
-                                try:
-                                    # JSON 문자열로 변환하여 전송
-                                    await client.send_text(json.dumps(alert_payload))
-                                except Exception:
-                                    # 전송 실패 시 (연결 끊김 등) 집합에서 제거
-                                    connected_clients.remove(client)
-                                    
-                    except json.JSONDecodeError:
-                        continue # 파싱 실패한 줄은 무시
-                        
         except Exception as e:
             print(f"[API] ❌ 파일 감시(tail) 중 에러: {e}")
-        
-        # 1초마다 파일의 변경 사항을 다시 체크
+            await asyncio.sleep(1)
+
+
+async def read_eve_fanout_socket():
+    """
+    flow_extractor의 EVE fan-out 소켓에서 alert 이벤트만 구독하여 저장소에 넣고 PUSH합니다.
+    (시작 시 eve.json 끝부분 적재, 연결이 끊기면 1초 후 재연결)
+    """
+    print(f"[API] 🚀 실시간 알림 구독 시작 (fan-out 소켓: {EVE_FANOUT_SOCKET})")
+
+    try:
+        tailer, partial = open_backfill_tailer(use_inotify=False)
+        await backfill_alert_store(tailer, partial)
+        tailer.close()
+    except Exception as e:
+        print(f"[API] ⚠️ 기존 알림 적재 실패: {e}")
+
+    while True:
+        try:
+            reader, writer = await asyncio.open_unix_connection(EVE_FANOUT_SOCKET, limit=1 << 20)
+            # 구독 조건: alert 이벤트만 받음 (나머지는 flow_extractor 쪽에서 걸러짐)
+            writer.write(json.dumps({"event_types": ["alert"]}).encode() + b"\n")
+            await writer.drain()
+            print("[API] 🔗 EVE fan-out 소켓 연결됨")
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                await ingest_alerts(decode_alerts([line]))
+
+            writer.close()
+            print("[API] ⚠️ EVE fan-out 소켓 연결 종료, 재연결 대기")
+        except Exception as e:
+            print(f"[API] ❌ fan-out 소켓 수신 중 에러: {e}")
         await asyncio.sleep(1)
 
 # --- 3. FastAPI 시작 시 tail 함수를 백그라운드 작업으로 등록 ---
@@ -444,9 +472,12 @@ async def tail_eve_json_file():
 async def on_startup():
     """
     FastAPI 서버가 시작될 때 `tail_eve_json_file` 함수를 
-    백그라운드 태스크로 자동 실행합니다.
+    백그라운드 태스크로 자동 실행합니다. (fan-out 소켓 설정 시 `read_eve_fanout_socket`)
     """
-    asyncio.create_task(tail_eve_json_file())
+    if EVE_FANOUT_SOCKET:
+        asyncio.create_task(read_eve_fanout_socket())
+    else:
+        asyncio.create_task(tail_eve_json_file())
 
 # =============================
 # Compatibility API for Frontend
@@ -459,8 +490,8 @@ async def get_stats_compat():
 
 
 @app.get("/api/get-timeline")
-async def get_timeline_compat(hours: int = 24):
-    return await get_stats_timeline(hours=hours)
+async def get_timeline_compat(hours: int = 24, interval: str = "1h"):
+    return await get_stats_timeline(hours=hours, interval=interval)
 
 
 @app.get("/api/get-recent-alerts")
@@ -10,6 +10,8 @@ import json
 from pathlib import Path
 import logging
 
+from eve_decoder import EveDecoder, event_type_of
+
 app = Flask(__name__)
 
 # 로깅 설정
@@ -25,6 +27,9 @@ logging.basicConfig(
 # 설정
 EVE_LOG_PATH = '/var/log/suricata/eve.json'
 
+# flow 이벤트만 파싱 (나머지 줄은 바이트 수준에서 건너뜀)
+FLOW_DECODER = EveDecoder(event_types=('flow',))
+
 @app.route('/health', methods=['GET'])
 def health():
     """헬스 체크"""
@@ -57,16 +62,16 @@ def get_suricata_logs():
                 'path': EVE_LOG_PATH
             }), 404
         
-        with open(EVE_LOG_PATH, 'r') as f:
+        with open(EVE_LOG_PATH, 'rb') as f:
             lines = f.readlines()
             
             # 최근 로그부터 (역순)
             for line in reversed(lines[-count*2:]):  # 여유있게 2배
                 try:
-                    log = json.loads(line.strip())
+                    # Flow 타입만 파싱
+                    log = FLOW_DECODER.decode(line)
                     
-                    # Flow 타입만 필터링
-                    if log.get('event_type') == 'flow':
+                    if log is not None:
                         flow = log.get('flow', {})
                         
                         logs.append({
@@ -111,18 +116,17 @@ def get_stats():
         total_flows = 0
         event_types = {}
         
-        with open(EVE_LOG_PATH, 'r') as f:
+        with open(EVE_LOG_PATH, 'rb') as f:
             for line in f:
-                try:
-                    log = json.loads(line.strip())
-                    event_type = log.get('event_type', 'unknown')
-                    event_types[event_type] = event_types.get(event_type, 0) + 1
-                    
-                    if event_type == 'flow':
-                        total_flows += 1
-                
-                except:
+                if not line.strip():
                     continue
+                
+                # 집계에는 event_type만 필요 → JSON 파싱 없이 추출
+                event_type = event_type_of(line) or 'unknown'
+                event_types[event_type] = event_types.get(event_type, 0) + 1
+                
+                if event_type == 'flow':
+                    total_flows += 1
         
         return jsonify({
             'total_flows': total_flows,
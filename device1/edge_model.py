@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+edge_model.py
+장치 1 엣지 사전 분류 (명백히 정상인 Flow는 장치 2로 보내지 않음)
+
+device2/train_model.py가 내보낸 models/edge_model.json (얕은 결정 트리)을
+순수 Python으로 평가. 의심 점수가 임계값 이상인 Flow만 전달.
+"""
+
+import json
+import logging
+from pathlib import Path
+
+# device2/train_model.py의 EDGE_FEATURES와 같은 순서
+EDGE_FEATURES = [
+    'duration_s', 'fwd_pkts', 'bwd_pkts', 'fwd_bytes', 'bwd_bytes',
+    'bytes_per_s', 'pkts_per_s', 'fwd_pkt_len_mean', 'bwd_pkt_len_mean', 'avg_pkt_size',
+]
+
+
+def edge_features(flow_data):
+    """
+    13개 Flow 필드 → 엣지 Feature (train_model.build_edge_features와 같은 계산식)
+
+    반환:
+        list: EDGE_FEATURES 순서의 값
+    """
+    duration = max(flow_data['flow_age'], 1)
+    fwd_pkts = flow_data['pkts_toserver']
+    bwd_pkts = flow_data['pkts_toclient']
+    fwd_bytes = flow_data['bytes_toserver']
+    bwd_bytes = flow_data['bytes_toclient']
+    total_pkts = fwd_pkts + bwd_pkts
+    total_bytes = fwd_bytes + bwd_bytes
+
+    return [
+        duration,
+        fwd_pkts,
+        bwd_pkts,
+        fwd_bytes,
+        bwd_bytes,
+        total_bytes / duration,
+        total_pkts / duration,
+        fwd_bytes / max(fwd_pkts, 1),
+        bwd_bytes / max(bwd_pkts, 1),
+        total_bytes / max(total_pkts, 1),
+    ]
+
+
+class EdgeModel:
+    """
+    JSON으로 내보낸 결정 트리 평가기
+
+    Args:
+        spec (dict): edge_model.json 내용
+        threshold (float): 전달 임계값 (None이면 훈련 시 선택된 값 사용)
+    """
+
+    def __init__(self, spec, threshold=None):
+        if spec.get('type') != 'decision_tree':
+            raise ValueError(f"지원하지 않는 엣지 모델 형식: {spec.get('type')}")
+        if spec['features'] != EDGE_FEATURES:
+            raise ValueError("엣지 모델 Feature 목록이 edge_model.py와 다름 (train_model.py 버전 확인)")
+
+        self.feature = spec['feature']
+        self.threshold = spec['threshold']
+        self.left = spec['left']
+        self.right = spec['right']
+        self.scores = spec['score']
+        self.forward_threshold = spec['forward_threshold'] if threshold is None else threshold
+
+    @classmethod
+    def load(cls, path, threshold=None):
+        with open(path) as f:
+            return cls(json.load(f), threshold)
+
+    def score(self, flow_data):
+        """의심 점수 (0~1, 리프의 공격 비율)"""
+        x = edge_features(flow_data)
+        node = 0
+        feature = self.feature
+        while feature[node] >= 0:
+            if x[feature[node]] <= self.threshold[node]:
+                node = self.left[node]
+            else:
+                node = self.right[node]
+        return self.scores[node]
+
+    def should_forward(self, flow_data):
+        """장치 2로 보낼 Flow인지"""
+        return self.score(flow_data) >= self.forward_threshold
+
+
+def load_edge_model(path, threshold=None):
+    """
+    엣지 모델 로드 (파일이 없거나 잘못되면 None → 모든 Flow 전달)
+    """
+    if not path or not Path(path).exists():
+        logging.info(f"엣지 모델 없음 ({path}) - 모든 Flow를 장치 2로 전달")
+        return None
+    try:
+        model = EdgeModel.load(path, threshold)
+    except (OSError, ValueError, KeyError) as e:
+        logging.error(f"엣지 모델 로드 실패: {e} - 모든 Flow를 장치 2로 전달")
+        return None
+
+    logging.info(f"🌲 엣지 모델 로드: {path} (노드 {len(model.feature)}개, 임계값 {model.forward_threshold:.4f})")
+    return model
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+eve_decoder.py
+eve.json 줄 공용 디코더
+
+1. 바이트 수준 event_type 사전 필터 - 필요 없는 이벤트(dns/http/tls/stats 등)는 JSON 파싱 생략
+2. 빠른 JSON 백엔드 (orjson 설치 시 자동 사용, 없으면 표준 json)
+3. 소비자별로 필요한 필드만 평탄화하여 추출
+"""
+
+import json
+import re
+
+try:
+    import orjson
+    _loads = orjson.loads
+    JSON_BACKEND = 'orjson'
+except ImportError:
+    _loads = json.loads
+    JSON_BACKEND = 'json'
+
+JSON_ERRORS = (ValueError, TypeError)  # JSONDecodeError, orjson.JSONDecodeError 모두 ValueError
+
+EVENT_TYPE_RE = re.compile(rb'"event_type":\s*"([^"]*)"')
+
+# 소비자별 필드 정의: 출력 키 → eve 경로 (점으로 구분)
+ALERT_FIELDS = {
+    'timestamp': 'timestamp',
+    'src_ip': 'src_ip',
+    'dest_ip': 'dest_ip',
+    'src_port': 'src_port',
+    'dest_port': 'dest_port',
+    'proto': 'proto',
+    'signature': 'alert.signature',
+    'severity': 'alert.severity',
+    'category': 'alert.category',
+    'gid': 'alert.gid',
+    'sid': 'alert.signature_id',
+}
+
+
+def loads(line):
+    """JSON 파싱 (bytes/str 모두 가능)"""
+    return _loads(line)
+
+
+def event_type_of(line):
+    """
+    JSON 파싱 없이 event_type만 추출
+
+    Args:
+        line (bytes): eve.json 한 줄
+
+    반환:
+        str: event_type, 없으면 None
+    """
+    match = EVENT_TYPE_RE.search(line)
+    return match.group(1).decode('ascii', 'replace') if match else None
+
+
+class EveDecoder:
+    """
+    eve.json 줄 디코더
+
+    Args:
+        event_types (iterable): 통과시킬 event_type (None이면 전체)
+        fields (dict): 출력 키 → eve 경로. 지정하면 해당 필드만 평탄화한 dict 반환,
+                       None이면 파싱된 원본 dict 반환
+        require (str): 이 경로의 값이 없는 이벤트는 버림 (예: 'alert')
+    """
+
+    def __init__(self, event_types=None, fields=None, require=None):
+        self.event_types = set(event_types) if event_types else None
+        self.markers = None
+        if self.event_types:
+            # Suricata는 공백 없이 기록하지만 재가공된 로그(': ')도 허용
+            self.markers = tuple(
+                marker
+                for et in self.event_types
+                for marker in (f'"event_type":"{et}"'.encode(), f'"event_type": "{et}"'.encode())
+            )
+        self.fields = None
+        if fields:
+            self.fields = [(key, tuple(path.split('.'))) for key, path in fields.items()]
+        self.require = require
+
+    def accepts(self, line):
+        """바이트 수준 사전 필터 (통과한 줄도 decode에서 event_type을 다시 확인)"""
+        if self.markers is None:
+            return True
+        for marker in self.markers:
+            if marker in line:
+                return True
+        return False
+
+    def decode(self, line):
+        """
+        한 줄을 디코딩
+
+        반환:
+            dict: 필터를 통과한 이벤트 (fields 지정 시 평탄화), 아니면 None
+        """
+        if self.markers is not None and not self.accepts(line):
+            return None
+
+        try:
+            event = _loads(line)
+        except JSON_ERRORS:
+            return None
+
+        if not isinstance(event, dict):
+            return None
+        if self.event_types and event.get('event_type') not in self.event_types:
+            return None
+        if self.require and not event.get(self.require):
+            return None
+
+        if self.fields is None:
+            return event
+        return project(event, self.fields)
+
+
+def project(event, fields):
+    """[(출력 키, 경로 튜플)]에 해당하는 값만 평탄화"""
+    result = {}
+    for key, path in fields:
+        value = event
+        for part in path:
+            if isinstance(value, dict):
+                value = value.get(part)
+            else:
+                value = None
+                break
+        result[key] = value
+    return result
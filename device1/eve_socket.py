@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+eve_socket.py
+Suricata EVE unix_stream 소켓 수신 (파일 tail 대체)
+
+Suricata 설정 (suricata.yaml):
+    outputs:
+      - eve-log:
+          enabled: yes
+          filetype: unix_stream
+          filename: /var/run/suricata/eve.sock
+
+Suricata는 위 경로에 클라이언트로 접속하므로 이 모듈이 먼저 소켓을 열고 기다림.
+받은 줄은 EveTailer와 같은 인터페이스(read_lines / wait / follow)로 제공하고,
+fan-out 소켓에 접속한 다른 로컬 프로세스(api/main.py 등)에도 복사해 전달.
+"""
+
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+
+from eve_decoder import EveDecoder
+
+RECV_SIZE = 256 * 1024
+LINE_QUEUE_CHUNKS = 4096  # 소비자가 밀릴 때 버퍼링할 수신 청크 수 (초과 시 Suricata 쪽이 대기)
+SUBSCRIBER_QUEUE_CHUNKS = 1024  # fan-out 구독자별 버퍼 (초과분은 버림)
+
+
+def _bind_unix(path):
+    """기존 소켓 파일을 지우고 unix stream 소켓 listen"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o660)
+    server.listen(8)
+    return server
+
+
+class FanoutSubscriber:
+    """fan-out 소켓 구독자 하나 (느린 구독자가 수신 경로를 막지 않도록 전용 스레드로 전송)"""
+
+    def __init__(self, conn, decoder, metrics=None):
+        self.conn = conn
+        self.decoder = decoder
+        self.metrics = metrics
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_CHUNKS)
+        self.alive = True
+        threading.Thread(target=self._writer, name='eve-fanout-writer', daemon=True).start()
+
+    def offer(self, lines):
+        """구독 조건에 맞는 줄만 전송 대기열에 추가"""
+        if self.decoder.markers is not None:
+            lines = [line for line in lines if self.decoder.accepts(line)]
+        if not lines:
+            return
+        try:
+            self.queue.put_nowait(b'\n'.join(lines) + b'\n')
+        except queue.Full:
+            if self.metrics:
+                self.metrics.inc('fanout_dropped_lines', len(lines))
+
+    def _writer(self):
+        try:
+            while self.alive:
+                self.conn.sendall(self.queue.get())
+        except OSError:
+            pass
+        finally:
+            self.alive = False
+            self.conn.close()
+
+
+class EveSocketSource:
+    """
+    Suricata EVE unix_stream 수신기
+
+    Args:
+        path (str): Suricata가 접속할 소켓 경로
+        fanout_path (str): 다른 로컬 프로세스에 복사본을 전달할 소켓 경로 (None이면 비활성화)
+        track_offsets (bool): True면 read_lines가 EveTailer와 같은 (inode, offset, 줄) 형식 반환.
+                              소켓에는 파일 위치가 없으므로 inode는 None (체크포인트 저장 안 함)
+        metrics (Metrics): 수신/fan-out 카운터
+    """
+
+    mode = 'unix-socket'
+    inode = None
+    offset = 0
+
+    def __init__(self, path, fanout_path=None, track_offsets=False, metrics=None):
+        self.path = path
+        self.fanout_path = fanout_path
+        self.track_offsets = track_offsets
+        self.metrics = metrics
+        self.lines = queue.Queue(maxsize=LINE_QUEUE_CHUNKS)
+        self.pending = []
+        self.subscribers = []
+        self.subscribers_lock = threading.Lock()
+        self.servers = []
+
+        server = _bind_unix(path)
+        self.servers.append(server)
+        threading.Thread(target=self._accept_suricata, args=(server,),
+                         name='eve-socket-accept', daemon=True).start()
+
+        if fanout_path:
+            fanout = _bind_unix(fanout_path)
+            self.servers.append(fanout)
+            threading.Thread(target=self._accept_subscribers, args=(fanout,),
+                             name='eve-fanout-accept', daemon=True).start()
+
+        logging.info(f"🔌 EVE 소켓 대기: {path}" + (f" (fan-out: {fanout_path})" if fanout_path else ""))
+
+    def _accept_suricata(self, server):
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            logging.info("🔗 Suricata EVE 소켓 연결됨")
+            threading.Thread(target=self._receive, args=(conn,),
+                             name='eve-socket-recv', daemon=True).start()
+
+    def _receive(self, conn):
+        """Suricata 연결 하나에서 줄 단위로 수신"""
+        buffer = b''
+        try:
+            while True:
+                chunk = conn.recv(RECV_SIZE)
+                if not chunk:
+                    break
+                buffer += chunk
+                end = buffer.rfind(b'\n')
+                if end < 0:
+                    continue
+                lines = [line for line in buffer[:end].split(b'\n') if line.strip()]
+                buffer = buffer[end + 1:]
+                if lines:
+                    self._dispatch(lines)
+        except OSError as e:
+            logging.error(f"EVE 소켓 수신 오류: {e}")
+        finally:
+            conn.close()
+            logging.warning("Suricata EVE 소켓 연결 종료 (재연결 대기)")
+
+    def _dispatch(self, lines):
+        if self.metrics:
+            self.metrics.inc('socket_lines_received', len(lines))
+
+        with self.subscribers_lock:
+            self.subscribers = [s for s in self.subscribers if s.alive]
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(lines)
+
+        # 가득 차면 대기 → 소켓 수신이 멈추고 Suricata 쪽으로 backpressure 전달
+        self.lines.put(lines)
+
+    def _accept_subscribers(self, server):
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._register_subscriber, args=(conn,),
+                             name='eve-fanout-register', daemon=True).start()
+
+    def _register_subscriber(self, conn):
+        """
+        구독자 등록. 첫 줄로 구독 조건을 받을 수 있음: {"event_types": ["alert"]}
+        (1초 안에 아무것도 보내지 않으면 전체 이벤트 구독)
+        """
+        event_types = None
+        conn.settimeout(1.0)
+        try:
+            first = b''
+            while not first.endswith(b'\n'):
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                first += chunk
+            event_types = json.loads(first).get('event_types') if first.strip() else None
+        except (socket.timeout, ValueError, AttributeError):
+            pass
+        except OSError:
+            conn.close()
+            return
+        conn.settimeout(None)
+
+        subscriber = FanoutSubscriber(conn, EveDecoder(event_types=event_types), self.metrics)
+        with self.subscribers_lock:
+            self.subscribers.append(subscriber)
+        logging.info(f"📤 EVE fan-out 구독자 연결 (event_types: {event_types or 'all'})")
+
+    def _records(self, lines):
+        if self.track_offsets:
+            return [(None, 0, line) for line in lines]
+        return lines
+
+    def read_lines(self):
+        """지금 받은 줄 반환 (blocking하지 않음)"""
+        lines = self.pending
+        self.pending = []
+        while True:
+            try:
+                lines.extend(self.lines.get_nowait())
+            except queue.Empty:
+                break
+        return self._records(lines)
+
+    def wait(self, timeout=1.0):
+        """새 줄이 올 때까지 최대 timeout초 대기"""
+        if self.pending:
+            return True
+        try:
+            self.pending.extend(self.lines.get(timeout=timeout))
+            return True
+        except queue.Empty:
+            return False
+
+    def follow(self, wait_timeout=1.0):
+        while True:
+            lines = self.read_lines()
+            if lines:
+                yield from lines
+            else:
+                self.wait(wait_timeout)
+
+    def close(self):
+        for server in self.servers:
+            server.close()
+        for path in (self.path, self.fanout_path):
+            if path:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
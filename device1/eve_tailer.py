@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+eve_tailer.py
+EVE 로그(eve.json) 공용 tail 컴포넌트
+
+- Linux에서는 inotify로 변경을 기다리고, 사용할 수 없으면 polling으로 동작
+- logrotate에 의한 교체(rename/새 inode)와 truncate(copytruncate)를 감지
+- 한 줄씩이 아니라 큰 청크 단위로 읽고, 완성된 줄만 반환
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import glob
+import json
+import logging
+import os
+import select
+import struct
+import time
+
+CHUNK_SIZE = 256 * 1024  # 한 번에 읽을 바이트 수
+MAX_CHUNKS_PER_READ = 16  # read_lines 1회 호출당 최대 청크 수
+POLL_INTERVAL = 0.2  # inotify 미사용 시 polling 주기 (초)
+
+# inotify 상수 (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+              IN_MOVED_TO | IN_CREATE | IN_DELETE)
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """
+    디렉토리 단위 inotify 감시 (ctypes, 외부 패키지 불필요)
+
+    logrotate의 rename/create를 잡기 위해 파일이 아닌 상위 디렉토리를 감시하고,
+    이벤트 중 대상 파일 이름에 해당하는 것만 깨움 신호로 사용
+    """
+
+    def __init__(self, path):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError("libc not found")
+
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify not supported")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        directory = os.path.dirname(os.path.abspath(path))
+        wd = libc.inotify_add_watch(self.fd, directory.encode(), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed: {directory}")
+
+        self.name = os.path.basename(path).encode()
+
+    def wait(self, timeout):
+        """대상 파일 관련 이벤트가 오거나 timeout이 지날 때까지 대기"""
+        deadline = time.monotonic() + timeout
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            readable, _, _ = select.select([self.fd], [], [], remaining)
+            if not readable:
+                return False
+
+            if self._drain():
+                return True
+
+    def _drain(self):
+        """쌓인 이벤트를 모두 읽고, 대상 파일 이벤트가 있었는지 반환"""
+        matched = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return matched
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+
+            pos = 0
+            while pos + EVENT_HEADER.size <= len(data):
+                _, _, _, name_len = EVENT_HEADER.unpack_from(data, pos)
+                pos += EVENT_HEADER.size
+                name = data[pos:pos + name_len].rstrip(b'\0')
+                pos += name_len
+                if name == self.name:
+                    matched = True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class EveTailer:
+    """
+    eve.json tail
+
+    Args:
+        path (str): 감시할 파일 경로
+        start_at: 'end' (기존 내용 무시), 'start' (처음부터), 바이트 오프셋 또는
+                  체크포인트 (inode, offset). 시작 시 파일이 없으면 나중에 생성된
+                  파일은 처음부터 읽음
+        chunk_size (int): 한 번에 읽을 바이트 수
+        use_inotify (bool): inotify 사용 여부 (불가능하면 자동으로 polling)
+        track_offsets (bool): True면 read_lines가 (inode, 시작 오프셋, 줄)을 반환
+    """
+
+    def __init__(self, path, start_at='end', chunk_size=CHUNK_SIZE, use_inotify=True,
+                 track_offsets=False):
+        self.path = str(path)
+        self.chunk_size = chunk_size
+        self.track_offsets = track_offsets
+        self.file = None
+        self.inode = None
+        self.read_offset = 0  # 파일에서 읽은 위치
+        self.buffer = b''  # 아직 줄바꿈이 오지 않은 조각
+
+        self.watcher = None
+        if use_inotify:
+            try:
+                self.watcher = InotifyWatcher(self.path)
+            except (OSError, AttributeError) as e:
+                logging.info(f"inotify 사용 불가, polling으로 동작: {e}")
+
+        self._open(start_at)
+
+    @property
+    def mode(self):
+        return 'inotify' if self.watcher else 'polling'
+
+    @property
+    def offset(self):
+        """반환된 마지막 완성 줄 바로 다음 위치 (체크포인트용)"""
+        return self.read_offset - len(self.buffer)
+
+    def _find_by_inode(self, inode):
+        """logrotate로 이름이 바뀐 파일(eve.json.1, eve.json-20250101 등) 중 inode가 같은 파일"""
+        for candidate in sorted(glob.glob(self.path + '[.-]*')):
+            try:
+                if os.stat(candidate).st_ino == inode:
+                    return candidate
+            except OSError:
+                continue
+        return None
+
+    def _open(self, start_at='start'):
+        """파일 열기, 성공 여부 반환"""
+        path = self.path
+
+        if isinstance(start_at, (tuple, list)):
+            # 체크포인트 (inode, offset) 복원
+            inode, offset = start_at
+            try:
+                current_inode = os.stat(self.path).st_ino
+            except FileNotFoundError:
+                current_inode = None
+
+            if current_inode == inode:
+                start_at = offset
+            else:
+                rotated = self._find_by_inode(inode)
+                if rotated:
+                    # 교체된 이전 파일의 남은 부분부터 읽고, 끝나면 새 파일로 전환
+                    logging.info(f"체크포인트 파일이 교체됨 → {rotated} 오프셋 {offset}부터 이어서 읽음")
+                    path = rotated
+                    start_at = offset
+                else:
+                    logging.warning(f"체크포인트 inode {inode}를 찾을 수 없음 → 현재 파일을 처음부터 읽음")
+                    start_at = 'start'
+
+        try:
+            f = open(path, 'rb', buffering=0)
+        except FileNotFoundError:
+            return False
+
+        st = os.fstat(f.fileno())
+        if start_at == 'end':
+            offset = st.st_size
+        elif start_at == 'start':
+            offset = 0
+        else:
+            offset = int(start_at)
+            if offset > st.st_size:
+                logging.warning(f"오프셋 {offset}이 파일 크기 {st.st_size}보다 큼 → 처음부터 읽음")
+                offset = 0
+
+        f.seek(offset)
+        self.file = f
+        self.inode = st.st_ino
+        self.read_offset = offset
+        self.buffer = b''
+        return True
+
+    def _read_available(self, max_chunks=MAX_CHUNKS_PER_READ):
+        """현재 열린 파일에서 읽을 수 있는 만큼 읽음, EOF 도달 여부 반환"""
+        chunks = [self.buffer]
+        at_eof = False
+        for _ in range(max_chunks):
+            chunk = self.file.read(self.chunk_size)
+            if not chunk:
+                at_eof = True
+                break
+            self.read_offset += len(chunk)
+            chunks.append(chunk)
+        self.buffer = b''.join(chunks)
+        return at_eof
+
+    def _split_lines(self):
+        """버퍼에서 완성된 줄만 꺼냄"""
+        end = self.buffer.rfind(b'\n')
+        if end < 0:
+            return []
+        base = self.offset
+        complete = self.buffer[:end]
+        self.buffer = self.buffer[end + 1:]
+
+        if not self.track_offsets:
+            return [line for line in complete.split(b'\n') if line.strip()]
+
+        records = []
+        pos = base
+        for line in complete.split(b'\n'):
+            if line.strip():
+                records.append((self.inode, pos, line))
+            pos += len(line) + 1
+        return records
+
+    def _rotated(self):
+        """경로가 다른 inode를 가리키면(logrotate 교체) True"""
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            # rename 직후 새 파일이 아직 없음 → 기존 파일 계속 읽기
+            return False
+
+    def read_lines(self):
+        """
+        지금 읽을 수 있는 완성된 줄을 반환 (bytes, 줄바꿈 제외)
+
+        blocking하지 않으며, 새 데이터가 없으면 빈 리스트 반환.
+        track_offsets=True면 각 항목은 (inode, 줄 시작 오프셋, 줄)
+        """
+        if self.file is None and not self._open('start'):
+            return []
+
+        # truncate 감지 (copytruncate 또는 수동 비우기)
+        size = os.fstat(self.file.fileno()).st_size
+        if size < self.read_offset:
+            logging.warning(f"EVE 로그 truncate 감지: {self.path} ({self.read_offset} → {size})")
+            self.file.seek(0)
+            self.read_offset = 0
+            self.buffer = b''
+
+        at_eof = self._read_available()
+        lines = self._split_lines()
+
+        if at_eof and self._rotated():
+            # 교체 직전에 기록된 데이터까지 읽은 뒤 새 파일로 전환
+            self._read_available()
+            lines.extend(self._split_lines())
+            if self.buffer.strip():
+                if self.track_offsets:
+                    lines.append((self.inode, self.offset, self.buffer))
+                else:
+                    lines.append(self.buffer)
+
+            logging.info(f"EVE 로그 교체 감지 (inode {self.inode}) → 새 파일 열기")
+            self.file.close()
+            self.file = None
+            if self._open('start'):
+                self._read_available()
+                lines.extend(self._split_lines())
+
+        return lines
+
+    def wait(self, timeout=1.0):
+        """새 데이터가 생길 때까지 최대 timeout초 대기"""
+        if self.watcher:
+            return self.watcher.wait(timeout)
+        time.sleep(min(timeout, POLL_INTERVAL))
+        return True
+
+    def follow(self, wait_timeout=1.0):
+        """줄을 끝없이 yield하는 generator"""
+        while True:
+            lines = self.read_lines()
+            if lines:
+                yield from lines
+            else:
+                self.wait(wait_timeout)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+        if self.watcher:
+            self.watcher.close()
+            self.watcher = None
+
+
+class EveCheckpoint:
+    """
+    tail 위치 (inode, offset) 저장소
+
+    임시 파일에 쓴 뒤 os.replace로 교체하여 중간에 죽어도 파일이 깨지지 않음
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.last_saved = None
+
+    def load(self):
+        """저장된 (inode, offset) 반환, 없으면 None"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return int(data['inode']), int(data['offset'])
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logging.error(f"체크포인트 파일 손상, 무시: {self.path} ({e})")
+            return None
+
+    def save(self, inode, offset):
+        """위치 저장 (변경이 없으면 생략)"""
+        if inode is None or (inode, offset) == self.last_saved:
+            return
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'inode': inode, 'offset': offset, 'saved_at': time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.last_saved = (inode, offset)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+flow_aggregator.py
+출발지별 Flow 집계 (포트 스캔/DDoS 대량 Flow 억제)
+
+- 슬라이딩 윈도우 안에서 src_ip별, 5-tuple별 Flow 수를 space-saving 스케치로 셈 (메모리 고정)
+- 새 출발지의 처음 몇 개 Flow는 (같은 5-tuple이 반복되더라도) 항상 그대로 전달
+- 그 이후 같은 출발지(또는 같은 5-tuple)의 Flow는 윈도우 동안 요약 레코드 하나로 합쳐 전달
+
+요약 레코드는 일반 Flow와 같은 필드(Flow당 평균값)를 가지므로 장치 2에서 그대로 분류할 수 있고,
+'aggregate' 필드에 합친 Flow 수와 합계가 들어감.
+요약에 합쳐진 Flow는 체크포인트를 잡아두지 않음 (요약 전송 전에 종료되면 해당 요약은 유실될 수 있음).
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+DISTINCT_LIMIT = 256  # 요약당 기록할 고유 목적지 IP/포트 수 상한
+
+
+class SpaceSaving:
+    """
+    space-saving heavy-hitter 스케치
+
+    최대 capacity개 키만 추적. 가득 찬 상태에서 새 키가 오면 가장 작은 카운터를 물려받으므로
+    count는 실제 값 이상(과대 추정), count - error는 실제 값 이하가 보장됨
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self._heap = []  # (count, 순번, key) - 갱신된 항목은 그대로 두고 꺼낼 때 확인 (lazy)
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self.counts)
+
+    def offer(self, key, n=1):
+        """
+        키 관측
+
+        반환:
+            (count, error)
+        """
+        counts = self.counts
+        if key in counts:
+            counts[key] += n
+        elif len(counts) < self.capacity:
+            counts[key] = n
+            self.errors[key] = 0
+        else:
+            floor = self._evict_min()
+            counts[key] = floor + n
+            self.errors[key] = floor
+
+        heapq.heappush(self._heap, (counts[key], next(self._seq), key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, next(self._seq), k) for k, count in counts.items()]
+            heapq.heapify(self._heap)
+        return counts[key], self.errors[key]
+
+    def _evict_min(self):
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self.counts.get(key) == count:
+                del self.counts[key]
+                del self.errors[key]
+                return count
+
+    def estimate(self, key):
+        """(count, error), 추적 중이 아니면 (0, 0)"""
+        return self.counts.get(key, 0), self.errors.get(key, 0)
+
+    def top(self, n=10):
+        """상위 n개 (key, count)"""
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class SlidingCounter:
+    """
+    슬라이딩 윈도우 카운터 (현재/이전 윈도우 스케치 2개를 경과 비율로 가중 합산)
+    """
+
+    def __init__(self, window, capacity):
+        self.window = window
+        self.capacity = capacity
+        self.current = SpaceSaving(capacity)
+        self.previous = SpaceSaving(capacity)
+        self.started = time.monotonic()
+
+    def _rotate(self, now):
+        elapsed = now - self.started
+        if elapsed < self.window:
+            return elapsed
+        if elapsed >= 2 * self.window:
+            self.previous = SpaceSaving(self.capacity)
+            self.started = now
+        else:
+            self.previous = self.current
+            self.started += self.window
+        self.current = SpaceSaving(self.capacity)
+        return now - self.started
+
+    def offer(self, key, now):
+        """
+        키 관측 후 윈도우 내 최소 보장 횟수 반환 (새 키는 항상 작게 나옴)
+        """
+        weight = 1.0 - self._rotate(now) / self.window
+        count, error = self.current.offer(key)
+        prev_count, prev_error = self.previous.estimate(key)
+        return (count - error) + weight * (prev_count - prev_error)
+
+
+class FlowSummary:
+    """윈도우 동안 합쳐진 Flow 요약"""
+
+    def __init__(self, kind, first, now):
+        self.kind = kind
+        self.first = first
+        self.started = now
+        self.flows = 0
+        self.last_timestamp = None
+        self.last_state = None
+        self.age = 0
+        self.pkts_toserver = 0
+        self.pkts_toclient = 0
+        self.bytes_toserver = 0
+        self.bytes_toclient = 0
+        self.dest_ips = set()
+        self.dest_ports = set()
+
+    def add(self, flow_data):
+        self.flows += 1
+        self.last_timestamp = flow_data.get('timestamp')
+        self.last_state = flow_data.get('flow_state')
+        self.age += flow_data.get('flow_age', 0)
+        self.pkts_toserver += flow_data.get('pkts_toserver', 0)
+        self.pkts_toclient += flow_data.get('pkts_toclient', 0)
+        self.bytes_toserver += flow_data.get('bytes_toserver', 0)
+        self.bytes_toclient += flow_data.get('bytes_toclient', 0)
+        if len(self.dest_ips) < DISTINCT_LIMIT:
+            self.dest_ips.add(flow_data.get('dest_ip'))
+        if len(self.dest_ports) < DISTINCT_LIMIT:
+            self.dest_ports.add(flow_data.get('dest_port'))
+
+    def to_flow(self):
+        """장치 2로 보낼 요약 레코드 (Flow 필드는 Flow당 평균)"""
+        n = max(self.flows, 1)
+        first = self.first
+        return {
+            'timestamp': first.get('timestamp'),
+            'flow_id': first.get('flow_id'),
+            'src_ip': first.get('src_ip'),
+            'dest_ip': first.get('dest_ip'),
+            'src_port': first.get('src_port'),
+            'dest_port': first.get('dest_port'),
+            'proto': first.get('proto'),
+            'flow_age': round(self.age / n),
+            'flow_state': self.last_state,
+            'pkts_toserver': round(self.pkts_toserver / n),
+            'pkts_toclient': round(self.pkts_toclient / n),
+            'bytes_toserver': round(self.bytes_toserver / n),
+            'bytes_toclient': round(self.bytes_toclient / n),
+            'aggregate': {
+                'key': self.kind,
+                'flows': self.flows,
+                'first_timestamp': first.get('timestamp'),
+                'last_timestamp': self.last_timestamp,
+                'dest_ips': len(self.dest_ips),
+                'dest_ports': len(self.dest_ports),
+                'pkts_toserver': self.pkts_toserver,
+                'pkts_toclient': self.pkts_toclient,
+                'bytes_toserver': self.bytes_toserver,
+                'bytes_toclient': self.bytes_toclient,
+            },
+        }
+
+
+class FlowAggregator:
+    """
+    Flow 집계 단계
+
+    Args:
+        emit (callable): 요약 레코드를 받아 전송 큐에 넣는 함수
+        metrics (Metrics): 집계 카운터
+        window (float): 윈도우 길이 (초), 요약은 시작 후 이 시간이 지나면 전송
+        source_first (int): 윈도우당 출발지별로 그대로 전달할 Flow 수
+        tuple_first (int): 윈도우당 5-tuple별로 그대로 전달할 Flow 수
+        capacity (int): 스케치 크기 / 동시에 유지할 요약 수 상한
+    """
+
+    def __init__(self, emit, metrics, window=10.0, source_first=20, tuple_first=3, capacity=4096):
+        self.emit = emit
+        self.metrics = metrics
+        self.window = window
+        self.source_first = source_first
+        self.tuple_first = tuple_first
+        self.capacity = capacity
+        self.sources = SlidingCounter(window, capacity)
+        self.tuples = SlidingCounter(window, capacity)
+        self.summaries = {}
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        metrics.set_gauge('aggregator_active_summaries', lambda: len(self.summaries))
+
+    def add(self, flow_data):
+        """
+        Flow 하나 관측
+
+        반환:
+            bool: True면 그대로 전송, False면 요약에 합쳐짐
+        """
+        now = time.monotonic()
+        src_ip = flow_data.get('src_ip')
+        five_tuple = (src_ip, flow_data.get('src_port'), flow_data.get('dest_ip'),
+                      flow_data.get('dest_port'), flow_data.get('proto'))
+
+        with self.lock:
+            source_count = self.sources.offer(src_ip, now)
+            tuple_count = self.tuples.offer(five_tuple, now)
+
+            # 출발지별 처음 source_first개는 5-tuple 반복 여부와 관계없이 그대로 전달
+            if source_count <= self.source_first:
+                return True
+            if tuple_count > self.tuple_first:
+                key = ('tuple',) + five_tuple
+            else:
+                key = ('src', src_ip)
+
+            summary = self.summaries.get(key)
+            if summary is None:
+                if len(self.summaries) >= self.capacity:
+                    # 요약 공간이 없으면 그대로 전달 (유실 없이 fail-open)
+                    self.metrics.inc('aggregator_overflow')
+                    return True
+                summary = self.summaries[key] = FlowSummary(key[0], flow_data, now)
+            summary.add(flow_data)
+
+        self.metrics.inc('flows_aggregated')
+        return False
+
+    def expire(self, now=None, flush_all=False):
+        """윈도우가 끝난 요약 전송"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            expired = [
+                key for key, summary in self.summaries.items()
+                if flush_all or now - summary.started >= self.window
+            ]
+            summaries = [self.summaries.pop(key) for key in expired]
+
+        for summary in summaries:
+            self.emit(summary.to_flow())
+            self.metrics.inc('summaries_sent')
+        return len(summaries)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='flow-aggregator', daemon=True)
+        self.thread.start()
+        logging.info(
+            f"🧮 Flow 집계: 윈도우 {self.window}초, 출발지당 {self.source_first}개 / "
+            f"5-tuple당 {self.tuple_first}개 초과 시 요약"
+        )
+
+    def stop(self):
+        """남은 요약을 모두 전송하고 종료 (전송 파이프라인보다 먼저 호출)"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(5)
+        self.expire(flush_all=True)
+
+    def _run(self):
+        interval = min(1.0, self.window / 4)
+        while not self.stop_event.wait(interval):
+            try:
+                self.expire()
+            except Exception as e:
+                logging.error(f"Flow 요약 전송 오류: {e}")
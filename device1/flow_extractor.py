@@ -4,17 +4,109 @@ flow_extractor.py
 Suricata EVE 로그 실시간 모니터링 및 장치 2로 전송
 """
 
+import os
 import json
 import time
+import threading
 import requests
 import logging
 from pathlib import Path
 
+from alert_cache import AlertCache
+from edge_model import load_edge_model
+from eve_decoder import EveDecoder
+from eve_socket import EveSocketSource
+from eve_tailer import EveCheckpoint, EveTailer
+from flow_aggregator import FlowAggregator
+from flow_pipeline import FlowPipeline
+from flow_sampler import AdaptiveSampler
+from flow_sharding import ShardRouter
+from flow_spool import DeliveryTracker, FlowSpool, SpoolDrainer
+from flow_wire import BATCH_ID_HEADER, CONTENT_TYPE as WIRE_CONTENT_TYPE, encode_flows
+from metrics import Metrics, start_metrics_server
+
 # 설정
-EVE_LOG_PATH = '/var/log/suricata/eve.json'
-DEVICE2_RECEIVER = 'http://192.168.0.14:5001/receive-flow'
+EVE_LOG_PATH = os.environ.get('FLOW_EVE_LOG_PATH', '/var/log/suricata/eve.json')
+DEVICE2_RECEIVER = os.environ.get('FLOW_DEVICE2_URL', 'http://192.168.0.14:5001/receive-flow')
+DEVICE2_BATCH_RECEIVER = os.environ.get('FLOW_DEVICE2_BATCH_URL', 'http://192.168.0.14:5001/receive-flows')
 MIN_FLOW_AGE = 5  # 최소 지속 시간 (초)
 
+# EVE 입력: file (eve.json tail) / socket (Suricata eve-log filetype: unix_stream)
+EVE_SOURCE = os.environ.get('FLOW_EVE_SOURCE', 'file')
+EVE_SOCKET_PATH = os.environ.get('FLOW_EVE_SOCKET_PATH', '/var/run/suricata/eve.sock')
+EVE_FANOUT_PATH = os.environ.get('FLOW_EVE_FANOUT_PATH', '/var/run/suricata/eve-fanout.sock')  # 빈 값이면 비활성화
+
+# flow 이벤트만 파싱 (나머지 줄은 바이트 수준에서 건너뜀)
+FLOW_DECODER = EveDecoder(event_types=('flow',))
+# alert 이벤트는 Flow 연관/샘플링 보호에 필요한 필드만 추출
+ALERT_DECODER = EveDecoder(
+    event_types=('alert',),
+    fields={
+        'flow_id': 'flow_id', 'src_ip': 'src_ip', 'dest_ip': 'dest_ip',
+        'sid': 'alert.signature_id', 'signature': 'alert.signature',
+        'severity': 'alert.severity', 'category': 'alert.category',
+    },
+    require='alert'
+)
+
+# 배치 전송 설정 (환경 변수로 변경 가능)
+BATCH_ENABLED = os.environ.get('FLOW_BATCH_ENABLED', '1') == '1'
+BATCH_SIZE = int(os.environ.get('FLOW_BATCH_SIZE', 200))  # 배치당 최대 Flow 수
+BATCH_FLUSH_INTERVAL = float(os.environ.get('FLOW_BATCH_FLUSH_INTERVAL', 0.5))  # 최대 대기 시간 (초)
+
+# 배치 전송 포맷: binary (flow_wire 컬럼 포맷) / json
+# 장치 2가 415를 반환하면 JSON으로 전환하고 WIRE_REPROBE_INTERVAL마다 다시 시도
+WIRE_FORMAT = os.environ.get('FLOW_WIRE_FORMAT', 'binary')
+WIRE_COMPRESS = os.environ.get('FLOW_WIRE_COMPRESS', '1') == '1'
+WIRE_REPROBE_INTERVAL = float(os.environ.get('FLOW_WIRE_REPROBE_INTERVAL', 300))
+_wire_rejected_at = None  # 장치 2가 바이너리 포맷을 거부한 시각
+
+# 읽기/전송 파이프라인 설정
+SENDER_WORKERS = int(os.environ.get('FLOW_SENDER_WORKERS', 4))  # 전송 워커 수
+QUEUE_SIZE = int(os.environ.get('FLOW_QUEUE_SIZE', 10000))  # 메모리 큐 최대 길이
+QUEUE_FULL_POLICY = os.environ.get('FLOW_QUEUE_FULL_POLICY', 'block')  # block / drop_oldest / spill
+
+# 전달 보장 설정 (체크포인트 + 디스크 스풀)
+CHECKPOINT_PATH = os.environ.get('FLOW_CHECKPOINT_PATH', 'flow_extractor.checkpoint')
+CHECKPOINT_INTERVAL = float(os.environ.get('FLOW_CHECKPOINT_INTERVAL', 1.0))  # 저장 주기 (초)
+SPOOL_DIR = os.environ.get('FLOW_SPOOL_DIR', 'flow_spool')
+SPOOL_FSYNC = os.environ.get('FLOW_SPOOL_FSYNC', '1') == '1'
+SPOOL_DRAIN_RATE = float(os.environ.get('FLOW_SPOOL_DRAIN_RATE', 500))  # 초당 재전송 Flow 수
+SPOOL_DRAIN_INTERVAL = float(os.environ.get('FLOW_SPOOL_DRAIN_INTERVAL', 5.0))  # 스풀 확인 주기 (초)
+
+# 멀티 프로세스 모드 (1이면 단일 프로세스)
+EXTRACTOR_PROCESSES = int(os.environ.get('FLOW_EXTRACTOR_PROCESSES', 1))  # 파싱/전송 워커 프로세스 수
+SHARD_BATCH_LINES = int(os.environ.get('FLOW_SHARD_BATCH_LINES', 1000))  # 워커로 보내는 배치당 줄 수
+SHARD_QUEUE_BATCHES = int(os.environ.get('FLOW_SHARD_QUEUE_BATCHES', 64))  # 워커별 대기 배치 수
+
+# 엣지 사전 분류 (device2/train_model.py가 만든 edge_model.json, 없으면 모든 Flow 전달)
+EDGE_MODEL_PATH = os.environ.get('FLOW_EDGE_MODEL', 'models/edge_model.json')
+EDGE_THRESHOLD = os.environ.get('FLOW_EDGE_THRESHOLD')  # 지정 시 모델의 임계값 대신 사용
+EDGE_MODEL = None  # init_edge_model로 로드 (샤드 워커는 flow_extractor를 별도 모듈로 import하므로 워커마다 로드)
+
+# 출발지/5-tuple별 Flow 집계 (스캔/DDoS 대량 Flow를 요약으로 전송)
+AGG_ENABLED = os.environ.get('FLOW_AGG_ENABLED', '1') == '1'
+AGG_WINDOW = float(os.environ.get('FLOW_AGG_WINDOW', 10.0))  # 슬라이딩 윈도우 (초)
+AGG_SOURCE_FIRST = int(os.environ.get('FLOW_AGG_SOURCE_FIRST', 20))  # 출발지당 그대로 전달할 Flow 수
+AGG_TUPLE_FIRST = int(os.environ.get('FLOW_AGG_TUPLE_FIRST', 3))  # 5-tuple당 그대로 전달할 Flow 수
+AGG_CAPACITY = int(os.environ.get('FLOW_AGG_CAPACITY', 4096))  # 스케치/요약 최대 키 수
+
+# 적응형 샘플링 (장치 2 과부하 시 반복되는 정상 Flow 일부만 전송)
+SAMPLER_ENABLED = os.environ.get('FLOW_SAMPLER_ENABLED', '1') == '1'
+SAMPLER_TARGET_LATENCY = float(os.environ.get('FLOW_SAMPLER_TARGET_LATENCY', 0.5))  # 배치 전송 지연 목표 (초)
+SAMPLER_HIGH_WATERMARK = float(os.environ.get('FLOW_SAMPLER_HIGH_WATERMARK', 0.7))  # 큐 사용률 상한
+SAMPLER_MIN_RATE = float(os.environ.get('FLOW_SAMPLER_MIN_RATE', 0.01))  # 최소 샘플링 비율
+SAMPLER_ALERT_TTL = float(os.environ.get('FLOW_SAMPLER_ALERT_TTL', 300))  # alert IP 보호 시간 (초)
+SAMPLER_PROTECT_SCORE = float(os.environ.get('FLOW_SAMPLER_PROTECT_SCORE', 0.8))  # 이 이상 엣지 점수는 항상 전송
+
+# flow_id → 최근 경보 캐시 (경보가 있는 Flow는 경보 정보를 붙여 바로 전송)
+ALERT_CACHE_ENABLED = os.environ.get('FLOW_ALERT_CACHE_ENABLED', '1') == '1'
+ALERT_CACHE_SIZE = int(os.environ.get('FLOW_ALERT_CACHE_SIZE', 200000))  # 최대 flow_id 수 (전체 프로세스 합)
+ALERT_CACHE_TTL = float(os.environ.get('FLOW_ALERT_CACHE_TTL', 600))  # 경보 유지 시간 (초)
+
+METRICS_HOST = os.environ.get('FLOW_METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.environ.get('FLOW_METRICS_PORT', 9101))  # 0이면 비활성화
+
 # 로깅 설정
 logging.basicConfig(
     level=logging.INFO,
@@ -64,38 +156,86 @@ def extract_flow_features(log_entry):
     }
 
 
-def send_to_device2(flow_data):
+def init_edge_model(path=EDGE_MODEL_PATH, threshold=EDGE_THRESHOLD):
+    """
+    엣지 모델을 로드해 EDGE_MODEL로 설정 (읽기 프로세스 / 샤드 워커 각각 호출)
+
+    반환:
+        EdgeModel: 로드된 모델 (없으면 None)
+    """
+    global EDGE_MODEL
+    EDGE_MODEL = load_edge_model(path, float(threshold) if threshold else None)
+    return EDGE_MODEL
+
+
+def should_forward(flow_data, metrics):
+    """
+    엣지 사전 분류: 의심 점수가 임계값 이상인 Flow만 장치 2로 전달
+    
+    반환:
+        bool: 전달 여부 (엣지 모델이 없으면 항상 True)
+    """
+    if EDGE_MODEL is None:
+        return True
+    
+    if EDGE_MODEL.should_forward(flow_data):
+        metrics.inc('flows_edge_forwarded')
+        return True
+    
+    metrics.inc('flows_edge_filtered')
+    return False
+
+
+def forward_ratio(forwarded, filtered):
+    """엣지 모델 통과 비율 (판단한 Flow가 없으면 1.0)"""
+    total = forwarded + filtered
+    return forwarded / total if total else 1.0
+
+
+def log_verdict(flow_data, result):
+    """장치 2 판정 결과 로깅"""
+    if result.get('is_malicious'):
+        logging.warning(
+            f"🚨 악성 탐지! "
+            f"{result['attack_type']} "
+            f"(신뢰도: {result['confidence']:.2%}) "
+            f"- {flow_data['src_ip']} → {flow_data['dest_ip']}"
+        )
+    else:
+        logging.info(
+            f"✓ 정상: {flow_data['src_ip']} → {flow_data['dest_ip']}"
+        )
+
+
+def make_session():
+    """전송 워커 전용 keep-alive HTTP 세션"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def send_to_device2(flow_data, session=None):
     """
     Flow 데이터를 장치 2로 전송
     
     Args:
         flow_data (dict): Flow Feature
+        session (requests.Session): 재사용할 세션 (없으면 새 연결)
     
     반환:
         bool: 성공 여부
     """
     try:
-        response = requests.post(
+        response = (session or requests).post(
             DEVICE2_RECEIVER,
             json=flow_data,
             timeout=2
         )
         
         if response.status_code == 200:
-            result = response.json()
-            
-            if result.get('is_malicious'):
-                logging.warning(
-                    f"🚨 악성 탐지! "
-                    f"{result['attack_type']} "
-                    f"(신뢰도: {result['confidence']:.2%}) "
-                    f"- {flow_data['src_ip']} → {flow_data['dest_ip']}"
-                )
-            else:
-                logging.info(
-                    f"✓ 정상: {flow_data['src_ip']} → {flow_data['dest_ip']}"
-                )
-            
+            log_verdict(flow_data, response.json())
             return True
         else:
             logging.error(f"장치 2 응답 오류: {response.status_code}")
@@ -112,54 +252,389 @@ def send_to_device2(flow_data):
         return False
 
 
+def send_batch_to_device2(flows, session=None, batch_id=None):
+    """
+    Flow 배치를 장치 2의 /receive-flows로 한 번에 전송
+    
+    Args:
+        flows (list): Flow Feature 리스트
+        session (requests.Session): 재사용할 세션 (없으면 새 연결)
+        batch_id (str): 배치 ID (재전송 시 같은 값 → 장치 2가 이미 처리한 배치는 다시 처리하지 않음)
+    
+    반환:
+        bool: 성공 여부
+    """
+    if not flows:
+        return True
+    
+    global _wire_rejected_at
+    
+    try:
+        http = session or requests
+        headers = {BATCH_ID_HEADER: batch_id} if batch_id else {}
+        use_binary = WIRE_FORMAT == 'binary' and (
+            _wire_rejected_at is None or time.monotonic() - _wire_rejected_at >= WIRE_REPROBE_INTERVAL
+        )
+        
+        response = None
+        if use_binary:
+            response = http.post(
+                DEVICE2_BATCH_RECEIVER,
+                data=encode_flows(flows, compress=WIRE_COMPRESS),
+                headers={**headers, 'Content-Type': WIRE_CONTENT_TYPE},
+                timeout=2
+            )
+            if response.status_code == 415:
+                # 바이너리 포맷을 모르는 장치 2 → 같은 배치를 JSON으로 재전송
+                if _wire_rejected_at is None:
+                    logging.warning("장치 2가 바이너리 배치 포맷을 지원하지 않음 - JSON으로 전송")
+                _wire_rejected_at = time.monotonic()
+                response = None
+            elif _wire_rejected_at is not None:
+                logging.info("장치 2 바이너리 배치 포맷 사용 재개")
+                _wire_rejected_at = None
+        
+        if response is None:
+            response = http.post(
+                DEVICE2_BATCH_RECEIVER,
+                json={'flows': flows},
+                headers=headers,
+                timeout=2
+            )
+        
+        if response.status_code != 200:
+            logging.error(f"장치 2 응답 오류: {response.status_code}")
+            return False
+        
+        results = response.json().get('results', [])
+        if len(results) != len(flows):
+            logging.error(f"판정 개수 불일치: 전송 {len(flows)}개, 응답 {len(results)}개")
+            return False
+        
+        malicious = 0
+        for flow_data, result in zip(flows, results):
+            if result.get('is_malicious'):
+                malicious += 1
+                log_verdict(flow_data, result)
+        
+        logging.debug(f"📦 배치 전송 완료: {len(flows)}개 (악성 {malicious}개)")
+        return True
+    
+    except requests.exceptions.Timeout:
+        logging.error("장치 2 타임아웃 (배치)")
+        return False
+    except requests.exceptions.ConnectionError:
+        logging.error("장치 2 연결 실패 (배치)")
+        return False
+    except Exception as e:
+        logging.error(f"배치 전송 오류: {e}")
+        return False
+
+
+def get_send_batch():
+    """설정에 맞는 (전송 함수, 배치 크기)"""
+    if BATCH_ENABLED:
+        return send_batch_to_device2, BATCH_SIZE
+    return (lambda flows, session, batch_id=None: all(send_to_device2(f, session) for f in flows)), 1
+
+
+def create_pipeline(metrics, spool=None, tracker=None, workers=None):
+    """설정값으로 전송 파이프라인 구성"""
+    send_batch, batch_size = get_send_batch()
+    
+    return FlowPipeline(
+        send_batch=send_batch,
+        session_factory=make_session,
+        metrics=metrics,
+        workers=workers or SENDER_WORKERS,
+        queue_size=QUEUE_SIZE,
+        full_policy=QUEUE_FULL_POLICY,
+        spool=spool,
+        tracker=tracker,
+        batch_size=batch_size,
+        flush_interval=BATCH_FLUSH_INTERVAL
+    )
+
+
+def create_aggregator(pipeline, metrics):
+    """설정값으로 Flow 집계 단계 구성 (비활성화 시 None)"""
+    if not AGG_ENABLED:
+        return None
+    
+    return FlowAggregator(
+        emit=pipeline.submit,
+        metrics=metrics,
+        window=AGG_WINDOW,
+        source_first=AGG_SOURCE_FIRST,
+        tuple_first=AGG_TUPLE_FIRST,
+        capacity=AGG_CAPACITY
+    )
+
+
+def create_sampler(pipeline, metrics):
+    """설정값으로 적응형 샘플러 구성 (비활성화 시 None)"""
+    if not SAMPLER_ENABLED:
+        return None
+    
+    return AdaptiveSampler(
+        pipeline, metrics,
+        target_latency=SAMPLER_TARGET_LATENCY,
+        high_watermark=SAMPLER_HIGH_WATERMARK,
+        min_rate=SAMPLER_MIN_RATE,
+        alert_ttl=SAMPLER_ALERT_TTL
+    )
+
+
+class FlowProcessor:
+    """
+    EVE 줄 처리 단계 (단일 프로세스 읽기 스레드 / 샤드 워커 공용)
+    
+    flow: Feature 추출 → (경보가 있으면 바로 전송) → 엣지 사전 분류 → 집계 → 적응형 샘플링
+    alert: flow_id별 경보 캐시에 기록, 관련 IP를 샘플러에 기록
+    
+    Args:
+        pipeline (FlowPipeline): 전송 파이프라인 (요약 전송/부하 측정용)
+        metrics (Metrics): 카운터 저장소
+        shard (tuple): (워커 번호, 워커 수) - 이 워커로 오는 flow_id의 경보만 캐시
+    """
+    
+    def __init__(self, pipeline, metrics, shard=None):
+        self.metrics = metrics
+        self.shard = shard
+        self.aggregator = create_aggregator(pipeline, metrics)
+        self.sampler = create_sampler(pipeline, metrics)
+        self.alerts = None
+        if ALERT_CACHE_ENABLED:
+            shards = shard[1] if shard else 1
+            self.alerts = AlertCache(
+                capacity=max(1, ALERT_CACHE_SIZE // shards), ttl=ALERT_CACHE_TTL, metrics=metrics
+            )
+    
+    def start(self):
+        for stage in (self.aggregator, self.sampler):
+            if stage:
+                stage.start()
+    
+    def stop(self):
+        """남은 요약 전송 (전송 파이프라인보다 먼저 호출)"""
+        for stage in (self.sampler, self.aggregator):
+            if stage:
+                stage.stop()
+    
+    def _owns(self, flow_id):
+        """이 워커가 처리하는 flow_id인지 (ShardRouter와 같은 flow_id % 워커 수)"""
+        if self.shard is None:
+            return True
+        return isinstance(flow_id, int) and flow_id % self.shard[1] == self.shard[0]
+    
+    def note_alert(self, alert):
+        if self.sampler:
+            self.sampler.note_alert(alert['src_ip'], alert['dest_ip'])
+        if self.alerts is not None and self._owns(alert['flow_id']):
+            self.alerts.add(
+                alert['flow_id'], alert['sid'], alert['signature'],
+                alert['severity'], alert['category']
+            )
+    
+    def process(self, line):
+        """
+        EVE 한 줄 처리
+        
+        반환:
+            dict: 지금 전송할 Flow, 없으면 None (걸러짐/요약에 합쳐짐/alert 등)
+        """
+        # flow 이벤트만 JSON 파싱
+        log_entry = FLOW_DECODER.decode(line)
+        if log_entry is None:
+            alert = ALERT_DECODER.decode(line)
+            if alert:
+                self.note_alert(alert)
+            return None
+        
+        # 같은 Flow의 경보 (필터에 걸려도 캐시에서는 제거)
+        alerts = self.alerts.pop(log_entry.get('flow_id')) if self.alerts is not None else None
+        
+        # Flow Feature 추출
+        flow_data = extract_flow_features(log_entry)
+        if not flow_data:
+            return None
+        
+        if alerts:
+            # 경보가 있는 Flow는 빠른 경로: 사전 분류/집계/샘플링 없이 경보 정보를 붙여 전송
+            flow_data['alerts'] = alerts
+            self.metrics.inc('flows_with_alerts')
+            return flow_data
+        
+        if not should_forward(flow_data, self.metrics):
+            return None
+        
+        # 반복 Flow는 요약에 합침
+        if self.aggregator and not self.aggregator.add(flow_data):
+            return None
+        
+        if self.sampler:
+            suspicious = EDGE_MODEL is not None and EDGE_MODEL.score(flow_data) >= SAMPLER_PROTECT_SCORE
+            if not self.sampler.keep(flow_data, suspicious):
+                return None
+        
+        return flow_data
+
+
+def run_single_process(tailer, tracker, metrics):
+    """단일 프로세스 모드: 읽기 스레드에서 파싱/추출, 전송은 스레드 풀"""
+    # 전송 실패 Flow 보관용 스풀 + 복구 시 재전송
+    spool = FlowSpool(SPOOL_DIR, fsync=SPOOL_FSYNC)
+    send_batch, batch_size = get_send_batch()
+    drainer = SpoolDrainer(
+        spool, send_batch, make_session, metrics,
+        rate=SPOOL_DRAIN_RATE, batch_size=batch_size, interval=SPOOL_DRAIN_INTERVAL
+    )
+    drainer.start()
+    
+    pipeline = create_pipeline(metrics, spool=spool, tracker=tracker)
+    pipeline.start()
+    
+    processor = FlowProcessor(pipeline, metrics)
+    processor.start()
+    
+    try:
+        for inode, offset, line in tailer.follow():
+            metrics.inc('lines_read')
+            
+            try:
+                flow_data = processor.process(line)
+                if flow_data:
+                    # 전송 큐에 추가 (전송은 워커가 담당, 완료 시 tracker에 보고)
+                    pipeline.submit(flow_data, tracker.begin(inode, offset))
+            
+            except Exception as e:
+                logging.error(f"처리 오류: {e}")
+            
+            tracker.advance(inode, offset + len(line) + 1)
+    finally:
+        processor.stop()
+        pipeline.stop()
+        drainer.stop()
+        spool.close()
+
+
+def run_sharded(tailer, tracker, metrics, router):
+    """멀티 프로세스 모드: 읽기 프로세스는 flow 줄 선별 + 분배만 담당"""
+    try:
+        while True:
+            records = tailer.read_lines()
+            if not records:
+                tailer.wait(1.0)
+                continue
+            
+            for inode, offset, line in records:
+                # 바이트 수준 필터만 적용, JSON 파싱은 워커 프로세스에서
+                if FLOW_DECODER.accepts(line):
+                    router.route(tracker.begin(inode, offset), line)
+                elif ALERT_DECODER.accepts(line):
+                    # alert는 모든 워커의 샘플러가 알아야 함
+                    router.broadcast(line)
+            
+            metrics.inc('lines_read', len(records))
+            inode, offset, line = records[-1]
+            tracker.advance(inode, offset + len(line) + 1)
+            router.flush()
+    finally:
+        router.stop()
+
+
 def stream_eve_log():
-    """EVE 로그 실시간 스트리밍"""
+    """EVE 로그 실시간 스트리밍 (읽기 스레드 = 생산자)"""
     
     logging.info("=" * 60)
     logging.info("🚀 Flow Extractor 시작")
     logging.info("=" * 60)
-    logging.info(f"📁 EVE 로그: {EVE_LOG_PATH}")
-    logging.info(f"📡 장치 2: {DEVICE2_RECEIVER}")
+    if EVE_SOURCE == 'socket':
+        logging.info(f"🔌 EVE 소켓: {EVE_SOCKET_PATH}")
+    else:
+        logging.info(f"📁 EVE 로그: {EVE_LOG_PATH}")
+    logging.info(f"📡 장치 2: {DEVICE2_BATCH_RECEIVER if BATCH_ENABLED else DEVICE2_RECEIVER}")
     logging.info(f"⏱️  최소 지속 시간: {MIN_FLOW_AGE}초")
+    if BATCH_ENABLED:
+        logging.info(f"📦 배치 전송: 최대 {BATCH_SIZE}개 / {BATCH_FLUSH_INTERVAL}초")
+    if EXTRACTOR_PROCESSES > 1:
+        logging.info(f"🧩 워커 프로세스: {EXTRACTOR_PROCESSES}개 (프로세스당 전송 스레드 1개)")
+    else:
+        logging.info(f"🧵 전송 워커: {SENDER_WORKERS}개, 큐: {QUEUE_SIZE} ({QUEUE_FULL_POLICY})")
     logging.info("=" * 60)
     
-    # 파일 체크
-    while not Path(EVE_LOG_PATH).exists():
-        logging.warning(f"EVE 로그 대기 중: {EVE_LOG_PATH}")
-        time.sleep(1)
+    metrics = Metrics(prefix='flow_extractor_')
+    tracker = DeliveryTracker()
+    metrics.set_gauge('flows_in_flight', lambda: tracker.pending_count)
     
-    # 파일 열기
-    logfile = open(EVE_LOG_PATH, 'r')
+    init_edge_model()
     
-    # 파일 끝으로 이동 (기존 로그 무시)
-    logfile.seek(0, 2)
+    # 워커 프로세스는 다른 스레드를 만들기 전에 fork
+    # (워커의 flow_extractor는 __main__과 다른 모듈이므로 엣지 모델은 워커에서 다시 로드)
+    router = None
+    if EXTRACTOR_PROCESSES > 1:
+        router = ShardRouter(
+            EXTRACTOR_PROCESSES, tracker, metrics,
+            queue_batches=SHARD_QUEUE_BATCHES, batch_lines=SHARD_BATCH_LINES,
+            edge_model=(EDGE_MODEL_PATH, EDGE_THRESHOLD), edge_expected=EDGE_MODEL is not None
+        )
+        router.start()
+        metrics.set_gauge('edge_forward_ratio', lambda: forward_ratio(
+            metrics.get('shards_flows_edge_forwarded'), metrics.get('shards_flows_edge_filtered')
+        ))
+    else:
+        metrics.set_gauge('edge_forward_ratio', lambda: forward_ratio(
+            metrics.get('flows_edge_forwarded'), metrics.get('flows_edge_filtered')
+        ))
     
-    logging.info("✅ 모니터링 시작!\n")
+    if METRICS_PORT:
+        start_metrics_server(metrics, METRICS_HOST, METRICS_PORT)
     
-    # 무한 루프
-    while True:
-        line = logfile.readline()
+    stop_event = threading.Event()
+    checkpoint = None
+    
+    if EVE_SOURCE == 'socket':
+        # 소켓에는 되감을 위치가 없으므로 체크포인트 없이 수신 (Suricata가 접속해 올 때까지 대기)
+        tailer = EveSocketSource(
+            EVE_SOCKET_PATH, fanout_path=EVE_FANOUT_PATH or None,
+            track_offsets=True, metrics=metrics
+        )
+    else:
+        # 파일 체크
+        while not Path(EVE_LOG_PATH).exists():
+            logging.warning(f"EVE 로그 대기 중: {EVE_LOG_PATH}")
+            time.sleep(1)
         
-        if not line:
-            # 새 데이터 없음
-            time.sleep(0.1)
-            continue
+        # 저장된 체크포인트가 있으면 이어서, 없으면 파일 끝부터 (기존 로그 무시)
+        checkpoint = EveCheckpoint(CHECKPOINT_PATH)
+        saved = checkpoint.load()
+        if saved:
+            logging.info(f"📌 체크포인트에서 재개: inode {saved[0]}, 오프셋 {saved[1]}")
+        tailer = EveTailer(EVE_LOG_PATH, start_at=saved or 'end', track_offsets=True)
+        tracker.advance(tailer.inode, tailer.offset)
         
-        try:
-            # JSON 파싱
-            log_entry = json.loads(line.strip())
-            
-            # Flow Feature 추출
-            flow_data = extract_flow_features(log_entry)
-            
-            if flow_data:
-                # 장치 2로 전송
-                send_to_device2(flow_data)
-        
-        except json.JSONDecodeError:
-            continue
-        except Exception as e:
-            logging.error(f"처리 오류: {e}")
+        def save_checkpoints():
+            while not stop_event.wait(CHECKPOINT_INTERVAL):
+                try:
+                    checkpoint.save(*tracker.committed())
+                except OSError as e:
+                    logging.error(f"체크포인트 저장 실패: {e}")
+        
+        threading.Thread(target=save_checkpoints, name='checkpoint', daemon=True).start()
+    
+    logging.info(f"✅ 모니터링 시작! ({tailer.mode})\n")
+    
+    # 무한 루프
+    try:
+        if router:
+            run_sharded(tailer, tracker, metrics, router)
+        else:
+            run_single_process(tailer, tracker, metrics)
+    finally:
+        stop_event.set()
+        tailer.close()
+        if checkpoint:
+            checkpoint.save(*tracker.committed())
 
 
 if __name__ == '__main__':
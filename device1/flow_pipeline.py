@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+flow_pipeline.py
+EVE 읽기(생산자)와 장치 2 전송(소비자)을 분리하는 Flow 전송 파이프라인
+
+- 제한된 크기의 메모리 큐
+- keep-alive 세션을 하나씩 가진 전송 워커 풀
+- 큐가 가득 찼을 때의 정책: block / drop_oldest / spill
+- 전송 실패 Flow는 디스크 스풀에 기록 (at-least-once)
+"""
+
+import queue
+import threading
+import time
+import logging
+import uuid
+
+FULL_POLICIES = ('block', 'drop_oldest', 'spill')
+LATENCY_SMOOTHING = 0.2  # 전송 지연 EWMA 가중치
+
+
+class FlowPipeline:
+    """
+    Flow 전송 파이프라인
+
+    Args:
+        send_batch (callable): send_batch(flows, session, batch_id) → bool
+        session_factory (callable): 워커별 HTTP 세션 생성 함수
+        metrics (Metrics): 카운터/게이지 저장소
+        workers (int): 전송 워커 수
+        queue_size (int): 큐 최대 길이
+        full_policy (str): 큐가 가득 찼을 때 정책 (FULL_POLICIES)
+        spool (FlowSpool): 전송 실패/spill Flow를 기록할 디스크 스풀 (없으면 버림)
+        tracker (DeliveryTracker): 처리 완료된 Flow를 알릴 대상 (체크포인트 계산용)
+        batch_size (int): 워커가 한 번에 전송할 최대 Flow 수
+        flush_interval (float): 배치가 덜 찼을 때 최대 대기 시간 (초)
+    """
+
+    def __init__(self, send_batch, session_factory, metrics, workers=4,
+                 queue_size=10000, full_policy='block', spool=None, tracker=None,
+                 batch_size=200, flush_interval=0.5):
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"Unknown full policy: {full_policy}")
+        if full_policy == 'spill' and spool is None:
+            raise ValueError("spill policy requires a spool")
+
+        self.send_batch = send_batch
+        self.session_factory = session_factory
+        self.metrics = metrics
+        self.worker_count = max(1, workers)
+        self.full_policy = full_policy
+        self.spool = spool
+        self.tracker = tracker
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.send_latency = 0.0  # 배치 전송 지연 EWMA (초, 실패 포함)
+
+        metrics.set_gauge('queue_depth', self.queue.qsize)
+        metrics.set_gauge('send_latency_ms', lambda: round(self.send_latency * 1000, 1))
+        metrics.set_gauge('queue_capacity', queue_size)
+        for name in ('flows_enqueued', 'flows_dropped', 'flows_spilled',
+                     'flows_sent', 'flows_failed', 'flows_spooled', 'batches_sent'):
+            metrics.inc(name, 0)
+
+    def start(self):
+        """전송 워커 시작"""
+        for i in range(self.worker_count):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                name=f'flow-sender-{i}',
+                daemon=True
+            )
+            thread.start()
+            self.threads.append(thread)
+
+        logging.info(
+            f"🧵 전송 워커 {self.worker_count}개 시작 "
+            f"(큐 {self.queue.maxsize}, 정책: {self.full_policy})"
+        )
+
+    def stop(self, timeout=5):
+        """남은 큐를 최대 timeout초 동안 비운 뒤 워커 종료"""
+        deadline = time.monotonic() + timeout
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+    def submit(self, flow_data, token=None):
+        """
+        Flow를 큐에 넣음 (생산자 측)
+
+        Args:
+            flow_data (dict): Flow Feature
+            token: DeliveryTracker 토큰 (처리 완료 시 tracker.done으로 전달)
+
+        반환:
+            bool: 큐에 들어갔으면 True, drop/spill 되었으면 False
+        """
+        item = (token, flow_data)
+
+        if self.full_policy == 'block':
+            self.queue.put(item)
+            self.metrics.inc('flows_enqueued')
+            return True
+
+        try:
+            self.queue.put_nowait(item)
+            self.metrics.inc('flows_enqueued')
+            return True
+        except queue.Full:
+            pass
+
+        if self.full_policy == 'spill':
+            self._spool([item], 'flows_spilled')
+            return False
+
+        # drop_oldest: 가장 오래된 Flow를 버리고 새 Flow를 넣음
+        while True:
+            try:
+                dropped = self.queue.get_nowait()
+                self.queue.task_done()
+                self.metrics.inc('flows_dropped')
+                self._done([dropped])
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(item)
+                self.metrics.inc('flows_enqueued')
+                return False
+            except queue.Full:
+                continue
+
+    def fill_ratio(self):
+        """큐 사용률 (0~1)"""
+        return self.queue.qsize() / self.queue.maxsize if self.queue.maxsize else 0.0
+
+    def _done(self, items):
+        """처리가 끝난(전송/스풀/폐기) 항목을 tracker에 알림"""
+        if self.tracker:
+            self.tracker.done(token for token, _ in items if token is not None)
+
+    def _spool(self, items, counter, batch_id=None):
+        """Flow를 디스크 스풀에 기록 (전송을 시도한 배치는 batch_id와 함께), 실패하면 폐기로 집계"""
+        flows = [flow_data for _, flow_data in items]
+        if self.spool is None:
+            self.metrics.inc('flows_dropped', len(flows))
+        else:
+            try:
+                self.spool.write(flows, batch_id)
+                self.metrics.inc(counter, len(flows))
+            except OSError as e:
+                logging.error(f"스풀 기록 실패: {e}")
+                self.metrics.inc('flows_dropped', len(flows))
+        self._done(items)
+
+    def _next_batch(self):
+        """큐에서 batch_size개 또는 flush_interval 경과 시까지 Flow를 모음"""
+        try:
+            first = self.queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self.queue.get_nowait())
+                else:
+                    batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _worker_loop(self):
+        """전송 워커 (소비자 측)"""
+        session = self.session_factory()
+
+        while not self.stop_event.is_set():
+            batch = self._next_batch()
+            if not batch:
+                # 보낼 것이 없으면 지연 추정치를 서서히 낮춤 (과부하 판단이 풀리도록)
+                self.send_latency *= 1 - LATENCY_SMOOTHING
+                continue
+
+            flows = [flow_data for _, flow_data in batch]
+            # 장치 2가 처리했지만 응답이 늦어 실패로 본 배치를 재전송할 때 중복 처리하지 않도록
+            # 스풀에도 같은 배치 ID로 기록
+            batch_id = uuid.uuid4().hex
+            started = time.monotonic()
+            try:
+                ok = self.send_batch(flows, session, batch_id)
+            except Exception as e:
+                logging.error(f"전송 워커 오류: {e}")
+                ok = False
+            elapsed = time.monotonic() - started
+            self.send_latency += LATENCY_SMOOTHING * (elapsed - self.send_latency)
+
+            if ok:
+                self.metrics.inc('flows_sent', len(batch))
+                self.metrics.inc('batches_sent')
+                self._done(batch)
+            else:
+                # 장치 2 장애 → 스풀에 보관 후 복구 시 재전송
+                self.metrics.inc('flows_failed', len(batch))
+                self._spool(batch, 'flows_spooled', batch_id)
+
+            for _ in batch:
+                self.queue.task_done()
+
+        session.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+flow_sampler.py
+장치 2 과부하 시 적응형 Flow 샘플링 (load shedding)
+
+전송 지연(EWMA)과 큐 사용률을 주기적으로 보고 샘플링 비율을 AIMD로 조정:
+과부하면 비율을 곱으로 줄이고(×decrease), 여유가 생기면 조금씩(+increase) 회복.
+
+샘플링 대상은 반복되는 정상으로 보이는 Flow뿐이며, 아래 Flow는 항상 전달:
+- 최근 alert 이벤트에 나온 IP (출발지/목적지)
+- 처음 보는 출발지
+- 엣지 모델 점수가 높은 Flow
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+
+
+class RecentSet:
+    """TTL이 있는 크기 제한 집합 (가장 오래 갱신되지 않은 키부터 제거)"""
+
+    def __init__(self, ttl, capacity):
+        self.ttl = ttl
+        self.capacity = capacity
+        self._items = OrderedDict()  # key → 만료 시각
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, key, now=None):
+        """키 추가/갱신, 이미 유효한 키였으면 True"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expires = self._items.pop(key, None)
+            self._items[key] = now + self.ttl
+            if len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+            return expires is not None and expires > now
+
+    def contains(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            expires = self._items.get(key)
+            if expires is None:
+                return False
+            if expires <= now:
+                del self._items[key]
+                return False
+            return True
+
+
+class AdaptiveSampler:
+    """
+    적응형 샘플러
+
+    Args:
+        pipeline (FlowPipeline): 전송 지연/큐 사용률을 읽을 파이프라인
+        metrics (Metrics): 샘플링 카운터/게이지
+        target_latency (float): 배치 전송 지연 목표 (초), 넘으면 과부하
+        high_watermark (float): 큐 사용률 상한 (넘으면 과부하)
+        low_watermark (float): 큐 사용률 하한 (밑이면 비율 회복)
+        min_rate (float): 최소 샘플링 비율
+        increase (float): 회복 시 비율 증가량 (가산)
+        decrease (float): 과부하 시 비율 배수 (곱)
+        interval (float): 조정 주기 (초)
+        alert_ttl (float): alert IP 보호 유지 시간 (초)
+        source_ttl (float): 이 시간 동안 보이지 않은 출발지는 다시 새 출발지로 취급 (초)
+        capacity (int): alert IP / 출발지 기억 최대 개수
+    """
+
+    def __init__(self, pipeline, metrics, target_latency=0.5, high_watermark=0.7,
+                 low_watermark=0.3, min_rate=0.01, increase=0.05, decrease=0.5,
+                 interval=1.0, alert_ttl=300, source_ttl=600, capacity=100000):
+        self.pipeline = pipeline
+        self.metrics = metrics
+        self.target_latency = target_latency
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.interval = interval
+
+        self.alerted = RecentSet(alert_ttl, capacity)
+        self.sources = RecentSet(source_ttl, capacity)
+        self.rate = 1.0
+        self.effective_rate = 1.0
+        self._seen = 0
+        self._shed = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        metrics.set_gauge('sampling_rate', lambda: self.rate)
+        metrics.set_gauge('sampling_effective_rate', lambda: self.effective_rate)
+        metrics.set_gauge('sampler_alerted_ips', lambda: len(self.alerted))
+        for name in ('flows_shed', 'sampler_kept_alerted', 'sampler_kept_new_source',
+                     'sampler_kept_suspicious', 'sampler_kept_sampled'):
+            metrics.inc(name, 0)
+
+    def note_alert(self, *ips):
+        """alert 이벤트에 나온 IP 기록"""
+        now = time.monotonic()
+        for ip in ips:
+            if ip:
+                self.alerted.add(ip, now)
+
+    def keep(self, flow_data, suspicious=False):
+        """
+        Flow를 전송할지 결정
+
+        Args:
+            suspicious (bool): 엣지 모델 점수가 높은 Flow (항상 전달)
+
+        반환:
+            bool: True면 전송, False면 버림
+        """
+        now = time.monotonic()
+        self._seen += 1
+        src_ip = flow_data.get('src_ip')
+
+        if self.alerted.contains(src_ip, now) or self.alerted.contains(flow_data.get('dest_ip'), now):
+            self.metrics.inc('sampler_kept_alerted')
+            return True
+        if not self.sources.add(src_ip, now):
+            self.metrics.inc('sampler_kept_new_source')
+            return True
+        if suspicious:
+            self.metrics.inc('sampler_kept_suspicious')
+            return True
+
+        if self.rate >= 1.0 or random.random() < self.rate:
+            self.metrics.inc('sampler_kept_sampled')
+            return True
+
+        self._shed += 1
+        self.metrics.inc('flows_shed')
+        return False
+
+    def adjust(self):
+        """전송 지연/큐 사용률로 샘플링 비율 조정 (AIMD)"""
+        latency = self.pipeline.send_latency
+        fill = self.pipeline.fill_ratio()
+        previous = self.rate
+
+        if latency > self.target_latency or fill > self.high_watermark:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+        elif fill < self.low_watermark:
+            self.rate = min(1.0, self.rate + self.increase)
+
+        seen, shed = self._seen, self._shed
+        self._seen = self._shed = 0
+        self.effective_rate = (seen - shed) / seen if seen else 1.0
+
+        if self.rate < 1.0 and previous >= 1.0:
+            logging.warning(
+                f"📉 장치 2 과부하 (지연 {latency * 1000:.0f}ms, 큐 {fill:.0%}) - 반복 Flow 샘플링 시작"
+            )
+        elif self.rate >= 1.0 and previous < 1.0:
+            logging.info("📈 장치 2 부하 정상화 - 샘플링 중지")
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='flow-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(5)
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                self.adjust()
+            except Exception as e:
+                logging.error(f"샘플링 비율 조정 오류: {e}")
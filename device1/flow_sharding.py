@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+flow_sharding.py
+멀티 프로세스 Flow 추출 (고속 센서용)
+
+읽기 프로세스는 eve.json을 청크 단위로 읽어 flow 줄만 골라내고, flow_id 해시로
+N개 워커 프로세스에 줄 배치를 나눠 보냄. 워커는 JSON 파싱, extract_flow_features,
+장치 2 전송을 담당. 같은 flow_id는 항상 같은 워커(전송 스레드 1개)로 가므로
+Flow별 순서가 유지됨.
+"""
+
+import logging
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+
+FLOW_ID_RE = re.compile(rb'"flow_id":\s*(\d+)')
+METRICS_PUSH_INTERVAL = 1.0  # 워커 → 읽기 프로세스 메트릭 전달 주기 (초)
+
+
+def shard_of(line, shards):
+    """flow_id 기준 워커 번호 (flow_id가 없으면 0)"""
+    match = FLOW_ID_RE.search(line)
+    return int(match.group(1)) % shards if match else 0
+
+
+class AckForwarder:
+    """워커 프로세스 안에서 DeliveryTracker 대신 사용 - 완료 토큰을 읽기 프로세스로 전달"""
+
+    def __init__(self, ack_queue):
+        self.ack_queue = ack_queue
+
+    def done(self, tokens):
+        tokens = list(tokens)
+        if tokens:
+            self.ack_queue.put(('ack', tokens))
+
+
+def shard_worker(index, line_queue, ack_queue, edge_model=None):
+    """
+    워커 프로세스 진입점
+
+    Args:
+        index (int): 워커 번호
+        line_queue: [(token, line), ...] 배치가 들어오는 큐 (None이면 종료)
+        ack_queue: ('ack', tokens) / ('metrics', index, snapshot) / ('ready', index, 엣지 모델 사용 여부) 를 보내는 큐
+        edge_model (tuple): (엣지 모델 경로, 임계값) - 워커에서 직접 로드
+    """
+    # 순환 import 방지 (flow_extractor가 이 모듈을 import함)
+    import flow_extractor as fe
+    from flow_spool import FlowSpool, SpoolDrainer
+    from metrics import Metrics
+
+    # 여기서 import한 flow_extractor는 읽기 프로세스의 __main__과 별개 모듈이라
+    # 읽기 프로세스에서 로드한 EDGE_MODEL이 보이지 않음 → 워커에서 로드
+    if edge_model:
+        fe.init_edge_model(*edge_model)
+    ack_queue.put(('ready', index, fe.EDGE_MODEL is not None))
+
+    metrics = Metrics()
+    forwarder = AckForwarder(ack_queue)
+
+    # 워커별 스풀 디렉토리 (세그먼트 이름 충돌 방지)
+    spool = FlowSpool(os.path.join(fe.SPOOL_DIR, f'shard-{index}'), fsync=fe.SPOOL_FSYNC)
+    send_batch, batch_size = fe.get_send_batch()
+    drainer = SpoolDrainer(
+        spool, send_batch, fe.make_session, metrics,
+        rate=fe.SPOOL_DRAIN_RATE / max(1, fe.EXTRACTOR_PROCESSES),
+        batch_size=batch_size, interval=fe.SPOOL_DRAIN_INTERVAL
+    )
+    drainer.start()
+
+    # 전송 스레드 1개 → 같은 워커 안에서 Flow 순서 유지
+    pipeline = fe.create_pipeline(metrics, spool=spool, tracker=forwarder, workers=1)
+    pipeline.start()
+
+    # 같은 출발지의 Flow가 여러 워커로 나뉘므로 집계/샘플링은 워커별로 근사치
+    processor = fe.FlowProcessor(pipeline, metrics, shard=(index, fe.EXTRACTOR_PROCESSES))
+    processor.start()
+
+    last_push = 0.0
+    try:
+        while True:
+            try:
+                batch = line_queue.get(timeout=METRICS_PUSH_INTERVAL)
+            except queue.Empty:
+                batch = []
+
+            if batch is None:
+                break
+
+            filtered = []
+            for token, line in batch:
+                try:
+                    flow_data = processor.process(line)
+                except Exception as e:
+                    logging.error(f"[shard {index}] 처리 오류: {e}")
+                    flow_data = None
+
+                if flow_data:
+                    pipeline.submit(flow_data, token)
+                elif token is not None:
+                    filtered.append(token)
+
+            forwarder.done(filtered)
+            metrics.inc('lines_parsed', len(batch))
+
+            now = time.monotonic()
+            if now - last_push >= METRICS_PUSH_INTERVAL:
+                ack_queue.put(('metrics', index, metrics.snapshot()))
+                last_push = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        processor.stop()
+        pipeline.stop()
+        drainer.stop()
+        spool.close()
+        ack_queue.put(('metrics', index, metrics.snapshot()))
+
+
+class ShardRouter:
+    """
+    읽기 프로세스 측 라우터
+
+    Args:
+        processes (int): 워커 프로세스 수
+        tracker (DeliveryTracker): 체크포인트 계산용 tracker
+        metrics (Metrics): 읽기 프로세스 메트릭 (워커 메트릭 합계도 여기에 노출)
+        queue_batches (int): 워커별 대기 가능한 배치 수 (가득 차면 읽기 대기)
+        batch_lines (int): 워커로 보내는 배치당 최대 줄 수
+        edge_model (tuple): 워커가 로드할 (엣지 모델 경로, 임계값)
+        edge_expected (bool): 읽기 프로세스에서 엣지 모델이 로드됐는지 (워커와 다르면 오류 기록)
+    """
+
+    WORKER_COUNTERS = ('lines_parsed', 'flows_enqueued', 'flows_sent', 'flows_failed',
+                       'flows_spooled', 'flows_spilled', 'flows_dropped', 'spool_replayed',
+                       'flows_edge_forwarded', 'flows_edge_filtered', 'flows_aggregated',
+                       'summaries_sent', 'flows_shed', 'flows_with_alerts', 'alert_cache_size',
+                       'queue_depth')
+    WORKER_AVERAGES = ('sampling_rate', 'sampling_effective_rate', 'send_latency_ms')
+
+    def __init__(self, processes, tracker, metrics, queue_batches=64, batch_lines=1000,
+                 edge_model=None, edge_expected=False):
+        self.processes = max(1, processes)
+        self.tracker = tracker
+        self.metrics = metrics
+        self.batch_lines = batch_lines
+        self.edge_expected = edge_expected
+        self.edge_active = {}  # 워커 번호 → 엣지 모델 사용 여부
+
+        ctx = multiprocessing.get_context('fork' if hasattr(os, 'fork') else 'spawn')
+        self.line_queues = [ctx.Queue(maxsize=queue_batches) for _ in range(self.processes)]
+        self.ack_queue = ctx.Queue()
+        self.buffers = [[] for _ in range(self.processes)]
+        self.workers = [
+            ctx.Process(target=shard_worker, args=(i, self.line_queues[i], self.ack_queue, edge_model),
+                        name=f'flow-shard-{i}', daemon=True)
+            for i in range(self.processes)
+        ]
+        self.snapshots = {}
+        self.stop_event = threading.Event()
+        self.collector = threading.Thread(target=self._collect, name='shard-acks', daemon=True)
+
+        for name in self.WORKER_COUNTERS:
+            metrics.set_gauge(
+                f'shards_{name}',
+                lambda key=name: sum(s.get(key, 0) for s in list(self.snapshots.values()))
+            )
+        for name in self.WORKER_AVERAGES:
+            metrics.set_gauge(f'shards_{name}', lambda key=name: self._average(key))
+        metrics.set_gauge('shards_edge_model_active', lambda: sum(self.edge_active.values()))
+
+    def _average(self, key):
+        values = [s[key] for s in list(self.snapshots.values()) if key in s]
+        return sum(values) / len(values) if values else 0
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+        self.collector.start()
+        logging.info(f"🧩 Flow 워커 프로세스 {self.processes}개 시작 (flow_id 해시 분배)")
+
+    def route(self, token, line):
+        """flow 줄 하나를 해당 워커 버퍼에 추가"""
+        index = shard_of(line, self.processes)
+        buffer = self.buffers[index]
+        buffer.append((token, line))
+        if len(buffer) >= self.batch_lines:
+            self._send(index)
+
+    def broadcast(self, line):
+        """모든 워커에 보낼 줄 (alert 등, 체크포인트 토큰 없음)"""
+        for buffer in self.buffers:
+            buffer.append((None, line))
+
+    def flush(self):
+        """모든 워커 버퍼 전송"""
+        for index in range(self.processes):
+            if self.buffers[index]:
+                self._send(index)
+
+    def _send(self, index):
+        batch = self.buffers[index]
+        self.buffers[index] = []
+        # 워커가 밀리면 여기서 대기 → 읽기 속도가 워커 처리 속도에 맞춰짐
+        self.line_queues[index].put(batch)
+        self.metrics.inc('lines_routed', len(batch))
+
+    def _collect(self):
+        """워커에서 오는 완료 토큰/메트릭 수집"""
+        while not self.stop_event.is_set():
+            try:
+                message = self.ack_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if message[0] == 'ack':
+                self.tracker.done(message[1])
+            elif message[0] == 'metrics':
+                self.snapshots[message[1]] = message[2]
+            elif message[0] == 'ready':
+                _, index, active = message
+                self.edge_active[index] = active
+                if self.edge_expected and not active:
+                    logging.error(f"[shard {index}] 엣지 모델 로드 실패 - 이 워커는 모든 Flow를 전달하고 샘플러 보호 점수도 꺼짐")
+
+    def stop(self, timeout=10):
+        self.flush()
+        for line_queue in self.line_queues:
+            line_queue.put(None)
+        for worker in self.workers:
+            worker.join(timeout)
+            if worker.is_alive():
+                worker.terminate()
+        # 마지막 ack 수집 후 종료
+        time.sleep(0.5)
+        self.stop_event.set()
+        self.collector.join(2)
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+flow_spool.py
+Flow 전달 보장 (at-least-once)
+
+- DeliveryTracker: 큐에 들어간 Flow가 전송/스풀될 때까지 추적하여
+                   안전하게 저장할 수 있는 eve.json 위치(체크포인트)를 계산
+- FlowSpool: 장치 2로 보내지 못한 Flow를 기록하는 append-only 디스크 스풀 (세그먼트 파일)
+- SpoolDrainer: 장치 2가 복구되면 스풀을 정해진 속도로 재전송하는 백그라운드 스레드
+
+재전송은 배치 ID(X-Flow-Batch-Id)를 붙여 보내므로 장치 2는 이미 처리한 배치를 다시 처리하지 않음:
+전송을 시도했다가 실패한 배치는 처음 보낸 ID와 경계를 그대로 기록해 같은 ID로 재전송하고,
+ID 없이 기록된 Flow와 중간에 죽어 덜 기록된 배치는 재전송 배치 내용의 해시를 ID로 씀 (재전송 재시도 간에 같음)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+# 스풀에서 배치 경계를 나타내는 줄의 키: {"_batch": ID, "count": 뒤따르는 Flow 수}
+BATCH_MARKER = '_batch'
+
+
+class DeliveryTracker:
+    """
+    처리 중인 Flow의 eve.json 위치를 추적
+
+    committed()는 아직 끝나지 않은 가장 오래된 Flow 줄의 시작 위치를 반환하므로,
+    그 위치부터 다시 읽으면 어떤 Flow도 잃지 않음 (중복은 가능)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # token → (inode, 줄 시작 오프셋), 삽입 순서 = 읽은 순서
+        self._next_token = 0
+        self._read_position = (None, 0)
+
+    def begin(self, inode, offset):
+        """큐에 넣을 Flow 등록, 완료 시 done()에 넘길 토큰 반환"""
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._pending[token] = (inode, offset)
+            return token
+
+    def done(self, tokens):
+        """전송 또는 스풀 기록이 끝난 Flow 토큰들"""
+        with self._lock:
+            for token in tokens:
+                self._pending.pop(token, None)
+
+    def advance(self, inode, offset):
+        """읽기 스레드가 처리한 마지막 줄 다음 위치"""
+        with self._lock:
+            self._read_position = (inode, offset)
+
+    def committed(self):
+        """체크포인트로 저장해도 안전한 (inode, offset)"""
+        with self._lock:
+            for position in self._pending.values():
+                return position
+            return self._read_position
+
+    @property
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+
+class FlowSpool:
+    """
+    append-only 디스크 스풀
+
+    spool_dir 아래 segment-<번호>.jsonl 파일에 Flow를 한 줄씩 기록.
+    재전송 시에는 현재 세그먼트를 닫고(rotate) 닫힌 세그먼트만 읽으므로
+    기록과 재전송이 같은 파일을 동시에 건드리지 않음
+    """
+
+    def __init__(self, spool_dir, fsync=True):
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = None
+        self._active = None
+
+        existing = self.segments()
+        self._next_seq = (self._seq_of(existing[-1]) + 1) if existing else 0
+
+    @staticmethod
+    def _seq_of(path):
+        return int(path.stem.split('-')[1])
+
+    def segments(self):
+        """세그먼트 파일 목록 (오래된 순)"""
+        return sorted(self.spool_dir.glob('segment-*.jsonl'), key=self._seq_of)
+
+    def write(self, flows, batch_id=None):
+        """Flow 리스트를 현재 세그먼트에 추가 (batch_id가 있으면 한 배치로 재전송)"""
+        if not flows:
+            return
+        lines = [json.dumps(flow_data) + '\n' for flow_data in flows]
+        if batch_id:
+            lines.insert(0, json.dumps({BATCH_MARKER: batch_id, 'count': len(flows)}) + '\n')
+        data = ''.join(lines).encode('utf-8')
+
+        with self._lock:
+            if self._file is None:
+                self._active = self.spool_dir / f'segment-{self._next_seq:08d}.jsonl'
+                self._next_seq += 1
+                self._file = open(self._active, 'ab')
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def rotate(self):
+        """현재 세그먼트를 닫아 재전송 대상으로 만듦"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._active = None
+
+    def closed_segments(self):
+        """기록이 끝난 세그먼트 목록"""
+        with self._lock:
+            active = self._active
+        return [p for p in self.segments() if p != active]
+
+    def pending_bytes(self):
+        total = 0
+        for path in self.segments():
+            try:
+                total += path.stat().st_size
+            except OSError:
+                continue
+        return total
+
+    def close(self):
+        self.rotate()
+
+
+class SpoolDrainer:
+    """
+    스풀 재전송 스레드
+
+    Args:
+        spool (FlowSpool): 재전송할 스풀
+        send_batch (callable): send_batch(flows, session, batch_id) → bool
+        session_factory (callable): HTTP 세션 생성 함수
+        metrics (Metrics): 카운터 저장소
+        rate (float): 초당 최대 재전송 Flow 수
+        batch_size (int): 한 번에 재전송할 Flow 수
+        interval (float): 스풀 확인 주기 (초)
+        max_backoff (float): 재전송 실패 시 최대 대기 시간 (초)
+    """
+
+    def __init__(self, spool, send_batch, session_factory, metrics, rate=500,
+                 batch_size=200, interval=5.0, max_backoff=60.0):
+        self.spool = spool
+        self.send_batch = send_batch
+        self.session_factory = session_factory
+        self.metrics = metrics
+        self.rate = max(1.0, rate)
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.progress_path = spool.spool_dir / 'drain.json'
+        self.stop_event = threading.Event()
+        self.thread = None
+
+        metrics.set_gauge('spool_bytes', spool.pending_bytes)
+        metrics.inc('spool_replayed', 0)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name='spool-drainer', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(5)
+
+    def _load_progress(self, segment):
+        """세그먼트에서 이미 재전송한 줄 수 (재시작 후 이어서 전송)"""
+        try:
+            with open(self.progress_path, 'r') as f:
+                data = json.load(f)
+            if data.get('segment') == segment.name:
+                return int(data.get('lines', 0))
+        except (FileNotFoundError, ValueError, TypeError):
+            pass
+        return 0
+
+    def _save_progress(self, segment, lines):
+        tmp_path = self.progress_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'segment': segment.name, 'lines': lines}, f)
+        os.replace(tmp_path, self.progress_path)
+
+    def _drain_segment(self, segment, session):
+        """세그먼트 하나를 재전송, 끝까지 보냈으면 True"""
+        done_lines = self._load_progress(segment)
+        batch = []
+        batch_id = None  # 기록된 배치 ID (None이면 batch_size개씩 묶고 내용 해시를 ID로)
+        remaining = 0  # 기록된 배치에서 아직 읽지 않은 Flow 수
+        line_no = 0
+        batch_end = 0  # 마지막으로 batch에 넣은 줄 번호
+
+        with open(segment, 'r') as f:
+            for line in f:
+                line_no += 1
+                if line_no <= done_lines:
+                    continue
+                try:
+                    flow_data = json.loads(line)
+                except json.JSONDecodeError:
+                    # 중간에 죽어 잘린 마지막 줄 등은 건너뜀
+                    continue
+
+                if isinstance(flow_data, dict) and BATCH_MARKER in flow_data:
+                    # 새 배치 시작 → 모으던 Flow(잘린 배치 포함)는 먼저 보냄
+                    if batch and not self._flush(segment, batch, self._complete_id(batch_id, remaining),
+                                                 batch_end, session):
+                        return False
+                    batch = []
+                    batch_id, remaining = flow_data[BATCH_MARKER], int(flow_data.get('count', 0))
+                    continue
+
+                batch.append(flow_data)
+                batch_end = line_no
+                if batch_id is not None:
+                    remaining -= 1
+                    full = remaining <= 0
+                else:
+                    full = len(batch) >= self.batch_size
+
+                if full:
+                    if not self._flush(segment, batch, batch_id, batch_end, session):
+                        return False
+                    batch, batch_id = [], None
+                    if self.stop_event.is_set():
+                        return False
+
+        if batch and not self._send(batch, session, self._complete_id(batch_id, remaining)):
+            return False
+
+        segment.unlink()
+        try:
+            self.progress_path.unlink()
+        except FileNotFoundError:
+            pass
+        logging.info(f"♻️  스풀 재전송 완료: {segment.name}")
+        return True
+
+    @staticmethod
+    def _complete_id(batch_id, remaining):
+        """
+        기록된 배치 ID는 배치가 온전할 때만 사용 - 중간에 죽어 Flow가 덜 기록된 배치를 같은 ID로 보내면
+        장치 2가 기억해 둔 원래 배치의 판정(개수가 다름)을 돌려주어 재전송이 계속 실패하므로 내용 해시 ID로
+        """
+        return batch_id if remaining <= 0 else None
+
+    def _flush(self, segment, batch, batch_id, line_no, session):
+        """배치 재전송 후 line_no까지 진행 상황 저장"""
+        if not self._send(batch, session, batch_id):
+            return False
+        self._save_progress(segment, line_no)
+        return True
+
+    def _send(self, batch, session, batch_id=None):
+        """배치 전송 후 속도 제한만큼 대기"""
+        if batch_id is None:
+            content = ''.join(json.dumps(flow_data, sort_keys=True) for flow_data in batch)
+            batch_id = 'spool-' + hashlib.sha1(content.encode('utf-8')).hexdigest()
+        started = time.monotonic()
+        if not self.send_batch(batch, session, batch_id):
+            return False
+        self.metrics.inc('spool_replayed', len(batch))
+
+        pause = len(batch) / self.rate - (time.monotonic() - started)
+        if pause > 0:
+            self.stop_event.wait(pause)
+        return True
+
+    def _run(self):
+        session = self.session_factory()
+        backoff = self.interval
+
+        while not self.stop_event.wait(backoff):
+            if not self.spool.segments():
+                backoff = self.interval
+                continue
+
+            # 기록 중인 세그먼트를 닫고, 닫힌 세그먼트부터 순서대로 재전송
+            self.spool.rotate()
+            ok = True
+            for segment in self.spool.closed_segments():
+                if not self._drain_segment(segment, session):
+                    ok = False
+                    break
+
+            if ok:
+                backoff = self.interval
+            else:
+                backoff = min(backoff * 2, self.max_backoff)
+                logging.warning(f"스풀 재전송 보류, {backoff:.0f}초 후 재시도")
+
+        session.close()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+metrics.py
+프로세스 내부 카운터/게이지 수집 및 HTTP 노출 (Prometheus 텍스트 + JSON)
+"""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Metrics:
+    """스레드 안전 카운터/게이지 저장소"""
+
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+
+    def inc(self, name, value=1):
+        """카운터 증가"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        """
+        게이지 설정
+
+        Args:
+            name (str): 게이지 이름
+            value: 숫자 또는 호출 시점에 값을 계산하는 함수
+        """
+        with self._lock:
+            self._gauges[name] = value
+
+    def get(self, name, default=0):
+        """카운터/게이지 현재 값"""
+        with self._lock:
+            if name in self._counters:
+                return self._counters[name]
+            value = self._gauges.get(name, default)
+        return value() if callable(value) else value
+
+    def snapshot(self):
+        """모든 값을 dict로 반환 (게이지 함수는 이 시점에 평가)"""
+        with self._lock:
+            values = dict(self._counters)
+            gauges = dict(self._gauges)
+
+        for name, value in gauges.items():
+            try:
+                values[name] = value() if callable(value) else value
+            except Exception as e:
+                logging.error(f"게이지 계산 오류 ({name}): {e}")
+        return values
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식으로 변환"""
+        lines = []
+        for name, value in sorted(self.snapshot().items()):
+            lines.append(f"{self.prefix}{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def start_metrics_server(metrics, host='127.0.0.1', port=9101):
+    """
+    메트릭 HTTP 서버를 데몬 스레드로 시작
+
+    GET /metrics       → Prometheus 텍스트
+    GET /metrics.json  → JSON
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body = metrics.render_prometheus().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body = json.dumps(metrics.snapshot()).encode('utf-8')
+                content_type = 'application/json'
+            else:
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # 스크레이프 요청마다 로그를 남기지 않음
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+
+    logging.info(f"📈 메트릭: http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+rule_coalescer.py
+ADD_RULE 요청 묶음 처리 - 룰 파일 한 번 추가 + Suricata 룰 재로드 한 번
+
+대규모 공격 중에는 룰이 짧은 간격으로 몰려 들어오는데, 룰 재로드는 룰셋이 클수록 비쌈.
+짧은 대기 시간(window) 동안 들어온 룰을 모아:
+
+1. AI 룰 파일에 한 번의 write로 추가 (O_APPEND + fsync)
+2. reload-rules 한 번 실행
+3. 같은 묶음의 요청자 모두에게 재로드 결과로 응답
+
+같은 묶음에서 앞선 요청이 이미 추가하는 SID를 다른 룰로 추가하는 요청은 거부 (NOK) -
+파일에는 SID당 룰 하나만 남으므로 둘 다 OK로 응답하면 먼저 온 룰이 적용되지 않은 채 성공으로 보임.
+
+룰 삭제(만료)도 같은 묶음으로 처리 - 삭제가 있는 묶음은 파일을 새로 써서 교체 (임시 파일 + rename).
+AI 룰 파일은 이 클래스의 스레드만 수정하므로 추가/삭제가 서로 덮어쓰지 않음.
+재로드가 실패하면 파일을 이전 상태로 되돌려 다음 재로드가 계속 실패하지 않도록 함.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+SID_PATTERN = re.compile(rb'\bsid\s*:\s*(\d+)\s*;')
+
+
+def rule_sid(line):
+    """룰 한 줄의 SID (없으면 None)"""
+    match = SID_PATTERN.search(line if isinstance(line, bytes) else line.encode('utf-8'))
+    return int(match.group(1)) if match else None
+
+
+class RuleCoalescer:
+    """
+    ADD_RULE 묶음 처리기
+
+    Args:
+        rules_path (str): AI 룰 파일 경로 (Suricata 설정의 rule-files에 포함되어 있어야 함)
+        reload (callable): 룰 재로드 함수 → Suricata 응답 dict
+        window (float): 마지막 요청 후 이 시간 동안 추가 요청이 없으면 적용 (초)
+        max_delay (float): 첫 요청 후 최대 대기 시간 (초)
+        max_batch (int): 이만큼 모이면 바로 적용
+        on_change (callable): 재로드 성공 후 호출 (추가/교체된 {sid: 룰}, 삭제된 SID 집합)
+    """
+
+    def __init__(self, rules_path, reload, window=0.2, max_delay=1.0, max_batch=500, on_change=None):
+        self.rules_path = rules_path
+        self.reload = reload
+        self.on_change = on_change
+        self.window = window
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rules_applied = 0
+        self.rules_removed = 0
+        self.last_reload_ms = None  # 마지막으로 성공한 재로드 소요 시간
+
+        self._cond = threading.Condition()
+        self._pending = []  # [([(sid, 룰 또는 None(삭제))], Future)]
+        self._pending_rules = 0
+        self._first_at = 0.0
+        self._last_at = 0.0
+        self._thread = threading.Thread(target=self._run, name='rule-coalescer', daemon=True)
+        self._thread.start()
+
+    def submit(self, rule, sid):
+        """
+        룰 하나 등록
+
+        반환:
+            Future: 묶음 재로드가 끝나면 응답 dict ({'return': 'OK' | 'NOK', ...})
+        """
+        return self._enqueue([(sid, rule)])
+
+    def remove(self, sids):
+        """
+        룰 삭제 등록 (SID 목록, 한 묶음으로 처리)
+
+        반환:
+            Future: 묶음 재로드가 끝나면 응답 dict
+        """
+        return self._enqueue([(sid, None) for sid in sids])
+
+    def replace(self, removals, rules):
+        """
+        룰 삭제 + 추가/교체를 같은 묶음에서 한 번에 적용 (룰 압축 등, 중간 상태가 재로드되지 않음)
+
+        Args:
+            removals (iterable): 삭제할 SID
+            rules (dict): SID → 룰 (같은 SID가 파일에 있으면 교체)
+
+        반환:
+            Future: 묶음 재로드가 끝나면 응답 dict
+        """
+        return self._enqueue([(sid, None) for sid in removals] + list(rules.items()))
+
+    def _enqueue(self, changes):
+        """변경 목록 [(sid, 룰 또는 None(삭제))] 하나 등록 - 한 등록은 여러 묶음으로 나뉘지 않음"""
+        future = Future()
+        now = time.monotonic()
+        with self._cond:
+            if not self._pending:
+                self._first_at = now
+            self._last_at = now
+            self._pending.append((changes, future))
+            self._pending_rules += self._count_rules(changes)
+            self._cond.notify()
+        return future
+
+    @staticmethod
+    def _count_rules(changes):
+        return sum(1 for _, rule in changes if rule is not None)
+
+    def _due(self, now):
+        """적용할 때까지 남은 시간 (0 이하면 지금 적용) - _cond 안에서 호출"""
+        if self._pending_rules >= self.max_batch:
+            return 0.0
+        return min(self._last_at + self.window, self._first_at + self.max_delay) - now
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                remaining = self._due(time.monotonic())
+                while remaining > 0:
+                    self._cond.wait(remaining)
+                    remaining = self._due(time.monotonic())
+                # 요청 순서 유지, 추가 룰이 max_batch를 넘기 전까지 (삭제만 있는 요청은 제한 없이 포함)
+                batch, additions = [], 0
+                while self._pending:
+                    count = self._count_rules(self._pending[0][0])
+                    if batch and count and additions + count > self.max_batch:
+                        break
+                    batch.append(self._pending.pop(0))
+                    additions += count
+                self._pending_rules -= additions
+                if self._pending:
+                    self._first_at = self._last_at = time.monotonic()
+
+            batch = self._reject_duplicates(batch)
+            if not batch:
+                continue
+            try:
+                response = self._apply([change for changes, _ in batch for change in changes])
+            except Exception as e:
+                logging.error(f"❌ 룰 묶음 적용 오류: {e}")
+                response = {'return': 'NOK', 'message': str(e)}
+
+            for _, future in batch:
+                future.set_result(dict(response))
+
+    @staticmethod
+    def _reject_duplicates(batch):
+        """
+        앞선 요청이 추가하는 SID를 다른 룰로 다시 추가하는 요청을 NOK로 응답하고 묶음에서 뺌
+        (같은 룰이면 결과가 같으므로 허용, 중간에 삭제된 SID는 다시 추가 가능)
+        """
+        accepted = []
+        added = {}  # SID → 앞선 요청이 추가한 룰
+        for changes, future in batch:
+            duplicate = next(
+                (sid for sid, rule in changes
+                 if rule is not None and sid in added and added[sid] != rule.strip()),
+                None
+            )
+            if duplicate is not None:
+                logging.error(f"❌ 같은 묶음에 SID {duplicate}를 쓰는 다른 룰이 있어 거부")
+                future.set_result({'return': 'NOK', 'message': f'Duplicate SID in batch: {duplicate}'})
+                continue
+            for sid, rule in changes:
+                if rule is None:
+                    added.pop(sid, None)
+                else:
+                    added[sid] = rule.strip()
+            accepted.append((changes, future))
+        return accepted
+
+    def _apply(self, batch):
+        """묶음 하나(변경 목록)를 파일에 반영하고 재로드"""
+        # 같은 묶음 안의 중복 SID는 마지막 요청만 사용 (추가 후 삭제면 삭제, 삭제 후 추가면 추가)
+        changes = {}
+        for sid, rule in batch:
+            changes[sid] = rule.strip() if rule is not None else None
+        rules = {sid: rule for sid, rule in changes.items() if rule is not None}
+        removals = {sid for sid, rule in changes.items() if rule is None}
+        data = ''.join(f'{rule}\n' for rule in rules.values()).encode('utf-8')
+
+        started = time.perf_counter()
+        if removals:
+            restore, removed = self._rewrite(removals, set(rules), data)
+        else:
+            restore, removed = self._append(data), 0
+
+        reload_started = time.perf_counter()
+        response = self.reload()
+        reload_ms = (time.perf_counter() - reload_started) * 1000
+        elapsed = (time.perf_counter() - started) * 1000
+
+        if response.get('return') != 'OK':
+            logging.error(
+                f"❌ 룰 재로드 실패 (추가 {len(rules)}개 / 삭제 {removed}개 되돌림): {response.get('message')}"
+            )
+            restore()
+            return response
+
+        if self.on_change:
+            self.on_change(rules, removals)
+        self.batches += 1
+        self.last_reload_ms = round(reload_ms, 1)
+        self.rules_applied += len(rules)
+        self.rules_removed += removed
+        if removals:
+            logging.info(f"✅ 룰 {len(rules)}개 추가, {removed}개 삭제 + 재로드 1회 ({elapsed:.0f}ms)")
+        else:
+            logging.info(f"✅ 룰 {len(rules)}개 추가 + 재로드 1회 ({elapsed:.0f}ms)")
+        return {'return': 'OK', 'message': 'Rule added successfully', 'batch_size': len(rules), 'removed': removed,
+                'reload_ms': round(reload_ms, 1)}
+
+    def _append(self, data):
+        """룰 추가만 있는 묶음 - 한 번의 write로 추가, 되돌리는 함수 반환"""
+        fd = os.open(self.rules_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            previous_size = os.fstat(fd).st_size
+            # 파일이 개행 없이 끝나 있으면 첫 룰이 이어 붙지 않도록 개행 추가
+            if previous_size:
+                with open(self.rules_path, 'rb') as f:
+                    f.seek(previous_size - 1)
+                    if f.read(1) != b'\n':
+                        data = b'\n' + data
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        def restore():
+            with open(self.rules_path, 'r+b') as f:
+                f.truncate(previous_size)
+                os.fsync(f.fileno())
+        return restore
+
+    def _rewrite(self, removals, replaced, data):
+        """
+        삭제가 있는 묶음 - 삭제할 SID와 다시 추가하는 SID(replaced)의 기존 줄을 뺀 새 파일로 교체
+
+        반환:
+            (되돌리는 함수, 삭제한 룰 수)
+        """
+        try:
+            with open(self.rules_path, 'rb') as f:
+                original = f.read()
+        except FileNotFoundError:
+            original = b''
+
+        kept = []
+        removed = 0
+        for line in original.splitlines(keepends=True):
+            sid = rule_sid(line)
+            if sid in removals:
+                removed += 1
+                continue
+            if sid in replaced:
+                continue
+            kept.append(line)
+        if kept and not kept[-1].endswith(b'\n'):
+            kept[-1] += b'\n'
+        self._replace(b''.join(kept) + data)
+        return (lambda: self._replace(original)), removed
+
+    def _replace(self, content):
+        temp_path = f'{self.rules_path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.rules_path)
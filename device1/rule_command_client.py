@@ -3,18 +3,79 @@
 rule_command_client.py
 AI 룰 추가 명령 수신 및 Suricata 적용
 포트: 10002
+
+수신/Relay 전송 모두 command_framing 프로토콜 (줄 단위 JSON, id로 파이프라이닝).
+연결마다 수신 스레드 하나, 명령 처리는 DISPATCH_WORKERS개 스레드 풀에서 동시에 수행하고
+Relay로는 연결 하나를 유지하며 요청을 이어 보냄.
+ADD_RULE은 rule_coalescer로 모아 룰 파일 추가 + reload-rules 한 번으로 적용.
+BLOCK_IP / UNBLOCK_IP는 Suricata 데이터셋(dataset-add / dataset-remove)으로 처리 -
+데이터셋을 보는 차단 룰 하나만 있으면 되므로 IP가 늘어도 룰 수/재로드 시간이 그대로.
+AI 룰(SID 900000001~)은 rule_expiry로 TTL이 지나거나 개수 제한을 넘으면 묶음 삭제,
+PIN_RULE / UNPIN_RULE로 운영자가 남겨 둘 룰을 고정.
+ADD_RULE의 룰은 rule_validator로 형식/SID 중복을 먼저 확인해 Suricata 왕복 없이 거부.
+출발지만 다른 AI 룰은 rule_compactor로 주기적으로 (또는 COMPACT_RULES 명령으로) 주소 목록 / CIDR 룰로 압축.
 """
 
+import ipaddress
+import os
 import socket
-import json
 import logging
-import requests
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from command_framing import FrameDecoder, FrameError, FramedClient, encode_frame, is_pipelined, reply
+from rule_coalescer import RuleCoalescer
+from rule_compactor import RuleCompactor
+from rule_expiry import AI_SID_MIN, RuleExpiry
+from rule_validator import RuleValidator
+
+# 설정 (환경 변수로 변경 가능)
+LISTEN_IP = os.environ.get('RULE_CLIENT_LISTEN_IP', '0.0.0.0')
+LISTEN_PORT = int(os.environ.get('RULE_CLIENT_LISTEN_PORT', 10002))
+RELAY_HOST = os.environ.get('RULE_CLIENT_RELAY_HOST', '127.0.0.1')
+RELAY_PORT = int(os.environ.get('RULE_CLIENT_RELAY_PORT', 10001))
+RELAY_SERVER = f'{RELAY_HOST}:{RELAY_PORT}'
+RELAY_TIMEOUT = float(os.environ.get('RULE_CLIENT_RELAY_TIMEOUT', 30))  # Relay 응답 대기 (초, Relay 대기열 포함)
+DISPATCH_WORKERS = int(os.environ.get('RULE_CLIENT_DISPATCH_WORKERS', 8))  # 동시에 처리하는 명령 수
+CLIENT_TIMEOUT = float(os.environ.get('RULE_CLIENT_TIMEOUT', 10))  # 요청 수신 제한 시간 (초)
+IDLE_TIMEOUT = float(os.environ.get('RULE_CLIENT_IDLE_TIMEOUT', 60))  # 유지 중인 연결의 유휴 제한 시간 (초)
+BUFFER_SIZE = 65536
+
+# 룰 묶음 적용 (룰 파일 추가 + reload-rules 1회), 비활성화하면 룰마다 rule-add 명령
+COALESCE_ENABLED = os.environ.get('RULE_CLIENT_COALESCE', '1') == '1'
+AI_RULES_PATH = os.environ.get('RULE_CLIENT_RULES_FILE', '/etc/suricata/rules/ai_rules.rules')
+COALESCE_WINDOW = float(os.environ.get('RULE_CLIENT_COALESCE_WINDOW', 0.2))  # 마지막 요청 후 대기 (초)
+COALESCE_MAX_DELAY = float(os.environ.get('RULE_CLIENT_COALESCE_MAX_DELAY', 1.0))  # 첫 요청 후 최대 대기 (초)
+COALESCE_MAX_RULES = int(os.environ.get('RULE_CLIENT_COALESCE_MAX_RULES', 500))  # 묶음당 최대 룰 수
+RELOAD_TIMEOUT = float(os.environ.get('RULE_CLIENT_RELOAD_TIMEOUT', 120))  # 재로드 응답 대기 (초)
+
+# 데이터셋 차단 (BLOCK_IP): 공격 IP를 Suricata 데이터셋에 추가, 데이터셋을 보는 룰은 하나뿐이라 재로드 없음
+BLOCK_DATASET = os.environ.get('RULE_CLIENT_BLOCK_DATASET', 'ai_blocklist')
+BLOCK_DATASET_STATE = os.environ.get('RULE_CLIENT_BLOCK_DATASET_STATE', '/var/lib/suricata/ai_blocklist.lst')
+BLOCK_RULE_SID = int(os.environ.get('RULE_CLIENT_BLOCK_RULE_SID', 899999999))
+BLOCK_RULE = (
+    f'drop ip any any -> $HOME_NET any (msg:"AI_BLOCK:dataset {BLOCK_DATASET}"; ip.src; '
+    f'dataset:isset,{BLOCK_DATASET},type ip,state {BLOCK_DATASET_STATE}; sid:{BLOCK_RULE_SID}; rev:1;)'
+)
+
+# 룰 사전 검증 (형식 / SID 중복), 결과는 룰 해시 기준 LRU 캐시
+VALIDATE_ENABLED = os.environ.get('RULE_CLIENT_VALIDATE', '1') == '1'
+VALIDATE_CACHE_SIZE = int(os.environ.get('RULE_CLIENT_VALIDATE_CACHE', 4096))
+
+# AI 룰 만료 (묶음 적용 사용 시): TTL이 지나거나 개수 제한을 넘은 룰을 묶음 삭제 + 재로드 1회
+EXPIRY_ENABLED = os.environ.get('RULE_CLIENT_EXPIRY', '1') == '1'
+RULE_TTL = float(os.environ.get('RULE_CLIENT_RULE_TTL', 86400))  # 기본 TTL (초, 0이면 만료 없음)
+MAX_AI_RULES = int(os.environ.get('RULE_CLIENT_MAX_AI_RULES', 5000))  # 살아 있는 AI 룰 최대 수 (0이면 제한 없음)
+EXPIRY_TICK = float(os.environ.get('RULE_CLIENT_EXPIRY_TICK', 1.0))  # 만료 확인 주기 (초)
+EXPIRY_STATE = os.environ.get('RULE_CLIENT_EXPIRY_STATE', '/var/lib/suricata/ai_rules_expiry.json')
 
-# 설정
-LISTEN_IP = '0.0.0.0'
-LISTEN_PORT = 10002
-RELAY_SERVER = 'http://127.0.0.1:10001'
-BUFFER_SIZE = 4096
+# AI 룰 압축 (묶음 적용 사용 시): 출발지만 다른 룰을 주소 목록 / CIDR 룰로 병합
+COMPACT_INTERVAL = float(os.environ.get('RULE_CLIENT_COMPACT_INTERVAL', 300))  # 압축 주기 (초, 0이면 명령으로만)
+COMPACT_MIN_GROUP = int(os.environ.get('RULE_CLIENT_COMPACT_MIN_GROUP', 2))  # 이 수 이상 모인 룰만 병합
+COMPACT_MAX_ADDRESSES = int(os.environ.get('RULE_CLIENT_COMPACT_MAX_ADDRESSES', 1000))  # 룰 하나의 최대 주소 수
+COMPACT_EXPIRY_BUCKET = float(os.environ.get('RULE_CLIENT_COMPACT_EXPIRY_BUCKET', 3600))  # 만료 시각이 이 폭(초) 안인 룰끼리만 병합
+COMPACTION_MAP = os.environ.get('RULE_CLIENT_COMPACTION_MAP', '/var/lib/suricata/ai_rules_compaction.json')
 
 # 로깅
 logging.basicConfig(
@@ -27,9 +88,13 @@ logging.basicConfig(
 )
 
 
+relay_client = FramedClient(RELAY_HOST, RELAY_PORT, timeout=RELAY_TIMEOUT, idle_timeout=IDLE_TIMEOUT / 2)
+dispatcher = ThreadPoolExecutor(max_workers=DISPATCH_WORKERS, thread_name_prefix='rule-dispatch')
+
+
 def send_to_suricata_relay(command_json):
     """
-    로컬 Relay Server로 Suricata 명령 전송
+    로컬 Relay Server로 Suricata 명령 전송 (유지 중인 연결로 파이프라이닝)
     
     Args:
         command_json (dict): Suricata 명령
@@ -38,40 +103,132 @@ def send_to_suricata_relay(command_json):
         dict: Suricata 응답
     """
     try:
-        # TCP로 Relay Server에 전송
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(5)
-        sock.connect(('127.0.0.1', 10001))
-        
-        # JSON 전송
-        message = json.dumps(command_json) + '\n'
-        sock.sendall(message.encode('utf-8'))
-        
-        # 응답 수신
-        response_data = b""
-        while True:
-            chunk = sock.recv(BUFFER_SIZE)
-            if not chunk:
-                break
-            response_data += chunk
-        
-        sock.close()
-        
-        # 응답 파싱
-        response = json.loads(response_data.decode('utf-8'))
-        return response
+        return relay_client.request(command_json)
+    
+    except Exception as e:
+        logging.error(f"Relay 통신 오류: {e}")
+        return {'return': 'NOK', 'message': str(e)}
+
+
+def reload_suricata_rules():
+    """Suricata 룰 재로드 (룰셋이 크면 오래 걸리므로 대기 시간을 길게)"""
+    try:
+        return relay_client.request({"command": "reload-rules"}, timeout=RELOAD_TIMEOUT)
     
     except Exception as e:
         logging.error(f"Relay 통신 오류: {e}")
         return {'return': 'NOK', 'message': str(e)}
 
 
+validator = RuleValidator(VALIDATE_CACHE_SIZE) if VALIDATE_ENABLED else None
+
+coalescer = RuleCoalescer(
+    AI_RULES_PATH, reload_suricata_rules, window=COALESCE_WINDOW,
+    max_delay=COALESCE_MAX_DELAY, max_batch=COALESCE_MAX_RULES,
+    on_change=validator.update if validator else None
+) if COALESCE_ENABLED else None
+
+expiry = RuleExpiry(
+    coalescer, EXPIRY_STATE, default_ttl=RULE_TTL, max_rules=MAX_AI_RULES,
+    tick=EXPIRY_TICK, sid_min=AI_SID_MIN
+) if coalescer is not None and EXPIRY_ENABLED else None
+
+
+compactor = RuleCompactor(
+    coalescer, COMPACTION_MAP, expiry=expiry, sid_min=AI_SID_MIN,
+    min_group=COMPACT_MIN_GROUP, max_addresses=COMPACT_MAX_ADDRESSES,
+    expiry_bucket=COMPACT_EXPIRY_BUCKET
+) if coalescer is not None else None
+
+
+def validate_rule(rule, sid):
+    """
+    룰 사전 검증
+    
+    반환:
+        dict: 거부 응답 (NOK) 또는 같은 룰이 이미 적용 중이면 OK 응답, 적용해야 하면 None
+    """
+    if validator is None:
+        return None
+    
+    error, active = validator.check(rule, sid)
+    if error:
+        logging.error(f"❌ 룰 검증 실패 (SID {sid}): {error}")
+        return {'return': 'NOK', 'message': f'Invalid rule: {error}'}
+    if active:
+        logging.info(f"♻️ 이미 적용된 룰: SID {sid}")
+        return {'return': 'OK', 'message': 'Rule already active'}
+    return None
+
+
+def parse_ttl(data):
+    """
+    ADD_RULE의 ttl 확인
+    
+    반환:
+        (ttl 또는 None, 오류 메시지 또는 None)
+    """
+    ttl = data.get('ttl')
+    if ttl is None:
+        return None, None
+    if isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl < 0:
+        return None, f'Invalid ttl: {ttl}'
+    return float(ttl), None
+
+
+def submit_add_rule_command(data):
+    """
+    룰 추가 명령 등록 (묶음 적용)
+    
+    반환:
+        Future: 묶음 재로드가 끝나면 응답 dict
+    """
+    rule = data.get('rule')
+    sid = data.get('sid')
+    
+    if not rule or not sid:
+        logging.error("필수 파라미터 누락: rule, sid")
+        future = Future()
+        future.set_result({'return': 'NOK', 'message': 'Missing rule or sid'})
+        return future
+    
+    ttl, error = parse_ttl(data)
+    if error:
+        logging.error(f"잘못된 파라미터: {error}")
+        future = Future()
+        future.set_result({'return': 'NOK', 'message': error})
+        return future
+    
+    logging.info(f"📝 룰 추가 요청: SID {sid}")
+    logging.info(f"   룰: {rule[:80]}...")
+    checked = validate_rule(rule, sid)
+    if checked is not None and checked['return'] != 'OK':
+        future = Future()
+        future.set_result(checked)
+        return future
+    
+    if checked is not None:
+        # 재시도 등으로 같은 룰이 이미 적용 중 - 재로드 없이 응답 (만료 시각만 갱신)
+        future = Future()
+        future.set_result(checked)
+    else:
+        future = coalescer.submit(rule, sid)
+    if expiry is not None:
+        # 응답 전송 콜백보다 먼저 등록되므로 응답을 받은 시점에는 만료 등록이 끝나 있음
+        def track(done):
+            if done.result().get('return') == 'OK':
+                expiry.track(sid, ttl, pinned=bool(data.get('pinned')))
+        future.add_done_callback(track)
+    return future
+
+
 def process_add_rule_command(data):
     """
     룰 추가 명령 처리
     
     Args:
-        data (dict): {"type": "ADD_RULE", "rule": "...", "sid": 900000001}
+        data (dict): {"type": "ADD_RULE", "rule": "...", "sid": 900000001, "ttl": 3600, "pinned": false}
+                     (ttl / pinned는 선택, 룰 파일에 쓰는 묶음 적용에서만 만료 관리)
     """
     rule = data.get('rule')
     sid = data.get('sid')
@@ -83,6 +240,10 @@ def process_add_rule_command(data):
     logging.info(f"📝 룰 추가 요청: SID {sid}")
     logging.info(f"   룰: {rule[:80]}...")
     
+    checked = validate_rule(rule, sid)
+    if checked is not None:
+        return checked
+    
     # Suricata 명령 구성
     suricata_command = {
         "command": "rule-add",
@@ -95,44 +256,231 @@ def process_add_rule_command(data):
     
     if response.get('return') == 'OK':
         logging.info(f"✅ 룰 추가 성공: SID {sid}")
+        if validator is not None:
+            validator.update({int(sid): rule})
         return {'return': 'OK', 'message': 'Rule added successfully'}
     else:
         logging.error(f"❌ 룰 추가 실패: {response.get('message')}")
         return response
 
 
-def handle_client_connection(client_socket):
-    """클라이언트 연결 처리"""
-    try:
-        # 데이터 수신
-        data_bytes = client_socket.recv(BUFFER_SIZE)
-        
-        if not data_bytes:
-            return
-        
-        # JSON 파싱
-        data = json.loads(data_bytes.decode('utf-8'))
+blocklist_rule_lock = threading.Lock()
+blocklist_rule_ready = False
+
+
+def ensure_blocklist_rule():
+    """
+    데이터셋 차단 룰이 AI 룰 파일에 없으면 추가하고 재로드 (처음 한 번만)
+    
+    반환:
+        dict: 실패 시 Suricata 응답, 준비되어 있으면 None
+    """
+    global blocklist_rule_ready
+    with blocklist_rule_lock:
+        if blocklist_rule_ready:
+            return None
         
-        command_type = data.get('type')
+        try:
+            with open(AI_RULES_PATH) as f:
+                installed = f'sid:{BLOCK_RULE_SID};' in f.read()
+        except FileNotFoundError:
+            installed = False
         
-        if command_type == 'ADD_RULE':
-            response = process_add_rule_command(data)
-        else:
-            response = {'return': 'NOK', 'message': f'Unknown command: {command_type}'}
+        if not installed:
+            logging.info(f"🧱 데이터셋 차단 룰 설치: {BLOCK_DATASET} (SID {BLOCK_RULE_SID})")
+            if coalescer is not None:
+                response = coalescer.submit(BLOCK_RULE, BLOCK_RULE_SID).result()
+            else:
+                with open(AI_RULES_PATH, 'a') as f:
+                    f.write(BLOCK_RULE + '\n')
+                response = reload_suricata_rules()
+            if response.get('return') != 'OK':
+                logging.error(f"❌ 데이터셋 차단 룰 설치 실패: {response.get('message')}")
+                return response
         
-        # 응답 전송
-        response_json = json.dumps(response)
-        client_socket.sendall(response_json.encode('utf-8'))
+        blocklist_rule_ready = True
+        return None
+
+
+def process_dataset_command(data, command):
+    """
+    IP 차단/해제 명령 처리 (데이터셋에 추가/삭제, 재로드 없음)
+    
+    Args:
+        data (dict): {"type": "BLOCK_IP" | "UNBLOCK_IP", "ip": "1.2.3.4"}
+        command (str): dataset-add / dataset-remove
+    """
+    ip = data.get('ip')
+    try:
+        ip = str(ipaddress.ip_address(ip))
+    except ValueError:
+        logging.error(f"잘못된 IP: {ip}")
+        return {'return': 'NOK', 'message': f'Invalid ip: {ip}'}
+    
+    failure = ensure_blocklist_rule()
+    if failure:
+        return failure
     
-    except json.JSONDecodeError as e:
-        logging.error(f"JSON 파싱 오류: {e}")
-        error_response = json.dumps({'return': 'NOK', 'message': 'Invalid JSON'})
-        client_socket.sendall(error_response.encode('utf-8'))
+    response = send_to_suricata_relay({
+        "command": command,
+        "arguments": {"setname": BLOCK_DATASET, "settype": "ip", "datavalue": ip}
+    })
+    
+    action = '차단' if command == 'dataset-add' else '차단 해제'
+    if response.get('return') == 'OK':
+        logging.info(f"✅ IP {action}: {ip}")
+        return {'return': 'OK', 'message': f'{command} {ip}'}
+    else:
+        logging.error(f"❌ IP {action} 실패 ({ip}): {response.get('message')}")
+        return response
+
+
+def process_pin_command(data, pinned):
+    """
+    AI 룰 고정/해제 명령 처리
+    
+    Args:
+        data (dict): {"type": "PIN_RULE" | "UNPIN_RULE", "sid": 900000001}
+    """
+    if expiry is None:
+        return {'return': 'NOK', 'message': 'Rule expiry disabled'}
+    
+    sid = data.get('sid')
+    if not expiry.is_managed(sid):
+        logging.error(f"잘못된 SID: {sid}")
+        return {'return': 'NOK', 'message': f'Invalid sid: {sid} (AI rules start at {AI_SID_MIN})'}
+    
+    sid = int(sid)
+    changed = expiry.pin(sid) if pinned else expiry.unpin(sid)
+    if not changed:
+        return {'return': 'NOK', 'message': f'Unknown rule: {sid}'}
+    
+    logging.info(f"📌 룰 {'고정' if pinned else '고정 해제'}: SID {sid}")
+    return {'return': 'OK', 'message': f"Rule {'pinned' if pinned else 'unpinned'}", **expiry.get(sid)}
+
+
+def process_compact_command(data):
+    """
+    AI 룰 압축 명령 처리
+    
+    Args:
+        data (dict): {"type": "COMPACT_RULES", "dry_run": false, "measure": false}
+    
+    반환:
+        dict: 압축 보고서 (룰 수 / 재로드 시간 전후)
+    """
+    if compactor is None:
+        return {'return': 'NOK', 'message': 'Rule compaction requires coalescing'}
+    return compactor.compact(dry_run=bool(data.get('dry_run')), measure=bool(data.get('measure')))
+
+
+def dispatch_command(data):
+    """명령 1건 처리"""
+    command_type = data.get('type')
+    
+    if command_type == 'ADD_RULE':
+        return process_add_rule_command(data)
+    if command_type == 'BLOCK_IP':
+        return process_dataset_command(data, 'dataset-add')
+    if command_type == 'UNBLOCK_IP':
+        return process_dataset_command(data, 'dataset-remove')
+    if command_type == 'PIN_RULE':
+        return process_pin_command(data, True)
+    if command_type == 'UNPIN_RULE':
+        return process_pin_command(data, False)
+    if command_type == 'COMPACT_RULES':
+        return process_compact_command(data)
+    if command_type == 'PING':
+        # 장치 2 룰 채널 연결 유지 확인
+        return {'return': 'OK', 'message': 'pong'}
+    return {'return': 'NOK', 'message': f'Unknown command: {command_type}'}
+
+
+def dispatch_command_async(data):
+    """
+    명령 1건 비동기 처리 (ADD_RULE 묶음 적용은 스레드 풀 워커를 붙잡지 않음)
+    
+    반환:
+        Future: 응답 dict
+    """
+    if coalescer is not None and data.get('type') == 'ADD_RULE':
+        return submit_add_rule_command(data)
+    return dispatcher.submit(dispatch_command, data)
+
+
+def handle_client_connection(client_socket):
+    """
+    클라이언트 연결 처리
+    
+    id가 있는 요청은 스레드 풀에서 동시에 처리하고 끝나는 대로 응답 (연결 유지),
+    id가 없는 요청은 응답 후 연결 종료 (기존 클라이언트)
+    """
+    decoder = FrameDecoder()
+    write_lock = threading.Lock()
+    pending = set()
+    received = False
+    
+    def respond(request, response):
+        with write_lock:
+            client_socket.sendall(encode_frame(reply(request, response)))
+    
+    def run(request, future):
+        try:
+            respond(request, future.result())
+        except OSError as e:
+            logging.error(f"응답 전송 실패: {e}")
+        except Exception as e:
+            logging.error(f"처리 오류: {e}")
+    
+    try:
+        while True:
+            # 첫 요청 전이거나 받다 만 요청이 있으면 CLIENT_TIMEOUT, 유지 중인 연결은 IDLE_TIMEOUT
+            client_socket.settimeout(CLIENT_TIMEOUT if decoder.partial or not received else IDLE_TIMEOUT)
+            try:
+                data_bytes = client_socket.recv(BUFFER_SIZE)
+            except socket.timeout:
+                break
+            
+            if not data_bytes:
+                break
+            
+            try:
+                frames = decoder.feed(data_bytes)
+            except FrameError as e:
+                respond(None, {'return': 'NOK', 'message': str(e)})
+                break
+            
+            for data in frames:
+                received = True
+                if isinstance(data, FrameError):
+                    logging.error(f"JSON 파싱 오류: {data}")
+                    respond(None, {'return': 'NOK', 'message': 'Invalid JSON'})
+                    continue
+                
+                future = dispatch_command_async(data)
+                if not is_pipelined(data):
+                    # 기존 방식: 요청 하나 처리 후 연결 종료
+                    respond(data, future.result())
+                    return
+                
+                # 응답 전송은 스레드 풀에서 (묶음 적용 스레드가 느린 클라이언트에 막히지 않도록)
+                def send_when_done(done, request=data):
+                    task = dispatcher.submit(run, request, done)
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                
+                pending.add(future)
+                future.add_done_callback(send_when_done)
+                future.add_done_callback(pending.discard)
     
     except Exception as e:
         logging.error(f"처리 오류: {e}")
     
     finally:
+        # 처리 중인 요청의 응답을 마저 보낸 뒤 종료
+        deadline = time.monotonic() + RELOAD_TIMEOUT
+        while pending and time.monotonic() < deadline:
+            wait(list(pending), timeout=deadline - time.monotonic())
         client_socket.close()
 
 
@@ -141,13 +489,21 @@ def start_server():
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
     server_socket.bind((LISTEN_IP, LISTEN_PORT))
-    server_socket.listen(5)
+    server_socket.listen(128)
     
     logging.info("=" * 60)
     logging.info("🎯 Rule Command Client 시작")
     logging.info("=" * 60)
     logging.info(f"📡 리스닝: {LISTEN_IP}:{LISTEN_PORT}")
     logging.info(f"🔌 Relay: {RELAY_SERVER}")
+    if validator is not None and coalescer is not None:
+        logging.info(f"🔎 룰 사전 검증: 적용 중인 SID {validator.load(AI_RULES_PATH)}개")
+    if coalescer is not None:
+        logging.info(f"📦 룰 묶음 적용: {AI_RULES_PATH} (대기 {COALESCE_WINDOW}초, 최대 {COALESCE_MAX_DELAY}초)")
+    if expiry is not None:
+        expiry.start()
+    if compactor is not None:
+        compactor.start(COMPACT_INTERVAL)
     logging.info("=" * 60)
     logging.info("✅ 대기 중...\n")
     
@@ -155,7 +511,9 @@ def start_server():
         try:
             client_socket, client_addr = server_socket.accept()
             logging.info(f"📥 연결: {client_addr}")
-            handle_client_connection(client_socket)
+            threading.Thread(
+                target=handle_client_connection, args=(client_socket,), daemon=True
+            ).start()
         
         except KeyboardInterrupt:
             logging.info("\n🛑 서버 종료")
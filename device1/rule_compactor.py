@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+rule_compactor.py
+AI 룰 압축 - 출발지 주소만 다른 IP별 룰을 주소 목록 / CIDR 룰 하나로 병합
+
+봇넷 공격이 끝나면 아래처럼 출발지만 다른 룰이 수백 개 남음:
+
+    drop tcp 10.0.0.1 any -> $HOME_NET any (msg:"AI_BLOCK:DDoS"; sid:900000001; rev:1;)
+    drop tcp 10.0.0.2 any -> $HOME_NET any (msg:"AI_BLOCK:DDoS"; sid:900000002; rev:1;)
+
+출발지를 뺀 나머지(액션, 프로토콜, 포트, 목적지, sid/rev를 뺀 옵션)가 같은 룰끼리 묶어
+출발지를 정확히 덮는 최소 CIDR 목록(ipaddress.collapse_addresses, 더 넓게 막지 않음)으로 합침:
+
+    drop tcp [10.0.0.1/32,10.0.0.2/31,...] any -> $HOME_NET any (msg:"AI_BLOCK:DDoS"; sid:900000001; rev:2;)
+
+- 합친 룰은 묶음에서 가장 작은 SID를 이어받음 (주소가 많으면 max_addresses개씩 나눠 작은 SID부터 사용)
+- 나머지 SID는 삭제, 교체/삭제는 rule_coalescer로 한 묶음에 적용 (재로드 1회)
+- 합친 SID → 원래 SID/출발지 매핑을 JSON 파일에 저장 (감사용, 다시 압축하면 누적)
+- 고정(pin)한 룰, 출발지가 변수/부정(!)인 룰은 건드리지 않음
+- 만료 관리(rule_expiry)를 쓰면 만료 시각이 같은 구간(expiry_bucket초)에 드는 룰끼리만 합침
+  (합친 룰은 가장 늦은 구성 룰의 만료를 따르므로 먼저 만료될 룰이 구간 폭 이상 더 차단되지 않음)
+"""
+
+import ipaddress
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+from rule_coalescer import rule_sid
+
+HEADER_PATTERN = re.compile(
+    r'^(?P<action>\w+)\s+(?P<proto>\S+)\s+(?P<src>\[[^\]]*\]|\S+)\s+(?P<sport>\[[^\]]*\]|\S+)\s+'
+    r'(?P<direction>->|<>)\s+(?P<dst>\[[^\]]*\]|\S+)\s+(?P<dport>\[[^\]]*\]|\S+)\s*\((?P<options>.*)\)\s*$'
+)
+SID_OPTION = re.compile(r'\bsid\s*:\s*\d+\s*;\s*')
+REV_OPTION = re.compile(r'\brev\s*:\s*(\d+)\s*;\s*')
+
+
+def parse_sources(src):
+    """
+    출발지 주소 → 네트워크 목록 (IP / CIDR / [목록]만, 변수·부정·범위는 None)
+    """
+    items = src[1:-1].split(',') if src.startswith('[') and src.endswith(']') else [src]
+    networks = []
+    for item in items:
+        item = item.strip()
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            return None
+    return networks or None
+
+
+def format_sources(networks):
+    """네트워크 목록 → Suricata 주소 (하나면 그대로, 여러 개면 [a,b])"""
+    texts = [str(network.network_address) if network.prefixlen == network.max_prefixlen else str(network)
+             for network in networks]
+    return texts[0] if len(texts) == 1 else '[' + ','.join(texts) + ']'
+
+
+def collapse(networks):
+    """출발지를 정확히 덮는 최소 CIDR 목록 (IPv4 → IPv6 순)"""
+    result = []
+    for version in (4, 6):
+        result.extend(ipaddress.collapse_addresses(n for n in networks if n.version == version))
+    return result
+
+
+def parse_rule(line):
+    """
+    룰 한 줄 → (묶음 키, sid, rev, 출발지 네트워크 목록, 헤더 dict), 압축 대상이 아니면 None
+    """
+    match = HEADER_PATTERN.match(line.strip())
+    if not match:
+        return None
+    sid = rule_sid(line)
+    sources = parse_sources(match['src'])
+    if sid is None or sources is None:
+        return None
+    rev = REV_OPTION.search(match['options'])
+    options = ' '.join(REV_OPTION.sub('', SID_OPTION.sub('', match['options'])).split())
+    header = {**match.groupdict(), 'options': options}
+    key = (match['action'], match['proto'], match['sport'], match['direction'],
+           match['dst'], match['dport'], options)
+    return key, sid, int(rev.group(1)) if rev else 1, sources, header
+
+
+def build_rule(header, sources, sid, rev):
+    options = header['options']
+    if options and not options.endswith(';'):
+        options += ';'
+    return (f"{header['action']} {header['proto']} {format_sources(sources)} {header['sport']} "
+            f"{header['direction']} {header['dst']} {header['dport']} ({options} sid:{sid}; rev:{rev};)")
+
+
+def plan_compaction(lines, sid_min, exclude=(), min_group=2, max_addresses=1000, buckets=None):
+    """
+    압축 계획 계산 (파일은 건드리지 않음)
+
+    Args:
+        lines (iterable): 룰 파일의 줄
+        sid_min (int): 압축 대상 SID 최솟값 (AI 룰)
+        exclude (set): 건드리지 않을 SID (고정한 룰)
+        min_group (int): 이 수 이상 모인 룰만 압축
+        max_addresses (int): 룰 하나에 넣을 최대 주소(CIDR) 수
+        buckets (dict): SID → 만료 구간 (있으면 같은 구간의 룰끼리만 압축, 없는 SID는 만료 없음과 같은 구간)
+
+    반환:
+        dict: {'rules': {sid: 새 룰}, 'removals': [sid],
+               'groups': [{'sids': 합친 룰 SID, 'members': 구성 SID, 'sources': CIDR}],
+               'before': 룰 수, 'after': 룰 수}
+    """
+    groups = {}
+    total = 0
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        if not line.strip() or line.lstrip().startswith('#'):
+            continue
+        total += 1
+        parsed = parse_rule(line)
+        if parsed is None:
+            continue
+        key, sid, rev, sources, header = parsed
+        if sid < sid_min or sid in exclude:
+            continue
+        if buckets is not None:
+            key += (buckets.get(sid),)
+        groups.setdefault(key, []).append((sid, rev, sources, header))
+
+    plan = {'rules': {}, 'removals': [], 'groups': [], 'before': total, 'after': total}
+    for members in groups.values():
+        if len(members) < min_group:
+            continue
+        members.sort(key=lambda member: member[0])
+        sids = [member[0] for member in members]
+        networks = collapse([network for member in members for network in member[2]])
+        chunks = [networks[i:i + max_addresses] for i in range(0, len(networks), max_addresses)]
+        if len(chunks) >= len(members):
+            continue  # 줄어들지 않음
+
+        rev = max(member[1] for member in members) + 1
+        header = members[0][3]
+        for index, chunk in enumerate(chunks):
+            plan['rules'][sids[index]] = build_rule(header, chunk, sids[index], rev)
+        plan['groups'].append({
+            'sids': sids[:len(chunks)], 'members': sids,
+            'sources': [str(network) for network in networks],
+        })
+        plan['removals'].extend(sids[len(chunks):])
+        plan['after'] -= len(members) - len(chunks)
+    return plan
+
+
+class RuleCompactor:
+    """
+    AI 룰 파일 압축 실행기
+
+    Args:
+        coalescer (RuleCoalescer): 교체/삭제 적용 (재로드 1회)
+        map_path (str): 합친 SID → 원래 SID 매핑 저장 파일 (감사용)
+        expiry (RuleExpiry): 있으면 고정한 룰 제외 + 만료 구간별로 병합 + 합친 룰의 만료 시각 갱신
+        sid_min (int): 압축 대상 SID 최솟값
+        min_group (int), max_addresses (int): plan_compaction 참고
+        expiry_bucket (float): 만료 시각이 이 폭(초)의 같은 구간에 드는 룰끼리만 병합
+    """
+
+    def __init__(self, coalescer, map_path, expiry=None, sid_min=900000001, min_group=2, max_addresses=1000,
+                 expiry_bucket=3600.0):
+        self.coalescer = coalescer
+        self.expiry_bucket = expiry_bucket
+        self.map_path = map_path
+        self.expiry = expiry
+        self.sid_min = sid_min
+        self.min_group = min_group
+        self.max_addresses = max_addresses
+        self._lock = threading.Lock()  # 압축은 한 번에 하나씩
+        self._thread = None
+
+    def start(self, interval):
+        """interval초마다 압축 (0 이하면 명령으로만 실행)"""
+        if interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='rule-compactor', daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.compact()
+            except Exception as e:
+                logging.error(f"❌ 룰 압축 오류: {e}")
+
+    def compact(self, dry_run=False, measure=False):
+        """
+        압축 1회
+
+        Args:
+            dry_run (bool): 계획만 계산 (파일/Suricata 변경 없음)
+            measure (bool): 압축 전에 현재 룰셋으로 한 번 재로드해 재로드 시간 기준값 측정
+                            (기본은 직전 묶음 재로드 시간 - 룰 수가 달랐을 수 있음)
+
+        반환:
+            dict: 보고서 {'return', 'rules_before', 'rules_after', 'groups', 'removed',
+                          'reload_ms_before' (직전 재로드), 'reload_ms_after' (압축 적용 재로드),
+                          dry_run이면 'plan' (묶음 목록)}
+        """
+        with self._lock:
+            try:
+                with open(self.coalescer.rules_path, 'rb') as f:
+                    lines = f.readlines()
+            except FileNotFoundError:
+                lines = []
+
+            exclude = self.expiry.pinned() if self.expiry else set()
+            buckets = self.expiry.buckets(self.expiry_bucket) if self.expiry else None
+            plan = plan_compaction(lines, self.sid_min, exclude, self.min_group, self.max_addresses, buckets)
+            report = {
+                'return': 'OK', 'rules_before': plan['before'], 'rules_after': plan['after'],
+                'groups': len(plan['groups']), 'removed': len(plan['removals']),
+                'reload_ms_before': self.coalescer.last_reload_ms, 'reload_ms_after': None,
+            }
+            if dry_run:
+                report['plan'] = plan['groups']
+                return report
+            if not plan['groups']:
+                logging.info(f"🗜️ 룰 압축: 합칠 룰 없음 (룰 {plan['before']}개)")
+                return report
+            if measure:
+                started = time.perf_counter()
+                response = self.coalescer.reload()
+                if response.get('return') == 'OK':
+                    report['reload_ms_before'] = round((time.perf_counter() - started) * 1000, 1)
+
+            response = self.coalescer.replace(plan['removals'], plan['rules']).result()
+            if response.get('return') != 'OK':
+                logging.error(f"❌ 룰 압축 적용 실패: {response.get('message')}")
+                return response
+
+            if self.expiry:
+                for group in plan['groups']:
+                    self.expiry.merge(group['sids'], group['members'])
+            self._record(plan['groups'])
+
+            report['reload_ms_after'] = response.get('reload_ms')
+            before_ms, after_ms = report['reload_ms_before'], report['reload_ms_after']
+            reduction = f", 재로드 {before_ms:.0f}ms → {after_ms:.0f}ms" if before_ms and after_ms else ''
+            logging.info(
+                f"🗜️ 룰 압축: {plan['before']}개 → {plan['after']}개 "
+                f"(묶음 {len(plan['groups'])}개, 삭제 {len(plan['removals'])}개{reduction})"
+            )
+            return report
+
+    def _record(self, groups):
+        """
+        SID 매핑 저장 - {첫 번째 합친 SID: {'rules': 합친 룰 SID, 'sids': 원래 SID, 'sources': CIDR}}
+
+        이미 합쳐진 룰을 다시 합치면 원래 SID를 누적
+        """
+        try:
+            with open(self.map_path, 'r') as f:
+                mapping = json.load(f)
+        except FileNotFoundError:
+            mapping = {}
+        except ValueError as e:
+            logging.error(f"SID 매핑 파일 손상, 새로 작성: {self.map_path} ({e})")
+            mapping = {}
+
+        now = time.time()
+        for group in groups:
+            original = set()
+            for member in group['members']:
+                previous = mapping.pop(str(member), None)
+                original.update(previous['sids'] if previous else [member])
+            mapping[str(group['sids'][0])] = {
+                'rules': group['sids'], 'sids': sorted(original), 'sources': group['sources'], 'compacted_at': now,
+            }
+
+        tmp_path = self.map_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(mapping, f, indent=1)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.map_path)
+        except OSError as e:
+            logging.error(f"SID 매핑 저장 실패: {self.map_path} ({e})")
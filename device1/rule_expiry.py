@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+rule_expiry.py
+AI 룰 만료 (TTL) 관리 - 타이머 휠로 만료된 룰을 묶음 삭제 + 재로드 1회
+
+- ADD_RULE로 적용된 AI 룰(SID ≥ AI_SID_MIN)마다 만료 시각을 기록하고 타이머 휠에 등록
+- tick마다 만료된 룰을 모아 rule_coalescer로 한 번에 삭제 (룰 파일 교체 + reload-rules 1회)
+- 살아 있는 AI 룰이 max_rules를 넘으면 먼저 만료될 룰부터 같은 묶음으로 삭제
+- 고정(pin)한 룰은 만료/개수 제한 삭제 대상에서 제외
+- 룰 압축(rule_compactor)은 만료 구간(buckets)이 같은 룰끼리만 합치고, 합친 룰은 가장 늦은 만료 시각을 따름
+- 만료 정보는 JSON 파일에 저장 (임시 파일 + os.replace), 재시작 시 룰 파일과 맞춰 복원
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+
+from rule_coalescer import rule_sid
+
+AI_SID_MIN = 900000001
+RETRY_DELAY = 30.0  # 삭제(재로드) 실패 시 다시 시도할 때까지 (초)
+
+
+class TimerWheel:
+    """
+    해시 타이머 휠 - 슬롯 하나 = tick초, 슬롯 수보다 먼 만료는 휠을 여러 바퀴 돈 뒤 만료
+
+    슬롯에는 key → 만료 시각을 보관하고 advance()에서 만료 시각을 직접 비교하므로
+    바퀴 수를 따로 세지 않음. 등록/취소 O(1), advance는 지나간 슬롯만 확인.
+    """
+
+    def __init__(self, tick=1.0, slots=3600):
+        self.tick = tick
+        self.slots = slots
+        self._wheel = [{} for _ in range(slots)]
+        self._where = {}  # key → 슬롯 번호
+        self._cursor = None  # 다음 advance에서 처음 확인할 tick 번호
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def schedule(self, key, deadline):
+        """key를 deadline(epoch 초)에 만료되도록 등록 (이미 있으면 다시 등록)"""
+        self.cancel(key)
+        position = int(deadline // self.tick)
+        if self._cursor is not None and position < self._cursor:
+            position = self._cursor  # 이미 지난 시각 → 다음 advance에서 바로 만료
+        slot = position % self.slots
+        self._wheel[slot][key] = deadline
+        self._where[key] = slot
+
+    def cancel(self, key):
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            del self._wheel[slot][key]
+
+    def advance(self, now):
+        """
+        now까지 만료된 key 목록 반환 (휠에서 제거)
+        """
+        target = int(now // self.tick)
+        if self._cursor is None:
+            self._cursor = target
+            # 처음 호출: 시작 전에 지난 만료가 있을 수 있으므로 전체 확인
+            steps = self.slots
+        else:
+            steps = min(target - self._cursor + 1, self.slots)
+
+        expired = []
+        for position in range(self._cursor, self._cursor + steps):
+            slot = self._wheel[position % self.slots]
+            for key, deadline in list(slot.items()):
+                if deadline <= now:
+                    del slot[key]
+                    del self._where[key]
+                    expired.append(key)
+        # 현재 tick 슬롯은 아직 남은 만료가 있을 수 있으므로 다음에 다시 확인
+        self._cursor = max(self._cursor, target)
+        return expired
+
+
+class RuleExpiry:
+    """
+    AI 룰 만료 관리자
+
+    Args:
+        coalescer (RuleCoalescer): 룰 삭제에 사용 (추가와 같은 스레드에서 순서대로 처리)
+        state_path (str): 만료 정보 저장 파일
+        default_ttl (float): ADD_RULE에 ttl이 없을 때 사용 (초, 0 이하면 만료 없음 - 개수 제한만 적용)
+        max_rules (int): 살아 있는 AI 룰 최대 수 (고정한 룰 포함, 0 이하면 제한 없음)
+        tick (float): 만료 확인 주기 = 타이머 휠 슬롯 크기 (초)
+        sid_min (int): 관리 대상 SID 최솟값 (그 미만은 운영자/데이터셋 룰)
+    """
+
+    def __init__(self, coalescer, state_path, default_ttl=86400.0, max_rules=5000, tick=1.0,
+                 sid_min=AI_SID_MIN):
+        self.coalescer = coalescer
+        self.state_path = state_path
+        self.default_ttl = default_ttl
+        self.max_rules = max_rules
+        self.tick = tick
+        self.sid_min = sid_min
+        self.expired = 0
+        self.evicted = 0
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._wheel = TimerWheel(tick, slots=max(1, int(3600 / tick)))
+        self._rules = {}  # sid → {'expires': epoch 초 또는 None, 'pinned': bool}
+        self._dirty = False
+        self._thread = None
+
+    def start(self):
+        """저장된 만료 정보 복원 후 만료 스레드 시작"""
+        self.load()
+        self._thread = threading.Thread(target=self._run, name='rule-expiry', daemon=True)
+        self._thread.start()
+
+    def is_managed(self, sid):
+        try:
+            return int(sid) >= self.sid_min
+        except (TypeError, ValueError):
+            return False
+
+    def track(self, sid, ttl=None, pinned=False):
+        """
+        적용된 AI 룰 등록 (같은 SID가 있으면 만료 시각을 새로 계산, 고정 상태는 유지)
+
+        Args:
+            ttl (float): 만료까지 시간 (초, None이면 default_ttl, 0 이하면 만료 없음)
+            pinned (bool): 고정 (만료/개수 제한 삭제 안 함)
+        """
+        if not self.is_managed(sid):
+            return
+        sid = int(sid)
+        ttl = self.default_ttl if ttl is None else ttl
+        expires = time.time() + ttl if ttl > 0 else None
+        with self._lock:
+            previous = self._rules.get(sid)
+            pinned = pinned or bool(previous and previous['pinned'])
+            self._rules[sid] = {'expires': expires, 'pinned': pinned}
+            self._schedule(sid)
+            self._dirty = True
+            over = self.max_rules > 0 and len(self._rules) > self.max_rules
+        if over:
+            self._wake.set()
+
+    def pin(self, sid):
+        """룰 고정 → 관리 중인 룰이 아니면 False"""
+        return self._set_pinned(sid, True)
+
+    def unpin(self, sid):
+        """룰 고정 해제 (남은 TTL부터 다시 만료, 이미 지났으면 다음 tick에 삭제) → 관리 중인 룰이 아니면 False"""
+        return self._set_pinned(sid, False)
+
+    def get(self, sid):
+        """SID의 만료 정보 (없으면 None)"""
+        with self._lock:
+            info = self._rules.get(sid)
+            return dict(info) if info else None
+
+    def pinned(self):
+        """고정된 SID 집합"""
+        with self._lock:
+            return {sid for sid, info in self._rules.items() if info['pinned']}
+
+    def buckets(self, width):
+        """
+        SID → 만료 구간 번호 (만료 시각 // width, 만료 없음이면 None)
+
+        룰 압축은 같은 구간의 룰끼리만 합치므로 합친 룰이 구성 룰보다 최대 width초까지만 더 남음
+        """
+        with self._lock:
+            return {
+                sid: int(info['expires'] // width) if info['expires'] is not None and width > 0 else info['expires']
+                for sid, info in self._rules.items()
+            }
+
+    def merge(self, sids, merged):
+        """
+        룰 압축으로 merged SID들이 sids 룰(주소가 많으면 여러 개)로 합쳐졌을 때 호출
+
+        합친 룰은 구성 룰 중 가장 늦은 만료 시각을 따르고 (하나라도 만료 없음이면 만료 없음),
+        나머지 SID는 관리 대상에서 제외. 구성 룰은 같은 만료 구간(buckets)에서만 고르므로
+        먼저 만료될 룰이 더 차단되는 시간은 구간 폭 이내
+        """
+        with self._lock:
+            members = [self._rules.pop(member) for member in set(merged) | set(sids) if member in self._rules]
+            for member in merged:
+                self._wheel.cancel(member)
+            if not members:
+                return
+            expires = [info['expires'] for info in members]
+            for sid in sids:
+                self._rules[sid] = {
+                    'expires': None if None in expires else max(expires),
+                    'pinned': any(info['pinned'] for info in members),
+                }
+                self._schedule(sid)
+            self._dirty = True
+
+    def stats(self):
+        with self._lock:
+            pinned = sum(1 for info in self._rules.values() if info['pinned'])
+            return {
+                'live': len(self._rules), 'pinned': pinned, 'scheduled': len(self._wheel),
+                'expired': self.expired, 'evicted': self.evicted,
+            }
+
+    def _set_pinned(self, sid, pinned):
+        with self._lock:
+            info = self._rules.get(sid)
+            if info is None:
+                return False
+            info['pinned'] = pinned
+            self._schedule(sid)
+            self._dirty = True
+        if not pinned:
+            self._wake.set()
+        return True
+
+    def _schedule(self, sid):
+        """_lock 안에서 호출 - 고정/만료 없음이면 휠에서 제외"""
+        info = self._rules[sid]
+        if info['pinned'] or info['expires'] is None:
+            self._wheel.cancel(sid)
+        else:
+            self._wheel.schedule(sid, info['expires'])
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.tick)
+            self._wake.clear()
+            try:
+                self.expire(time.time())
+            except Exception as e:
+                logging.error(f"❌ 룰 만료 처리 오류: {e}")
+
+    def expire(self, now):
+        """
+        만료된 룰 + 개수 제한 초과분을 한 묶음으로 삭제
+
+        반환:
+            int: 삭제한 룰 수
+        """
+        with self._lock:
+            due = [sid for sid in self._wheel.advance(now) if sid in self._rules]
+            evict = []
+            over = len(self._rules) - len(due) - self.max_rules if self.max_rules > 0 else 0
+            if over > 0:
+                due_set = set(due)
+                candidates = (
+                    (info['expires'] if info['expires'] is not None else float('inf'), sid)
+                    for sid, info in self._rules.items()
+                    if not info['pinned'] and sid not in due_set
+                )
+                evict = [sid for _, sid in heapq.nsmallest(over, candidates)]
+                if len(evict) < over:
+                    logging.warning(f"⚠️ 고정된 룰이 많아 AI 룰 수 제한({self.max_rules})을 지킬 수 없음")
+
+            batch = due + evict
+            removing = {sid: self._rules.pop(sid) for sid in batch}
+            for sid in evict:
+                self._wheel.cancel(sid)
+
+        if not batch:
+            self._save()
+            return 0
+
+        response = self.coalescer.remove(batch).result()
+
+        with self._lock:
+            if response.get('return') == 'OK':
+                self.expired += len(due)
+                self.evicted += len(evict)
+                logging.info(f"🧹 AI 룰 {len(batch)}개 삭제 (만료 {len(due)}개, 개수 제한 {len(evict)}개), "
+                             f"남은 룰 {len(self._rules)}개")
+            else:
+                # 그동안 다시 추가되지 않은 룰만 되살려 나중에 다시 시도
+                logging.error(f"❌ AI 룰 삭제 실패, {RETRY_DELAY:.0f}초 후 재시도: {response.get('message')}")
+                for sid, info in removing.items():
+                    if sid not in self._rules:
+                        self._rules[sid] = info
+                        self._wheel.schedule(sid, now + RETRY_DELAY)
+            self._dirty = True
+        self._save()
+        return len(batch) if response.get('return') == 'OK' else 0
+
+    def load(self):
+        """
+        저장된 만료 정보 복원 후 룰 파일과 맞춤
+
+        - 룰 파일에 없는 SID는 버림
+        - 룰 파일에는 있는데 만료 정보가 없는 AI 룰은 지금부터 default_ttl
+        """
+        saved = {}
+        try:
+            with open(self.state_path, 'r') as f:
+                saved = {int(sid): info for sid, info in json.load(f)['rules'].items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.error(f"만료 정보 파일 손상, 무시: {self.state_path} ({e})")
+
+        try:
+            with open(self.coalescer.rules_path, 'rb') as f:
+                installed = [sid for sid in map(rule_sid, f) if self.is_managed(sid)]
+        except FileNotFoundError:
+            installed = []
+
+        now = time.time()
+        with self._lock:
+            self._rules.clear()
+            for sid in installed:
+                info = saved.get(sid)
+                if info is None:
+                    expires = now + self.default_ttl if self.default_ttl > 0 else None
+                    info = {'expires': expires, 'pinned': False}
+                self._rules[sid] = {'expires': info.get('expires'), 'pinned': bool(info.get('pinned'))}
+                self._schedule(sid)
+            self._dirty = True
+        logging.info(f"⏳ AI 룰 만료 관리: {len(installed)}개 복원 (TTL {self.default_ttl:.0f}초, 최대 {self.max_rules}개)")
+        self._save()
+
+    def _save(self):
+        """변경이 있으면 만료 정보 저장"""
+        with self._lock:
+            if not self._dirty:
+                return
+            state = {
+                'rules': {str(sid): info for sid, info in self._rules.items()},
+                'saved_at': time.time(),
+            }
+            self._dirty = False
+
+        tmp_path = self.state_path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logging.error(f"만료 정보 저장 실패: {self.state_path} ({e})")
+            with self._lock:
+                self._dirty = True
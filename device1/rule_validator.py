@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+rule_validator.py
+Suricata 룰 사전 검증 - Suricata로 보내기 전에 잘못된 룰을 로컬에서 거부
+
+모델이 만든 룰은 형식이 틀린 경우가 많은데, Suricata에서야 거부되면 명령 왕복이나
+룰 재로드(묶음 전체 실패 → 되돌림) 비용을 치름. 적용 전에 확인:
+
+- 한 줄인지, 헤더 (액션 / 프로토콜 / 주소 / 포트 / 방향) 형식
+- 따옴표 / 괄호 짝, 옵션 형식 (name 또는 name:value;), msg·content 값 따옴표
+- sid 옵션이 하나뿐이고 요청 SID와 같은지, 이미 다른 룰이 쓰는 SID인지
+
+형식 검사 결과는 룰 해시 기준 LRU 캐시에 보관하므로 재시도는 해시 계산 비용만 듦.
+SID 중복 검사는 캐시와 별도로 매번 확인 (적용 중인 룰 SID → 룰 해시, update()로 갱신).
+"""
+
+import hashlib
+import ipaddress
+import re
+import threading
+from collections import OrderedDict
+
+from rule_coalescer import rule_sid
+
+ACTIONS = {'alert', 'pass', 'drop', 'reject', 'rejectsrc', 'rejectdst', 'rejectboth'}
+PROTOCOLS = {
+    'ip', 'ipv4', 'ipv6', 'tcp', 'udp', 'icmp', 'icmpv4', 'icmpv6', 'sctp', 'pkthdr',
+    'tcp-pkt', 'tcp-stream', 'http', 'http1', 'http2', 'ftp', 'ftp-data', 'tls', 'smb', 'dns',
+    'dcerpc', 'ssh', 'smtp', 'imap', 'pop3', 'modbus', 'dnp3', 'enip', 'nfs', 'ike', 'krb5',
+    'ntp', 'dhcp', 'rfb', 'rdp', 'snmp', 'sip', 'mqtt', 'pgsql', 'telnet', 'quic', 'websocket',
+    'ldap', 'tftp', 'bittorrent-dht',
+}
+DIRECTIONS = {'->', '<>', '=>'}
+QUOTED_OPTIONS = {'msg', 'content', 'uricontent', 'pcre'}
+NUMERIC_OPTIONS = {'sid', 'rev', 'gid', 'priority'}
+OPTION_NAME = re.compile(r'^[A-Za-z0-9_.\-]+$')
+VARIABLE = re.compile(r'^\$[A-Za-z_][A-Za-z0-9_]*$')
+
+
+class RuleError(ValueError):
+    """룰 형식 오류"""
+
+
+def split_top_level(text, separator=','):
+    """대괄호 밖의 separator로 분리 (중첩 목록 지원)"""
+    parts, depth, start = [], 0, 0
+    for index, char in enumerate(text):
+        if char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth < 0:
+                raise RuleError(f"대괄호 짝이 맞지 않음: {text}")
+        elif char == separator and depth == 0:
+            parts.append(text[start:index])
+            start = index + 1
+    if depth:
+        raise RuleError(f"대괄호 짝이 맞지 않음: {text}")
+    parts.append(text[start:])
+    return parts
+
+
+def tokenize_header(header):
+    """헤더 → 토큰 (대괄호 목록 안의 공백은 토큰을 나누지 않음)"""
+    tokens, current, depth = [], [], 0
+    for char in header:
+        if char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        if char.isspace() and depth == 0:
+            if current:
+                tokens.append(''.join(current))
+                current = []
+            continue
+        current.append(char)
+    if depth:
+        raise RuleError(f"대괄호 짝이 맞지 않음: {header}")
+    if current:
+        tokens.append(''.join(current))
+    return tokens
+
+
+def check_address(value):
+    value = value.strip()
+    if value.startswith('!'):
+        value = value[1:].strip()
+    if not value:
+        raise RuleError("빈 주소")
+    if value.startswith('['):
+        if not value.endswith(']'):
+            raise RuleError(f"잘못된 주소 목록: {value}")
+        for item in split_top_level(value[1:-1]):
+            check_address(item)
+        return
+    if value == 'any' or VARIABLE.match(value):
+        return
+    try:
+        if '-' in value:
+            start, end = value.split('-', 1)
+            ipaddress.ip_address(start.strip())
+            ipaddress.ip_address(end.strip())
+        else:
+            ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        raise RuleError(f"잘못된 주소: {value}") from None
+
+
+def check_port(value):
+    value = value.strip()
+    if value.startswith('!'):
+        value = value[1:].strip()
+    if not value:
+        raise RuleError("빈 포트")
+    if value.startswith('['):
+        if not value.endswith(']'):
+            raise RuleError(f"잘못된 포트 목록: {value}")
+        for item in split_top_level(value[1:-1]):
+            check_port(item)
+        return
+    if value == 'any' or VARIABLE.match(value):
+        return
+    bounds = value.split(':') if ':' in value else [value]
+    if len(bounds) > 2 or not any(bounds):
+        raise RuleError(f"잘못된 포트: {value}")
+    for bound in bounds:
+        if bound and (not bound.isdigit() or int(bound) > 65535):
+            raise RuleError(f"잘못된 포트: {value}")
+
+
+def split_options(body):
+    """
+    옵션 본문 → [(name, value 또는 None)]
+
+    따옴표 안의 ; ( ) 와 백슬래시 이스케이프는 구분자로 보지 않음
+    """
+    options, current, in_quote, escaped = [], [], False, False
+    for char in body:
+        if escaped:
+            current.append(char)
+            escaped = False
+            continue
+        if char == '\\':
+            current.append(char)
+            escaped = True
+            continue
+        if char == '"':
+            in_quote = not in_quote
+        elif not in_quote:
+            if char in '()':
+                raise RuleError(f"옵션의 괄호 짝이 맞지 않음 ('{char}')")
+            if char == ';':
+                options.append(''.join(current).strip())
+                current = []
+                continue
+        current.append(char)
+    if in_quote:
+        raise RuleError("따옴표 짝이 맞지 않음")
+    if escaped:
+        raise RuleError("옵션이 이스케이프 문자로 끝남")
+    if ''.join(current).strip():
+        raise RuleError(f"마지막 옵션이 ';'로 끝나지 않음: {''.join(current).strip()[:40]}")
+
+    parsed = []
+    for option in options:
+        if not option:
+            raise RuleError("빈 옵션 (';;')")
+        name, _, value = option.partition(':')
+        name = name.strip()
+        if not OPTION_NAME.match(name):
+            raise RuleError(f"잘못된 옵션 이름: {name[:40]}")
+        parsed.append((name, value.strip() if _ else None))
+    return parsed
+
+
+def parse_rule(rule):
+    """
+    룰 형식 검사
+
+    반환:
+        int: 룰의 sid
+
+    Raises:
+        RuleError: 형식 오류 (메시지에 이유)
+    """
+    if '\n' in rule or '\r' in rule:
+        raise RuleError("룰은 한 줄이어야 함")
+    rule = rule.strip()
+    start = rule.find('(')
+    if start < 0:
+        raise RuleError("옵션 '(' 없음")
+    if not rule.endswith(')'):
+        raise RuleError("룰이 ')'로 끝나지 않음")
+
+    tokens = tokenize_header(rule[:start])
+    if len(tokens) != 7:
+        raise RuleError(f"헤더 형식 오류 (토큰 {len(tokens)}개, 7개 필요: 액션 프로토콜 출발지 포트 방향 목적지 포트)")
+    action, proto, src, sport, direction, dst, dport = tokens
+    if action not in ACTIONS:
+        raise RuleError(f"알 수 없는 액션: {action}")
+    if proto.lower() not in PROTOCOLS:
+        raise RuleError(f"알 수 없는 프로토콜: {proto}")
+    if direction not in DIRECTIONS:
+        raise RuleError(f"잘못된 방향: {direction}")
+    check_address(src)
+    check_address(dst)
+    check_port(sport)
+    check_port(dport)
+
+    sid = None
+    for name, value in split_options(rule[start + 1:-1]):
+        if name in QUOTED_OPTIONS:
+            if not value or not value.lstrip('!').strip().startswith('"'):
+                raise RuleError(f"{name} 값은 따옴표로 감싸야 함")
+        elif name in NUMERIC_OPTIONS:
+            if not value or not value.isdigit() or int(value) <= 0:
+                raise RuleError(f"{name} 값은 양의 정수여야 함: {value}")
+            if name == 'sid':
+                if sid is not None:
+                    raise RuleError("sid 옵션이 여러 개")
+                sid = int(value)
+    if sid is None:
+        raise RuleError("sid 옵션 없음")
+    return sid
+
+
+def rule_digest(rule):
+    return hashlib.sha1(rule.strip().encode('utf-8')).digest()
+
+
+class RuleValidator:
+    """
+    룰 검증기 (형식 검사 LRU 캐시 + 적용 중인 SID 목록)
+
+    Args:
+        cache_size (int): 캐시할 룰 수
+    """
+
+    def __init__(self, cache_size=4096):
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # 룰 해시 → (sid, 오류 메시지 또는 None)
+        self._active = {}  # sid → 룰 해시
+        self._lock = threading.Lock()
+
+    def load(self, path):
+        """룰 파일의 SID 등록 (시작 시)"""
+        active = {}
+        try:
+            with open(path, 'rb') as f:
+                for line in f:
+                    sid = rule_sid(line)
+                    if sid is not None and not line.lstrip().startswith(b'#'):
+                        active[sid] = rule_digest(line.decode('utf-8', 'replace'))
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._active = active
+        return len(active)
+
+    def update(self, rules, removals=()):
+        """적용 결과 반영 - rules: {sid: 룰}, removals: 삭제된 SID"""
+        with self._lock:
+            for sid in removals:
+                self._active.pop(int(sid), None)
+            for sid, rule in rules.items():
+                self._active[int(sid)] = rule_digest(rule)
+
+    def check(self, rule, sid):
+        """
+        룰 하나 검증
+
+        반환:
+            (오류 메시지 또는 None, 이미 같은 룰이 적용 중인지)
+        """
+        digest = rule_digest(rule)
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None:
+                self._cache.move_to_end(digest)
+                self.hits += 1
+        if cached is None:
+            try:
+                cached = (parse_rule(rule), None)
+            except RuleError as e:
+                cached = (None, str(e))
+            with self._lock:
+                self.misses += 1
+                self._cache[digest] = cached
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        rule_sid_value, error = cached
+        if error:
+            return error, False
+        try:
+            sid = int(sid)
+        except (TypeError, ValueError):
+            return f"잘못된 SID: {sid}", False
+        if rule_sid_value != sid:
+            return f"룰의 sid({rule_sid_value})와 요청 SID({sid})가 다름", False
+
+        with self._lock:
+            active = self._active.get(sid)
+        if active is None:
+            return None, False
+        if active == digest:
+            return None, True
+        return f"이미 다른 룰이 사용 중인 SID: {sid}", False
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+search_index.py
+alert / 룰 검색 인덱스 (/api/logs/search, /api/rules/search)
+
+전체를 훑는 부분 문자열 검색 대신:
+
+- alert: signature, category, IP는 값 종류가 alert 수보다 훨씬 적으므로 '서로 다른 값'에만
+  trigram 인덱스를 두고, 일치한 값 → alert_store의 seq 목록을 합쳐서 응답
+  (alert_store의 키 생성/제거 알림으로 증분 갱신, 링 버퍼에서 밀려난 값은 함께 제거)
+- 룰: 룰 본문(헤더 + msg, classtype, metadata 등 옵션)의 단어 → 룰 번호 인덱스,
+  단어 목록에는 trigram 인덱스. 질의의 각 단어를 포함하는 단어를 가진 룰만 후보로 두고
+  후보에서 원래 부분 문자열 조건을 확인 (결과는 전체 검색과 같음)
+
+질의 형식 (alert):
+    문자열        src_ip / dest_ip / signature / category 부분 문자열 (대소문자 무시)
+    문자열*       값이 문자열로 시작 (IP 접두사: 10.0.* 등)
+    주소/길이     src_ip 또는 dest_ip가 CIDR 대역 안 (192.168.0.0/24, 2001:db8::/32)
+"""
+
+import bisect
+import heapq
+import ipaddress
+import re
+
+NGRAM = 3
+ALERT_SEARCH_FIELDS = ('src_ip', 'dest_ip', 'signature', 'category')
+IP_FIELDS = ('src_ip', 'dest_ip')
+WORD_PATTERN = re.compile(r'[0-9a-z]+')
+
+
+def ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def parse_network(query):
+    """CIDR 질의면 네트워크, 아니면 None"""
+    if '/' not in query:
+        return None
+    try:
+        return ipaddress.ip_network(query.strip(), strict=False)
+    except ValueError:
+        return None
+
+
+class SubstringIndex:
+    """
+    문자열 키 집합의 부분 문자열 / 접두사 검색 (trigram → 키)
+
+    키마다 비교용 텍스트(소문자)를 따로 둠 - 원래 값과 대소문자가 달라도 됨
+    """
+
+    def __init__(self):
+        self._texts = {}  # 키 → 텍스트
+        self._grams = {}  # trigram → 키 set
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, key, text):
+        if key in self._texts:
+            return
+        self._texts[key] = text
+        for gram in ngrams(text):
+            self._grams.setdefault(gram, set()).add(key)
+
+    def discard(self, key):
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in ngrams(text):
+            keys = self._grams[gram]
+            keys.discard(key)
+            if not keys:
+                del self._grams[gram]
+
+    def _candidates(self, fragment):
+        """fragment의 trigram을 모두 가진 키 (짧은 fragment는 전체 키)"""
+        if len(fragment) < NGRAM:
+            return self._texts.keys()
+        sets = []
+        for gram in ngrams(fragment):
+            keys = self._grams.get(gram)
+            if not keys:
+                return ()
+            sets.append(keys)
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def search(self, fragment):
+        """텍스트에 fragment를 포함하는 키"""
+        return [key for key in self._candidates(fragment) if fragment in self._texts[key]]
+
+    def prefix(self, fragment):
+        """텍스트가 fragment로 시작하는 키"""
+        return [key for key in self._candidates(fragment) if self._texts[key].startswith(fragment)]
+
+
+class IpIndex:
+    """IP 문자열 집합 - 숫자 순으로 정렬해 두고 CIDR 대역을 이분 탐색"""
+
+    def __init__(self):
+        self._sorted = []  # (버전, 정수, 문자열)
+
+    def _entry(self, value):
+        try:
+            address = ipaddress.ip_address(value)
+        except ValueError:
+            return None
+        return address.version, int(address), value
+
+    def add(self, value):
+        entry = self._entry(value)
+        if entry is not None:
+            bisect.insort(self._sorted, entry)
+
+    def discard(self, value):
+        entry = self._entry(value)
+        if entry is not None:
+            index = bisect.bisect_left(self._sorted, entry)
+            if index < len(self._sorted) and self._sorted[index] == entry:
+                del self._sorted[index]
+
+    def within(self, network):
+        """대역 안의 IP 문자열"""
+        start = bisect.bisect_left(self._sorted, (network.version, int(network.network_address)))
+        end = bisect.bisect_left(self._sorted, (network.version, int(network.broadcast_address) + 1))
+        return [value for _, _, value in self._sorted[start:end]]
+
+
+class AlertSearch:
+    """
+    alert_store 위의 검색 인덱스 (store.key_listeners로 증분 갱신)
+
+    Args:
+        store (AlertStore): 검색할 저장소 (이미 들어 있는 alert도 인덱싱)
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._values = {field: SubstringIndex() for field in ALERT_SEARCH_FIELDS}
+        self._ips = {field: IpIndex() for field in IP_FIELDS}
+        for field in ALERT_SEARCH_FIELDS:
+            for value in store.values(field):
+                self._key_changed(field, value, True)
+        store.key_listeners.append(self._key_changed)
+
+    def _key_changed(self, field, value, present):
+        values = self._values.get(field)
+        if values is None or not isinstance(value, str):
+            return
+        ips = self._ips.get(field)
+        if present:
+            values.add(value, value.lower())
+            if ips is not None:
+                ips.add(value)
+        else:
+            values.discard(value)
+            if ips is not None:
+                ips.discard(value)
+
+    def match_values(self, query):
+        """질의에 일치하는 필드별 값 {field: set(value)}"""
+        network = parse_network(query)
+        if network is not None:
+            return {field: set(self._ips[field].within(network)) for field in IP_FIELDS}
+
+        text = query.lower()
+        if text.endswith('*'):
+            text = text.rstrip('*')
+            return {field: set(index.prefix(text)) for field, index in self._values.items()}
+        return {field: set(index.search(text)) for field, index in self._values.items()}
+
+    def search(self, query, limit=50):
+        """
+        질의 검색
+
+        반환:
+            (일치한 alert 수, 최신순 alert 최대 limit개)
+        """
+        matched = {field: values for field, values in self.match_values(query).items() if values}
+        if not matched:
+            return 0, []
+
+        # 개수: 가장 큰 필드는 목록 길이 그대로, 나머지는 앞 필드에서 이미 센 alert를 빼고 셈
+        sizes = {field: sum(len(self.store.postings(field, value)) for value in values)
+                 for field, values in matched.items()}
+        order = sorted(matched, key=sizes.get, reverse=True)
+        count = sizes[order[0]]
+        for position, field in enumerate(order[1:], 1):
+            earlier = order[:position]
+            for value in matched[field]:
+                for seq in self.store.postings(field, value):
+                    alert = self.store.get(seq)
+                    if not any(alert.get(other) in matched[other] for other in earlier):
+                        count += 1
+
+        # 최신순: 값별 seq 목록(오름차순)을 뒤에서부터 병합, 여러 필드에 걸린 alert는 한 번만
+        streams = [reversed(self.store.postings(field, value))
+                   for field, values in matched.items() for value in values]
+        results, last = [], None
+        for seq in heapq.merge(*streams, reverse=True):
+            if seq == last:
+                continue
+            last = seq
+            results.append(self.store.get(seq))
+            if len(results) >= limit:
+                break
+        return count, results
+
+    def stats(self):
+        return {field: len(index) for field, index in self._values.items()}
+
+
+class RuleSearch:
+    """
+    룰 목록 검색 인덱스 (룰 파일이 바뀌면 load로 다시 생성)
+
+    Args:
+        rules (list[dict]): api/main.py load_rules() 결과 (rule 키에 룰 본문)
+    """
+
+    def __init__(self, rules=()):
+        self.load(rules)
+
+    def load(self, rules):
+        self.rules = list(rules)
+        self._texts = [rule.get('rule', '').lower() for rule in self.rules]
+        self._postings = {}  # 단어 → 룰 번호 set
+        self._words = SubstringIndex()
+        for number, text in enumerate(self._texts):
+            for word in set(WORD_PATTERN.findall(text)):
+                postings = self._postings.get(word)
+                if postings is None:
+                    postings = self._postings[word] = set()
+                    self._words.add(word, word)
+                postings.add(number)
+
+    def search(self, query):
+        """룰 본문에 query를 포함하는 룰 (대소문자 무시, 파일 순서)"""
+        return [self.rules[number] for number in self.numbers(query)]
+
+    def numbers(self, query):
+        """룰 본문에 query를 포함하는 룰 번호 (rules 목록의 위치, 오름차순)"""
+        text = query.lower()
+        if not text:
+            return list(range(len(self.rules)))
+
+        # 질의의 단어 조각마다 그 조각을 포함하는 단어가 있는 룰만 후보 (짧은 조각은 조건에서 제외)
+        candidates = None
+        for fragment in sorted(set(WORD_PATTERN.findall(text)), key=len, reverse=True):
+            if len(fragment) < NGRAM and candidates is not None:
+                continue
+            numbers = set()
+            for word in self._words.search(fragment):
+                numbers |= self._postings[word]
+            candidates = numbers if candidates is None else candidates & numbers
+            if not candidates:
+                return []
+        if candidates is None:
+            candidates = range(len(self.rules))  # 단어 문자가 없는 질의 (예: '->')
+        return [number for number in sorted(candidates) if text in self._texts[number]]
+
+    def stats(self):
+        return {'rules': len(self.rules), 'words': len(self._postings)}
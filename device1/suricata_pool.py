@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+suricata_pool.py
+Suricata 명령 소켓 연결 풀 (asyncio)
+
+Suricata unix-command 프로토콜은 연결마다 버전 핸드셰이크({"version": "0.2"})가 필요하고
+한 연결에서는 요청/응답이 순서대로 하나씩 오감.
+명령마다 연결/핸드셰이크를 반복하지 않도록 핸드셰이크를 마친 연결을 풀에 보관하고 재사용:
+
+- 풀 크기 = 동시에 Suricata로 보낼 수 있는 명령 수 (연결 하나당 명령 하나)
+- 유휴 연결은 주기적으로 uptime 명령으로 상태 확인, 실패하면 닫고 다음 사용 시 재연결
+- 재사용한 연결이 응답 전에 끊겨 있으면 새 연결로 한 번 재시도
+- 명령 지연은 풀 사용(pooled) / 명령마다 새 연결(direct)로 나눠 기록
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+
+PROTOCOL_VERSION = '0.2'
+BUFFER_SIZE = 4096
+LATENCY_WINDOW = 2048  # 백분위 계산에 쓰는 최근 명령 수
+
+
+class LatencyWindow:
+    """최근 명령 지연 (ms) 보관 및 백분위 계산"""
+
+    def __init__(self, size=LATENCY_WINDOW):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(list(self.samples))  # 메트릭 스레드에서도 읽으므로 복사 후 정렬
+        return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+
+async def read_json(reader, timeout):
+    """
+    JSON 응답 하나 수신 (개행 또는 JSON 완성 시점까지, Suricata는 응답 끝에 개행을 붙이지 않을 수 있음)
+
+    Raises:
+        ConnectionError: 응답 전에 연결 종료
+    """
+    data = b''
+    while True:
+        chunk = await asyncio.wait_for(reader.read(BUFFER_SIZE), timeout)
+        if not chunk:
+            raise ConnectionError('Suricata 연결 종료')
+        data += chunk
+        try:
+            return json.loads(data)
+        except ValueError:
+            if data.endswith(b'\n'):
+                raise
+            continue
+
+
+class SuricataConnection:
+    """핸드셰이크를 마친 Suricata 명령 소켓 연결 하나"""
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+        self.last_used = 0.0
+        self.commands = 0
+
+    @property
+    def alive(self):
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def open(self):
+        """연결 + 버전 핸드셰이크"""
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_unix_connection(self.path), self.timeout
+        )
+        self.commands = 0
+        response = await self._exchange({'version': PROTOCOL_VERSION})
+        if response.get('return') != 'OK':
+            self.close()
+            raise ConnectionError(f"핸드셰이크 실패: {response.get('message')}")
+
+    async def request(self, command_json, timeout=None):
+        """명령 하나 전송 후 응답 반환 (timeout: 응답 대기 시간, 기본은 연결 timeout)"""
+        response = await self._exchange(command_json, timeout)
+        self.commands += 1
+        return response
+
+    async def _exchange(self, message, timeout=None):
+        self.writer.write(json.dumps(message).encode('utf-8') + b'\n')
+        await asyncio.wait_for(self.writer.drain(), self.timeout)
+        response = await read_json(self.reader, timeout or self.timeout)
+        self.last_used = time.monotonic()
+        return response
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class SuricataPool:
+    """
+    Suricata 명령 연결 풀
+
+    Args:
+        path (str): Suricata 명령 소켓 경로
+        size (int): 연결 수 (0이면 풀 없이 명령마다 새 연결)
+        timeout (float): 연결/송수신 제한 시간 (초)
+        metrics (Metrics): 명령/재연결 카운터, 지연 게이지
+        health_interval (float): 유휴 연결 상태 확인 주기 (초)
+    """
+
+    def __init__(self, path, size=4, timeout=5.0, metrics=None, health_interval=30.0):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.metrics = metrics
+        self.health_interval = health_interval
+        self.latency = {'pooled': LatencyWindow(), 'direct': LatencyWindow()}
+        self._slots = None
+        self._health_task = None
+
+        if metrics:
+            for mode, window in self.latency.items():
+                metrics.set_gauge(f'command_latency_{mode}_count', lambda w=window: w.count)
+                for p in (50, 95, 99):
+                    metrics.set_gauge(f'command_latency_{mode}_p{p}_ms',
+                                      lambda w=window, p=p: round(w.percentile(p), 3))
+            metrics.set_gauge('pool_size', size)
+            metrics.set_gauge('pool_connected', self.connected_count)
+            for name in ('suricata_connects', 'suricata_reconnects', 'suricata_errors', 'health_check_failures'):
+                metrics.inc(name, 0)
+
+    def connected_count(self):
+        if self._slots is None:
+            return 0
+        return sum(1 for conn in list(self._slots._queue) if conn.alive)
+
+    async def start(self):
+        """풀 준비 (이벤트 루프 안에서 호출), 연결은 미리 열어 두되 실패해도 사용 시 재시도"""
+        if self.size <= 0:
+            return
+        self._slots = asyncio.Queue()
+        for _ in range(self.size):
+            conn = SuricataConnection(self.path, self.timeout)
+            try:
+                await conn.open()
+                self._inc('suricata_connects')
+            except (OSError, ConnectionError, asyncio.TimeoutError, ValueError) as e:
+                logging.warning(f"Suricata 연결 준비 실패 (사용 시 재연결): {e}")
+                conn.close()
+            self._slots.put_nowait(conn)
+        self._health_task = asyncio.ensure_future(self._health_loop())
+
+    async def close(self):
+        if self._health_task:
+            self._health_task.cancel()
+        if self._slots is not None:
+            while not self._slots.empty():
+                self._slots.get_nowait().close()
+
+    async def execute(self, command_json, timeout=None):
+        """
+        명령 실행 (풀 연결 하나를 빌려 사용, 풀이 없으면 새 연결)
+
+        Args:
+            timeout (float): 응답 대기 시간 (기본: 풀 timeout, 룰 재로드처럼 오래 걸리는 명령용)
+
+        반환:
+            dict: Suricata 응답
+
+        Raises:
+            OSError / ConnectionError / asyncio.TimeoutError: 통신 실패
+        """
+        started = time.perf_counter()
+        if self._slots is None:
+            conn = SuricataConnection(self.path, self.timeout)
+            try:
+                await conn.open()
+                response = await conn.request(command_json, timeout)
+            except Exception:
+                self._inc('suricata_errors')
+                raise
+            finally:
+                conn.close()
+            self._record('direct', started)
+            return response
+
+        conn = await self._slots.get()
+        try:
+            response = await self._execute_pooled(conn, command_json, timeout)
+        except Exception:
+            conn.close()
+            self._inc('suricata_errors')
+            raise
+        finally:
+            self._slots.put_nowait(conn)
+        self._record('pooled', started)
+        return response
+
+    async def _execute_pooled(self, conn, command_json, timeout):
+        reused = conn.alive
+        if not reused:
+            await conn.open()
+            self._inc('suricata_connects')
+        try:
+            return await conn.request(command_json, timeout)
+        except (ConnectionError, BrokenPipeError) as e:
+            # 재사용한 연결이 이미 끊겨 있던 경우 (Suricata 재시작 등) - 새 연결로 한 번 재시도
+            conn.close()
+            if not reused:
+                raise
+            logging.warning(f"Suricata 연결 끊김, 재연결: {e}")
+            self._inc('suricata_reconnects')
+            await conn.open()
+            self._inc('suricata_connects')
+            return await conn.request(command_json, timeout)
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            # 지금 쉬고 있는 연결만 확인 (사용 중인 연결은 그대로)
+            idle = []
+            while not self._slots.empty():
+                idle.append(self._slots.get_nowait())
+            try:
+                for conn in idle:
+                    if not conn.alive or time.monotonic() - conn.last_used < self.health_interval:
+                        continue
+                    try:
+                        response = await conn.request({'command': 'uptime'})
+                        if response.get('return') != 'OK':
+                            raise ConnectionError(response.get('message'))
+                    except (OSError, ConnectionError, asyncio.TimeoutError, ValueError) as e:
+                        logging.warning(f"Suricata 연결 상태 확인 실패, 닫음: {e}")
+                        self._inc('health_check_failures')
+                        conn.close()
+            finally:
+                for conn in idle:
+                    self._slots.put_nowait(conn)
+
+    def _record(self, mode, started):
+        self.latency[mode].add((time.perf_counter() - started) * 1000)
+
+    def _inc(self, name):
+        if self.metrics:
+            self.metrics.inc(name)
+
+    def summary(self):
+        """모드별 지연 요약 문자열 (로그용)"""
+        parts = []
+        for mode, window in self.latency.items():
+            if window.count:
+                parts.append(
+                    f"{mode} {window.count}건 p50 {window.percentile(50):.2f}ms / "
+                    f"p95 {window.percentile(95):.2f}ms / p99 {window.percentile(99):.2f}ms"
+                )
+        return ', '.join(parts) or '명령 없음'
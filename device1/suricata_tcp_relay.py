@@ -3,18 +3,42 @@
 suricata_tcp_relay.py
 TCP → Unix Socket 중계 서버
 포트: 10001
+
+asyncio 서버로 여러 클라이언트를 동시에 처리하고,
+Suricata로 동시에 보내는 명령 수는 RELAY_MAX_INFLIGHT로 제한
+(Suricata 응답이 느려도 다른 클라이언트의 연결/대기는 막히지 않음).
+클라이언트 프로토콜은 command_framing (줄 단위 JSON, id로 요청/응답 짝을 맞춰 파이프라이닝).
+
+Suricata 연결은 suricata_pool의 핸드셰이크된 연결 풀을 재사용 (RELAY_POOL_SIZE=0이면 명령마다 새 연결).
 """
 
-import socket
-import json
+import asyncio
+import os
 import logging
 
-# 설정
-RELAY_LISTEN_IP = '0.0.0.0'
-RELAY_LISTEN_PORT = 10001
-SURICATA_SOCKET_PATH = '/var/run/suricata/suricata-command.socket'
+from command_framing import FrameDecoder, FrameError, encode_frame, is_pipelined, reply
+from metrics import Metrics, start_metrics_server
+from suricata_pool import SuricataPool
+
+# 설정 (환경 변수로 변경 가능)
+RELAY_LISTEN_IP = os.environ.get('RELAY_LISTEN_IP', '0.0.0.0')
+RELAY_LISTEN_PORT = int(os.environ.get('RELAY_LISTEN_PORT', 10001))
+SURICATA_SOCKET_PATH = os.environ.get('SURICATA_SOCKET_PATH', '/var/run/suricata/suricata-command.socket')
 SURICATA_TIMEOUT = 5
+RELOAD_TIMEOUT = float(os.environ.get('RELAY_RELOAD_TIMEOUT', 120))  # 룰 재로드 응답 대기 (초, 룰셋이 크면 오래 걸림)
+RELOAD_COMMANDS = {'reload-rules', 'ruleset-reload-rules', 'ruleset-reload-nonblocking'}
 BUFFER_SIZE = 4096
+MAX_INFLIGHT = int(os.environ.get('RELAY_MAX_INFLIGHT', 4))  # Suricata로 동시에 보내는 명령 수
+CLIENT_TIMEOUT = float(os.environ.get('RELAY_CLIENT_TIMEOUT', 10))  # 클라이언트 요청 수신/응답 전송 제한 시간 (초)
+QUEUE_TIMEOUT = float(os.environ.get('RELAY_QUEUE_TIMEOUT', 10))  # Suricata 전송 차례 대기 제한 시간 (초)
+IDLE_TIMEOUT = float(os.environ.get('RELAY_IDLE_TIMEOUT', 60))  # 유지 중인 연결의 유휴 제한 시간 (초)
+MAX_PIPELINE = int(os.environ.get('RELAY_MAX_PIPELINE', 64))  # 연결당 동시에 처리하는 요청 수
+MAX_COMMAND_SIZE = 1024 * 1024  # 명령 1건 최대 크기
+POOL_SIZE = int(os.environ.get('RELAY_POOL_SIZE', MAX_INFLIGHT))  # Suricata 연결 풀 크기 (0이면 풀 미사용)
+POOL_HEALTH_INTERVAL = float(os.environ.get('RELAY_POOL_HEALTH_INTERVAL', 30))  # 유휴 연결 상태 확인 주기 (초)
+STATS_INTERVAL = float(os.environ.get('RELAY_STATS_INTERVAL', 60))  # 명령 지연 요약 로그 주기 (초, 0이면 비활성화)
+METRICS_HOST = os.environ.get('RELAY_METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.environ.get('RELAY_METRICS_PORT', 9102))  # 0이면 비활성화
 
 # 로깅
 logging.basicConfig(
@@ -27,51 +51,26 @@ logging.basicConfig(
 )
 
 
-def send_command_to_suricata(command_json):
+async def send_command_to_suricata(pool, command_json):
     """
     Suricata Unix Socket으로 명령 전송
     
     Args:
+        pool (SuricataPool): Suricata 명령 연결 풀
         command_json (dict): Suricata 명령
     
     반환:
         dict: Suricata 응답
     """
+    timeout = RELOAD_TIMEOUT if command_json.get('command') in RELOAD_COMMANDS else None
     try:
-        # Unix Socket 연결
-        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        sock.settimeout(SURICATA_TIMEOUT)
-        sock.connect(SURICATA_SOCKET_PATH)
-        
-        # JSON 전송 (개행 추가)
-        message = json.dumps(command_json) + '\n'
-        sock.sendall(message.encode('utf-8'))
-        
-        # 응답 수신
-        response_data = b""
-        while True:
-            chunk = sock.recv(BUFFER_SIZE)
-            if not chunk:
-                break
-            response_data += chunk
-            
-            # 개행 문자로 종료 판단
-            if b'\n' in chunk:
-                break
-        
-        sock.close()
-        
-        # 응답 파싱
-        response_str = response_data.decode('utf-8').strip()
-        response = json.loads(response_str)
-        
-        return response
+        return await pool.execute(command_json, timeout)
     
     except FileNotFoundError:
         logging.error(f"Suricata Socket 없음: {SURICATA_SOCKET_PATH}")
         return {'return': 'NOK', 'message': 'Socket file not found'}
     
-    except socket.timeout:
+    except asyncio.TimeoutError:
         logging.error("Suricata 타임아웃")
         return {'return': 'NOK', 'message': 'Timeout'}
     
@@ -80,71 +79,176 @@ def send_command_to_suricata(command_json):
         return {'return': 'NOK', 'message': str(e)}
 
 
-def handle_client_command(client_socket, client_addr):
-    """클라이언트 명령 처리"""
-    try:
-        # 데이터 수신
-        data_bytes = client_socket.recv(BUFFER_SIZE)
-        
-        if not data_bytes:
-            return
-        
-        # JSON 파싱
-        command_json = json.loads(data_bytes.decode('utf-8'))
-        
+class RelayServer:
+    """
+    TCP Relay 서버 (asyncio)
+    
+    Args:
+        max_inflight (int): Suricata로 동시에 보내는 최대 명령 수
+        pool_size (int): Suricata 연결 풀 크기 (0이면 명령마다 새 연결)
+    """
+    
+    def __init__(self, max_inflight=MAX_INFLIGHT, pool_size=POOL_SIZE):
+        self.max_inflight = max_inflight
+        self.semaphore = None
+        self.active_clients = 0
+        self.metrics = Metrics(prefix='suricata_relay_')
+        self.metrics.set_gauge('active_clients', lambda: self.active_clients)
+        self.pool = SuricataPool(
+            SURICATA_SOCKET_PATH, size=pool_size, timeout=SURICATA_TIMEOUT,
+            metrics=self.metrics, health_interval=POOL_HEALTH_INTERVAL
+        )
+    
+    async def execute(self, command_json, client_addr):
+        """명령 하나를 Suricata로 전달 (동시 전송 수 제한) 후 응답 반환"""
         logging.info(f"📨 명령 수신: {client_addr}")
         logging.info(f"   {command_json.get('command', 'unknown')}")
         
-        # Suricata로 전달
-        response = send_command_to_suricata(command_json)
-        
-        # 응답 전송
-        response_json = json.dumps(response)
-        client_socket.sendall(response_json.encode('utf-8'))
+        command = {key: value for key, value in command_json.items() if key != 'id'}
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logging.error(f"❌ 대기 시간 초과 (처리 중 {self.max_inflight}건): {client_addr}")
+            return {'return': 'NOK', 'message': 'Relay busy'}
+        try:
+            response = await send_command_to_suricata(self.pool, command)
+        finally:
+            self.semaphore.release()
         
         if response.get('return') == 'OK':
             logging.info(f"✅ 성공")
         else:
             logging.error(f"❌ 실패: {response.get('message')}")
+        return response
     
-    except json.JSONDecodeError as e:
-        logging.error(f"JSON 파싱 오류: {e}")
+    async def handle_client(self, reader, writer):
+        """
+        클라이언트 연결 처리 (command_framing 프로토콜)
+        
+        id가 있는 요청은 연결 하나에서 여러 개를 동시에 처리하고 끝나는 대로 응답,
+        id가 없는 요청은 응답 후 연결 종료 (기존 클라이언트)
+        """
+        client_addr = writer.get_extra_info('peername')
+        decoder = FrameDecoder(MAX_COMMAND_SIZE)
+        write_lock = asyncio.Lock()
+        pipeline = asyncio.Semaphore(MAX_PIPELINE)
+        tasks = set()
+        self.active_clients += 1
+        
+        async def respond(request, response):
+            async with write_lock:
+                writer.write(encode_frame(reply(request, response)))
+                await asyncio.wait_for(writer.drain(), CLIENT_TIMEOUT)
+        
+        async def run(request):
+            try:
+                await respond(request, await self.execute(request, client_addr))
+            except (OSError, asyncio.TimeoutError) as e:
+                logging.error(f"응답 전송 실패 ({client_addr}): {e}")
+            finally:
+                pipeline.release()
+        
+        try:
+            received = False
+            while True:
+                # 첫 요청 전이거나 받다 만 요청이 있으면 CLIENT_TIMEOUT, 유지 중인 연결은 IDLE_TIMEOUT
+                short = decoder.partial or not received
+                try:
+                    data = await asyncio.wait_for(
+                        reader.read(BUFFER_SIZE), CLIENT_TIMEOUT if short else IDLE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    if tasks and not short:
+                        continue
+                    if short:
+                        logging.error(f"클라이언트 타임아웃: {client_addr}")
+                    break
+                if not data:
+                    break
+                
+                try:
+                    frames = decoder.feed(data)
+                except FrameError as e:
+                    logging.error(f"요청 크기 초과: {client_addr}")
+                    await respond(None, {'return': 'NOK', 'message': str(e)})
+                    break
+                
+                for request in frames:
+                    received = True
+                    if isinstance(request, FrameError):
+                        logging.error(f"JSON 파싱 오류: {request}")
+                        await respond(None, {'return': 'NOK', 'message': 'Invalid JSON'})
+                        continue
+                    
+                    if not is_pipelined(request):
+                        # 기존 방식: 요청 하나 처리 후 연결 종료
+                        await respond(request, await self.execute(request, client_addr))
+                        return
+                    
+                    await pipeline.acquire()
+                    task = asyncio.ensure_future(run(request))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        
+        except asyncio.TimeoutError:
+            logging.error(f"클라이언트 타임아웃: {client_addr}")
+        
+        except Exception as e:
+            logging.error(f"처리 오류: {e}")
+        
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.active_clients -= 1
+            writer.close()
     
-    except Exception as e:
-        logging.error(f"처리 오류: {e}")
+    async def report_stats(self):
+        """명령 지연 요약을 주기적으로 로그"""
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            logging.info(f"📊 Suricata 명령 지연: {self.pool.summary()}")
     
-    finally:
-        client_socket.close()
+    async def serve(self):
+        """TCP Relay 서버 시작 (종료될 때까지 실행)"""
+        self.semaphore = asyncio.Semaphore(self.max_inflight)
+        await self.pool.start()
+        if STATS_INTERVAL > 0:
+            asyncio.ensure_future(self.report_stats())
+        if METRICS_PORT:
+            start_metrics_server(self.metrics, METRICS_HOST, METRICS_PORT)
+        server = await asyncio.start_server(
+            self.handle_client, RELAY_LISTEN_IP, RELAY_LISTEN_PORT,
+            reuse_address=True, backlog=128
+        )
+        
+        logging.info("=" * 60)
+        logging.info("🔌 Suricata TCP Relay 시작")
+        logging.info("=" * 60)
+        logging.info(f"📡 TCP 리스닝: {RELAY_LISTEN_IP}:{RELAY_LISTEN_PORT}")
+        logging.info(f"🔧 Unix Socket: {SURICATA_SOCKET_PATH}")
+        logging.info(f"⚙️  동시 Suricata 명령: {self.max_inflight}개, 클라이언트 타임아웃: {CLIENT_TIMEOUT}초")
+        logging.info(f"🔗 연결 풀: {self.pool.size}개" if self.pool.size > 0 else "🔗 연결 풀: 사용 안 함 (명령마다 새 연결)")
+        logging.info("=" * 60)
+        logging.info("✅ 대기 중...\n")
+        
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.pool.close()
+            logging.info(f"📊 Suricata 명령 지연: {self.pool.summary()}")
 
 
 def start_relay_server():
     """TCP Relay 서버 시작"""
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server_socket.bind((RELAY_LISTEN_IP, RELAY_LISTEN_PORT))
-    server_socket.listen(5)
-    
-    logging.info("=" * 60)
-    logging.info("🔌 Suricata TCP Relay 시작")
-    logging.info("=" * 60)
-    logging.info(f"📡 TCP 리스닝: {RELAY_LISTEN_IP}:{RELAY_LISTEN_PORT}")
-    logging.info(f"🔧 Unix Socket: {SURICATA_SOCKET_PATH}")
-    logging.info("=" * 60)
-    logging.info("✅ 대기 중...\n")
-    
-    while True:
-        try:
-            client_socket, client_addr = server_socket.accept()
-            handle_client_command(client_socket, client_addr)
-        
-        except KeyboardInterrupt:
-            logging.info("\n🛑 서버 종료")
-            break
-        except Exception as e:
-            logging.error(f"서버 오류: {e}")
-    
-    server_socket.close()
+    try:
+        asyncio.run(RelayServer().serve())
+    except KeyboardInterrupt:
+        logging.info("\n🛑 서버 종료")
 
 
 if __name__ == '__main__':
-    start_relay_server()
\ No newline at end of file
+    start_relay_server()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+tools/bench_blocklist.py
+IP 차단 방식 벤치마크 - 공격 IP마다 drop 룰 (ADD_RULE) vs 차단 데이터셋 (BLOCK_IP)
+
+suricata_tcp_relay + rule_command_client를 실제로 띄우고 N개 IP를 동시 요청으로 차단한 뒤
+처리량, 요청별 응답 지연, 재로드 횟수, 최종 룰 수를 비교.
+
+Suricata 명령 소켓은 기본으로 대역을 사용하며, 재로드 비용은 룰 수에 비례하도록
+--reload-ms-per-1k-rules로 지정 (0이면 재로드 비용 없음 → 룰 방식이 가장 유리한 조건).
+실제 Suricata로 측정하려면 --socket / --rules-file에 실제 명령 소켓과 AI 룰 파일 경로를 지정
+(룰 방식 측정 후 룰 파일에 벤치마크 룰이 남으므로 테스트 장비에서만 사용).
+
+사용법:
+    python tools/bench_blocklist.py --ips 10000
+    python tools/bench_blocklist.py --ips 10000 --reload-ms-per-1k-rules 40
+    sudo python tools/bench_blocklist.py --socket /var/run/suricata/suricata-command.socket \\
+        --rules-file /etc/suricata/rules/ai_rules.rules
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEVICE1_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(DEVICE1_DIR))
+
+from command_framing import FramedClient  # noqa: E402
+
+FIRST_SID = 910000000
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+
+def start_suricata_stub(path, rules_path, reload_ms_per_1k):
+    """Suricata 명령 소켓 대역 - reload-rules는 룰 파일의 룰 수에 비례해 지연, 데이터셋은 집합으로 유지"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(64)
+    state = {'reloads': 0, 'reload_seconds': 0.0, 'dataset': set(), 'lock': threading.Lock()}
+
+    def execute(command):
+        name = command.get('command')
+        if name == 'reload-rules':
+            # 실제 Suricata처럼 재로드는 한 번에 하나씩
+            with state['lock']:
+                started = time.perf_counter()
+                with open(rules_path) as f:
+                    rules = sum(1 for line in f if line.strip() and not line.startswith('#'))
+                time.sleep(rules * reload_ms_per_1k / 1e6)
+                state['reloads'] += 1
+                state['reload_seconds'] += time.perf_counter() - started
+            return {'return': 'OK', 'message': 'done'}
+        if name == 'dataset-add':
+            state['dataset'].add(command['arguments']['datavalue'])
+            return {'return': 'OK', 'message': 'data added'}
+        if name == 'dataset-remove':
+            state['dataset'].discard(command['arguments']['datavalue'])
+            return {'return': 'OK', 'message': 'data removed'}
+        return {'return': 'OK', 'message': 'done'}
+
+    def handle(conn):
+        with conn:
+            for line in conn.makefile('rb'):
+                command = json.loads(line)
+                response = {'return': 'OK'} if 'version' in command else execute(command)
+                conn.sendall(json.dumps(response).encode())
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server, state
+
+
+def launch(workdir, env):
+    processes = []
+    for script, port in (('suricata_tcp_relay.py', env['RELAY_LISTEN_PORT']),
+                         ('rule_command_client.py', env['RULE_CLIENT_LISTEN_PORT'])):
+        processes.append(subprocess.Popen(
+            [sys.executable, str(DEVICE1_DIR / script)], cwd=workdir, env={**os.environ, **env},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ))
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', int(port)), timeout=0.5).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or processes[-1].poll() is not None:
+                    raise RuntimeError(f'{script} 시작 실패')
+                time.sleep(0.1)
+    return processes
+
+
+def block_all(client, ips, mode, concurrency):
+    """IP를 동시에 차단 요청 → (요청별 지연 ms 리스트, 소요 시간, 실패 수)"""
+
+    def block(index):
+        ip = ips[index]
+        if mode == 'rule':
+            sid = FIRST_SID + index
+            message = {
+                'type': 'ADD_RULE', 'sid': sid,
+                'rule': f'drop ip {ip} any -> $HOME_NET any (msg:"AI_BLOCK:bench"; sid:{sid}; rev:1;)',
+            }
+        else:
+            message = {'type': 'BLOCK_IP', 'ip': ip}
+        started = time.perf_counter()
+        response = client.request(message, timeout=600)
+        return (time.perf_counter() - started) * 1000, response.get('return') == 'OK'
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(block, range(len(ips))))
+    elapsed = time.perf_counter() - started
+    return [ms for ms, _ in results], elapsed, sum(1 for _, ok in results if not ok)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='IP 차단 방식 벤치마크 (룰 vs 데이터셋)')
+    parser.add_argument('--ips', type=int, default=10000, help='차단할 IP 수')
+    parser.add_argument('--concurrency', type=int, default=64, help='동시 요청 수')
+    parser.add_argument('--reload-ms-per-1k-rules', type=float, default=0.0,
+                        help='대역 Suricata 재로드 비용 (룰 1000개당 ms)')
+    parser.add_argument('--socket', help='실제 Suricata 명령 소켓 (없으면 대역)')
+    parser.add_argument('--rules-file', help='실제 AI 룰 파일 (--socket과 함께)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_blocklist_')
+    rules_path = args.rules_file or os.path.join(workdir, 'ai_rules.rules')
+    socket_path = args.socket or os.path.join(workdir, 'suricata-command.socket')
+    stub = None
+    if not args.socket:
+        stub = start_suricata_stub(socket_path, rules_path, args.reload_ms_per_1k_rules)
+
+    ips = [f"10.{100 + i // 65536}.{(i // 256) % 256}.{i % 256}" for i in range(args.ips)]
+
+    print("=" * 84)
+    print(f"🧱 IP {args.ips:,}개 차단, 동시 요청 {args.concurrency}개 "
+          f"({'실제 Suricata' if args.socket else f'대역, 재로드 {args.reload_ms_per_1k_rules}ms/1k 룰'})")
+    print("=" * 84)
+    print(f"{'mode':8} {'IPs/s':>9} {'total s':>8} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'reloads':>8} {'reload s':>9} {'rules':>7} {'failed':>7}")
+
+    try:
+        for mode in ('rule', 'dataset'):
+            relay_port, client_port = free_port(), free_port()
+            env = {
+                'RELAY_LISTEN_IP': '127.0.0.1', 'RELAY_LISTEN_PORT': str(relay_port),
+                'SURICATA_SOCKET_PATH': socket_path, 'RELAY_METRICS_PORT': '0', 'RELAY_STATS_INTERVAL': '0',
+                'RULE_CLIENT_LISTEN_IP': '127.0.0.1', 'RULE_CLIENT_LISTEN_PORT': str(client_port),
+                'RULE_CLIENT_RELAY_HOST': '127.0.0.1', 'RULE_CLIENT_RELAY_PORT': str(relay_port),
+                'RULE_CLIENT_RULES_FILE': rules_path, 'RULE_CLIENT_MAX_AI_RULES': str(args.ips),
+                'RULE_CLIENT_EXPIRY_STATE': os.path.join(workdir, 'ai_rules_expiry.json'),
+            }
+            if stub:
+                open(rules_path, 'w').close()
+                stub[1].update(reloads=0, reload_seconds=0.0)
+            processes = launch(workdir, env)
+            client = FramedClient('127.0.0.1', client_port, timeout=600)
+            try:
+                latencies, elapsed, failed = block_all(client, ips, mode, args.concurrency)
+            finally:
+                client.close()
+                for process in processes:
+                    process.terminate()
+                    process.wait(10)
+
+            with open(rules_path) as f:
+                rules = sum(1 for line in f if line.strip() and not line.startswith('#'))
+            reloads = f"{stub[1]['reloads']:8,}" if stub else f"{'-':>8}"
+            reload_seconds = f"{stub[1]['reload_seconds']:9.2f}" if stub else f"{'-':>9}"
+            print(f"{mode:8} {len(ips) / elapsed:9,.0f} {elapsed:8.2f} {percentile(latencies, 50):9.1f} "
+                  f"{percentile(latencies, 99):9.1f} {reloads} {reload_seconds} {rules:7,} {failed:7,}")
+    finally:
+        if stub:
+            stub[0].close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
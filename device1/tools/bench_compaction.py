@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+tools/bench_compaction.py
+AI 룰 압축 벤치마크 - 봇넷 차단 룰 N개를 압축하기 전/후의 룰 수와 재로드 시간 비교
+
+공격 유형별로 출발지만 다른 drop 룰을 AI 룰 파일에 만들고 (일부는 같은 /24에 몰린 봇넷),
+rule_compactor로 압축한 뒤 측정. Suricata 명령 소켓은 기본으로 대역을 사용하며 재로드 비용은
+룰 수와 주소 수에 비례하도록 지정 (--reload-ms-per-1k-rules, --reload-ms-per-1k-addresses).
+실제 Suricata로 측정하려면 --socket / --rules-file 지정 (룰 파일을 덮어쓰므로 테스트 장비에서만 사용).
+
+사용법:
+    python tools/bench_compaction.py --rules 5000
+    sudo python tools/bench_compaction.py --rules 5000 --socket /var/run/suricata/suricata-command.socket \\
+        --rules-file /etc/suricata/rules/ai_rules.rules
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+DEVICE1_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(DEVICE1_DIR))
+
+from rule_coalescer import RuleCoalescer  # noqa: E402
+from rule_compactor import RuleCompactor  # noqa: E402
+
+FIRST_SID = 900000001
+ATTACK_TYPES = ('DDoS', 'DoS', 'PortScan', 'BruteForce')
+
+
+def start_suricata_stub(path, rules_path, ms_per_1k_rules, ms_per_1k_addresses):
+    """Suricata 명령 소켓 대역 - reload-rules는 룰 수/주소 수에 비례해 지연"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(8)
+
+    def reload_cost():
+        rules = addresses = 0
+        with open(rules_path) as f:
+            for line in f:
+                if line.strip() and not line.startswith('#'):
+                    rules += 1
+                    addresses += line.split(' ', 3)[2].count(',') + 1
+        return rules * ms_per_1k_rules / 1e6 + addresses * ms_per_1k_addresses / 1e6
+
+    def handle(conn):
+        with conn:
+            for line in conn.makefile('rb'):
+                command = json.loads(line)
+                if command.get('command') == 'reload-rules':
+                    time.sleep(reload_cost())
+                conn.sendall(json.dumps({'return': 'OK', 'message': 'done'}).encode())
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server
+
+
+def make_reload(socket_path):
+    """Suricata 명령 소켓으로 reload-rules (버전 핸드셰이크 포함)"""
+
+    def exchange(sock, message):
+        sock.sendall(json.dumps(message).encode() + b'\n')
+        data = b''
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError('Suricata 연결 종료')
+            data += chunk
+            try:
+                return json.loads(data)
+            except ValueError:
+                continue
+
+    def reload():
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(600)
+            sock.connect(socket_path)
+            exchange(sock, {'version': '0.2'})
+            return exchange(sock, {'command': 'reload-rules'})
+
+    return reload
+
+
+def write_rules(path, count, botnet_ratio, seed):
+    """공격 유형별 IP 차단 룰 생성 - botnet_ratio 비율은 소수의 /24에 몰린 출발지"""
+    rng = random.Random(seed)
+    with open(path, 'w') as f:
+        for index in range(count):
+            if rng.random() < botnet_ratio:
+                ip = f'198.51.{rng.randrange(8)}.{rng.randrange(1, 255)}'
+            else:
+                ip = f'{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}'
+            sid = FIRST_SID + index
+            attack = ATTACK_TYPES[rng.randrange(len(ATTACK_TYPES))]
+            f.write(f'drop tcp {ip} any -> $HOME_NET any (msg:"AI_BLOCK:{attack}"; sid:{sid}; rev:1;)\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='AI 룰 압축 벤치마크')
+    parser.add_argument('--rules', type=int, default=5000, help='IP별 차단 룰 수')
+    parser.add_argument('--botnet-ratio', type=float, default=0.5, help='같은 /24 몇 개에 몰린 출발지 비율')
+    parser.add_argument('--max-addresses', type=int, default=1000, help='룰 하나의 최대 주소 수')
+    parser.add_argument('--reload-ms-per-1k-rules', type=float, default=40.0,
+                        help='대역 Suricata 재로드 비용 (룰 1000개당 ms)')
+    parser.add_argument('--reload-ms-per-1k-addresses', type=float, default=2.0,
+                        help='대역 Suricata 재로드 비용 (주소 1000개당 ms)')
+    parser.add_argument('--socket', help='실제 Suricata 명령 소켓 (없으면 대역)')
+    parser.add_argument('--rules-file', help='실제 AI 룰 파일 (--socket과 함께)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_compaction_')
+    rules_path = args.rules_file or os.path.join(workdir, 'ai_rules.rules')
+    socket_path = args.socket or os.path.join(workdir, 'suricata-command.socket')
+    server = None
+    if not args.socket:
+        server = start_suricata_stub(socket_path, rules_path, args.reload_ms_per_1k_rules,
+                                     args.reload_ms_per_1k_addresses)
+
+    try:
+        write_rules(rules_path, args.rules, args.botnet_ratio, args.seed)
+        coalescer = RuleCoalescer(rules_path, make_reload(socket_path), window=0.01)
+        compactor = RuleCompactor(coalescer, os.path.join(workdir, 'ai_rules_compaction.json'),
+                                  max_addresses=args.max_addresses)
+
+        started = time.perf_counter()
+        report = compactor.compact(measure=True)
+        elapsed = time.perf_counter() - started
+        if report.get('return') != 'OK':
+            raise SystemExit(f"압축 실패: {report.get('message')}")
+
+        before_ms, after_ms = report['reload_ms_before'], report['reload_ms_after']
+        print("=" * 72)
+        print(f"🗜️ IP별 차단 룰 {args.rules:,}개 압축 "
+              f"({'실제 Suricata' if args.socket else '대역'}, 봇넷 비율 {args.botnet_ratio:.0%})")
+        print("=" * 72)
+        print(f"rules        {report['rules_before']:>10,} → {report['rules_after']:>10,} "
+              f"({1 - report['rules_after'] / max(report['rules_before'], 1):.1%} 감소)")
+        if before_ms and after_ms:
+            print(f"reload ms    {before_ms:>10,.1f} → {after_ms:>10,.1f} ({1 - after_ms / before_ms:.1%} 감소)")
+        print(f"groups       {report['groups']:>10,}   (삭제 SID {report['removed']:,}개)")
+        print(f"compaction   {elapsed:>10.2f}s  (측정 재로드 포함)")
+    finally:
+        if server:
+            server.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+tools/bench_e2e.py
+eve.json 재생 기반 종단 간 지연 벤치마크 (Linux 한 대에서 오프라인 실행)
+
+기록된 eve.json(또는 합성 이벤트)을 실제 시간의 N배 속도로 eve.json 파일에 이어 쓰고,
+실제 구성 요소를 그대로 띄워 공격 Flow가 Suricata 룰로 적용될 때까지의 시간을 측정:
+
+    eve.json → flow_extractor → (기록 프록시) → flow_receiver → Ollama 대역
+                                                  └→ rule_command_client → suricata_tcp_relay → Suricata 소켓 대역
+
+공격은 심각도 1 alert + 같은 flow_id의 flow 이벤트로 주입 (공격마다 고유 출발지 IP).
+단계별 p50/p95/p99:
+    extract  : flow 줄 기록 → 장치 2 도착 (파싱/필터/배치/전송)
+    classify : flow_receiver 예측 (ML 배치 또는 경보 판정, 응답의 timings)
+    generate : Ollama 대역 요청 수신 → 응답 (방어 큐 대기 시간 제외)
+    apply    : Ollama 응답 → Suricata 적용 (데이터셋 모드는 예측 완료 → dataset-add 수신)
+    e2e      : flow 줄 기록 → Suricata 적용 (rule-add, 룰 파일 추가 후 reload-rules, 또는 dataset-add 수신)
+
+flow_receiver는 ML 모델을 로드하므로 device2/models가 있어야 함 (작업 디렉터리에 링크).
+
+사용법:
+    python tools/bench_e2e.py --synthetic 200000 --eps 2000 --speed 5 --attacks 200
+    python tools/bench_e2e.py --eve /var/log/suricata/eve.json --speed 10 --ollama-delay 0.8
+    python tools/bench_e2e.py --block-mode dataset
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+TOOLS_DIR = Path(__file__).resolve().parent
+DEVICE1_DIR = TOOLS_DIR.parent
+DEVICE2_DIR = DEVICE1_DIR.parent / 'device2'
+
+sys.path.insert(0, str(TOOLS_DIR))
+sys.path.insert(0, str(DEVICE1_DIR))
+
+from eve_synth import make_event, synthetic_eve_lines  # noqa: E402
+from flow_wire import BATCH_ID_HEADER, CONTENT_TYPE as WIRE_CONTENT_TYPE, decode_flows  # noqa: E402
+
+STAGES = ('extract', 'classify', 'generate', 'apply', 'e2e')
+SOURCE_IP_PATTERN = re.compile(r'Source IP: (\S+)')
+SID_PATTERN = re.compile(r'sid:(\d+)')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout, process=None):
+    """TCP 포트가 열릴 때까지 대기"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"프로세스 종료됨 (code {process.returncode}): {process.args}")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise TimeoutError(f"포트 {port} 대기 시간 초과")
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Recorder:
+    """공격 출발지 IP별 단계 시각/소요 시간 기록 (모두 이 프로세스의 perf_counter 기준)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.written = {}   # src_ip → flow 줄 기록 시각
+        self.arrived = {}   # src_ip → 장치 2 도착 시각
+        self.timings = {}   # src_ip → flow_receiver 단계별 ms
+        self.generating = {}  # src_ip → Ollama 요청 수신 시각
+        self.generated = {}   # src_ip → Ollama 응답 시각
+        self.applied = {}   # src_ip → Suricata rule-add 수신 시각
+        self.flows_received = 0
+        self.rules_added = 0
+
+    def first(self, table, key, value):
+        with self.lock:
+            table.setdefault(key, value)
+
+    def stage_samples(self):
+        """단계별 소요 시간 리스트 (ms)"""
+        samples = {stage: [] for stage in STAGES}
+        with self.lock:
+            for ip, written in self.written.items():
+                if ip in self.arrived:
+                    samples['extract'].append((self.arrived[ip] - written) * 1000)
+                timings = self.timings.get(ip, {})
+                if 'classify_ms' in timings:
+                    samples['classify'].append(timings['classify_ms'])
+                if ip in self.generated:
+                    samples['generate'].append((self.generated[ip] - self.generating[ip]) * 1000)
+                if ip in self.applied:
+                    samples['e2e'].append((self.applied[ip] - written) * 1000)
+                    # 룰 생성/적용은 flow_receiver 방어 큐에서 비동기 - 시작 시각은 Ollama 응답 또는 예측 완료
+                    if ip in self.generated:
+                        samples['apply'].append((self.applied[ip] - self.generated[ip]) * 1000)
+                    elif ip in self.arrived and 'classify_ms' in timings:
+                        ready = self.arrived[ip] + timings['classify_ms'] / 1000
+                        samples['apply'].append((self.applied[ip] - ready) * 1000)
+        return samples
+
+
+def start_ollama_stub(port, delay, recorder):
+    """Ollama /api/generate 대역 - 프롬프트의 Source IP로 drop 룰 하나 반환 (요청/응답 시각 기록)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            started = time.perf_counter()
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            prompt = body.get('prompt', '')
+            src = SOURCE_IP_PATTERN.search(prompt)
+            sid = SID_PATTERN.search(prompt)
+            if delay:
+                time.sleep(delay)
+            if src:
+                with recorder.lock:
+                    if src.group(1) not in recorder.generated:
+                        recorder.generating[src.group(1)] = started
+                        recorder.generated[src.group(1)] = time.perf_counter()
+            rule = (
+                f'drop ip {src.group(1) if src else "any"} any -> $HOME_NET any '
+                f'(msg:"AI_BLOCK:bench"; sid:{sid.group(1) if sid else 900000001}; rev:1;)'
+            )
+            data = json.dumps({'model': body.get('model'), 'response': rule, 'done': True}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, name='ollama-stub', daemon=True).start()
+    return server
+
+
+def start_suricata_stub(path, recorder, attackers, rules_path=None):
+    """
+    Suricata 명령 소켓 대역 - 모든 명령에 OK, 룰 적용 시각을 출발지 IP별로 기록
+    (rule-add / dataset-add 수신 시각, 또는 reload-rules 시점에 rules_path에 들어 있는 룰)
+    """
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(64)
+
+    def record(rules):
+        now = time.perf_counter()
+        for rule in rules:
+            for token in rule.split()[:4]:
+                if token in attackers and token not in recorder.applied:
+                    with recorder.lock:
+                        recorder.rules_added += 1
+                    recorder.first(recorder.applied, token, now)
+
+    def handle(conn):
+        with conn:
+            buffer = b''
+            while True:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    return
+                buffer += chunk
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    if not line.strip():
+                        continue
+                    try:
+                        command = json.loads(line)
+                    except json.JSONDecodeError:
+                        conn.sendall(b'{"return": "NOK", "message": "Invalid JSON"}\n')
+                        continue
+                    if 'version' in command and 'command' not in command:
+                        conn.sendall(b'{"return": "OK"}\n')
+                        continue
+                    if command.get('command') == 'rule-add':
+                        record([command.get('rule', '')])
+                    elif command.get('command') == 'dataset-add':
+                        record([str(command.get('arguments', {}).get('datavalue'))])
+                    elif command.get('command') == 'reload-rules' and rules_path:
+                        # 묶음 적용: 재로드 시점에 룰 파일에 있는 룰이 모두 적용된 것으로 봄
+                        with open(rules_path) as f:
+                            record(f.read().splitlines())
+                    conn.sendall(b'{"return": "OK", "message": "done"}\n')
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, name='suricata-stub', daemon=True).start()
+    return server
+
+
+def start_recording_proxy(port, upstream, recorder, attackers):
+    """flow_extractor → flow_receiver 사이 HTTP 프록시 (도착 시각/판정 결과 기록)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            arrived = time.perf_counter()
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            content_type = self.headers.get('Content-Type', 'application/json')
+
+            try:
+                if content_type.split(';')[0].strip() == WIRE_CONTENT_TYPE:
+                    flows = decode_flows(body)
+                else:
+                    payload = json.loads(body)
+                    flows = payload.get('flows', [payload])
+            except ValueError:
+                flows = []
+            with recorder.lock:
+                recorder.flows_received += len(flows)
+            for flow in flows:
+                if flow.get('src_ip') in attackers:
+                    recorder.first(recorder.arrived, flow['src_ip'], arrived)
+
+            headers = {'Content-Type': content_type}
+            if self.headers.get(BATCH_ID_HEADER):
+                headers[BATCH_ID_HEADER] = self.headers[BATCH_ID_HEADER]
+            request = urllib.request.Request(upstream + self.path, data=body, method='POST', headers=headers)
+            try:
+                with urllib.request.urlopen(request, timeout=120) as response:
+                    status, data = response.status, response.read()
+            except urllib.error.HTTPError as e:
+                status, data = e.code, e.read()
+            except OSError as e:
+                status, data = 502, json.dumps({'error': str(e)}).encode()
+
+            if status == 200:
+                try:
+                    result = json.loads(data)
+                    results = result.get('results', [result])
+                except ValueError:
+                    results = []
+                for flow, outcome in zip(flows, results):
+                    if flow.get('src_ip') in attackers and isinstance(outcome, dict):
+                        recorder.first(recorder.timings, flow['src_ip'], outcome.get('timings') or {})
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, name='recording-proxy', daemon=True).start()
+    return server
+
+
+def event_time(line):
+    """eve 줄의 timestamp (초), 없으면 None"""
+    start = line.find('"timestamp":"')
+    if start < 0:
+        return None
+    start += len('"timestamp":"')
+    try:
+        return datetime.fromisoformat(line[start:start + 26]).timestamp()
+    except ValueError:
+        return None
+
+
+def attack_lines(index, flow_id, attacker):
+    """심각도 1 alert + 같은 flow_id의 종료된 flow 이벤트"""
+    rng = random.Random(index)
+    now = datetime.now(timezone.utc)
+    alert = make_event(rng, 'alert', now, flow_id, attacker)
+    alert['alert'].update({
+        'signature_id': 9000000, 'signature': 'BENCH attack', 'category': 'Bench Attack', 'severity': 1,
+    })
+    flow = make_event(rng, 'flow', now, flow_id, attacker)
+    flow['flow'].update({'age': 30, 'state': 'closed', 'pkts_toserver': 400, 'bytes_toserver': 24000})
+    return [json.dumps(alert, separators=(',', ':')) + '\n', json.dumps(flow, separators=(',', ':')) + '\n']
+
+
+def replay(eve_path, lines, speed, attackers, recorder, attack_every):
+    """
+    eve.json에 줄을 이어 씀 (타임스탬프 간격 / speed 속도), attack_every 줄마다 공격 주입
+
+    반환:
+        (기록한 줄 수, 소요 시간)
+    """
+    started = time.perf_counter()
+    first_ts = None
+    written = 0
+    pending = list(attackers)
+
+    with open(eve_path, 'a', buffering=1 << 16) as f:
+        for i, line in enumerate(lines):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8', 'replace')
+            if not line.endswith('\n'):
+                line += '\n'
+
+            ts = event_time(line)
+            if ts is not None and speed > 0:
+                if first_ts is None:
+                    first_ts = ts
+                ahead = (ts - first_ts) / speed - (time.perf_counter() - started)
+                if ahead > 0.001:
+                    f.flush()
+                    time.sleep(ahead)
+            f.write(line)
+            written += 1
+
+            if pending and i % attack_every == attack_every - 1:
+                attacker = pending.pop(0)
+                f.writelines(attack_lines(i, 2 * 10 ** 15 + i, attacker))
+                f.flush()
+                recorder.first(recorder.written, attacker, time.perf_counter())
+                written += 2
+
+        for i, attacker in enumerate(pending):
+            f.writelines(attack_lines(i, 3 * 10 ** 15 + i, attacker))
+            f.flush()
+            recorder.first(recorder.written, attacker, time.perf_counter())
+            written += 2
+
+    return written, time.perf_counter() - started
+
+
+def launch(script, cwd, env, log_name):
+    log = open(Path(cwd) / log_name, 'wb')
+    return subprocess.Popen(
+        [sys.executable, str(script)], cwd=cwd, env={**os.environ, **env},
+        stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='eve.json 재생 종단 간 지연 벤치마크')
+    parser.add_argument('--eve', help='재생할 eve.json 경로 (없으면 합성 이벤트)')
+    parser.add_argument('--synthetic', type=int, default=100000, help='합성 줄 수')
+    parser.add_argument('--eps', type=float, default=2000.0, help='합성 이벤트의 초당 이벤트 수 (실제 시간 기준)')
+    parser.add_argument('--speed', type=float, default=1.0, help='실제 시간 대비 재생 배속 (0이면 최대 속도)')
+    parser.add_argument('--attacks', type=int, default=100, help='주입할 공격 수')
+    parser.add_argument('--ollama-delay', type=float, default=0.0, help='Ollama 대역 응답 지연 (초)')
+    parser.add_argument('--drain', type=float, default=30.0, help='재생 후 룰 적용 대기 최대 시간 (초)')
+    parser.add_argument('--processes', type=int, default=1, help='FLOW_EXTRACTOR_PROCESSES')
+    parser.add_argument('--block-mode', choices=('rule', 'dataset'), default='rule', help='FLOW_BLOCK_MODE')
+    parser.add_argument('--keep', action='store_true', help='작업 디렉터리(로그) 유지')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_e2e_')
+    eve_path = os.path.join(workdir, 'eve.json')
+    suricata_socket = os.path.join(workdir, 'suricata-command.socket')
+    open(eve_path, 'w').close()
+    if (DEVICE2_DIR / 'models').exists():
+        os.symlink(DEVICE2_DIR / 'models', os.path.join(workdir, 'models'))
+
+    ports = {name: free_port() for name in ('ollama', 'relay', 'rule_client', 'receiver', 'proxy', 'metrics')}
+    attackers = [f"10.{200 + i // 65536}.{(i // 256) % 256}.{i % 256}" for i in range(args.attacks)]
+    attacker_set = set(attackers)
+    recorder = Recorder()
+
+    servers = [
+        start_ollama_stub(ports['ollama'], args.ollama_delay, recorder),
+        start_recording_proxy(ports['proxy'], f"http://127.0.0.1:{ports['receiver']}", recorder, attacker_set),
+    ]
+    rules_path = os.path.join(workdir, 'ai_rules.rules')
+    suricata = start_suricata_stub(suricata_socket, recorder, attacker_set, rules_path)
+
+    processes = []
+    try:
+        processes.append(launch(DEVICE1_DIR / 'suricata_tcp_relay.py', workdir, {
+            'RELAY_LISTEN_IP': '127.0.0.1', 'RELAY_LISTEN_PORT': str(ports['relay']),
+            'SURICATA_SOCKET_PATH': suricata_socket, 'RELAY_METRICS_PORT': '0',
+        }, 'relay.out'))
+        wait_for_port(ports['relay'], 15, processes[-1])
+
+        processes.append(launch(DEVICE1_DIR / 'rule_command_client.py', workdir, {
+            'RULE_CLIENT_LISTEN_IP': '127.0.0.1', 'RULE_CLIENT_LISTEN_PORT': str(ports['rule_client']),
+            'RULE_CLIENT_RELAY_HOST': '127.0.0.1', 'RULE_CLIENT_RELAY_PORT': str(ports['relay']),
+            'RULE_CLIENT_RULES_FILE': rules_path,
+            'RULE_CLIENT_EXPIRY_STATE': os.path.join(workdir, 'ai_rules_expiry.json'),
+        }, 'rule_client.out'))
+        wait_for_port(ports['rule_client'], 15, processes[-1])
+
+        processes.append(launch(DEVICE2_DIR / 'flow_receiver.py', workdir, {
+            'DEVICE1_RULE_HOST': '127.0.0.1', 'DEVICE1_RULE_PORT': str(ports['rule_client']),
+            'OLLAMA_URL': f"http://127.0.0.1:{ports['ollama']}/api/generate",
+            'FLOW_RECEIVER_PORT': str(ports['receiver']), 'FLOW_BLOCK_MODE': args.block_mode,
+        }, 'flow_receiver.out'))
+        wait_for_port(ports['receiver'], 60, processes[-1])
+
+        proxy = f"http://127.0.0.1:{ports['proxy']}"
+        processes.append(launch(DEVICE1_DIR / 'flow_extractor.py', workdir, {
+            'FLOW_EVE_SOURCE': 'file', 'FLOW_EVE_LOG_PATH': eve_path,
+            'FLOW_DEVICE2_URL': f'{proxy}/receive-flow', 'FLOW_DEVICE2_BATCH_URL': f'{proxy}/receive-flows',
+            'FLOW_METRICS_PORT': str(ports['metrics']),
+            'FLOW_EXTRACTOR_PROCESSES': str(args.processes),
+            'FLOW_EDGE_MODEL': str(DEVICE1_DIR / 'models' / 'edge_model.json'),
+        }, 'flow_extractor.out'))
+        wait_for_port(ports['metrics'], 30, processes[-1])
+        time.sleep(1.0)  # 메트릭 서버가 뜬 직후 tailer가 파일 끝을 잡을 때까지
+
+        if args.eve:
+            source = open(args.eve, 'rb')
+            lines = (line for line in source if line.strip())
+            total_hint = None
+        else:
+            source = None
+            lines = synthetic_eve_lines(args.synthetic, rate=args.eps)
+            total_hint = args.synthetic
+        attack_every = max(1, (total_hint or args.attacks * 1000) // max(args.attacks, 1))
+
+        started = time.perf_counter()
+        print(f"▶️  재생 시작 (배속 {args.speed}x, 공격 {args.attacks}개, 작업 디렉터리 {workdir})")
+        try:
+            written, seconds = replay(eve_path, lines, args.speed, attackers, recorder, attack_every)
+        finally:
+            if source:
+                source.close()
+
+        deadline = time.monotonic() + args.drain
+        while time.monotonic() < deadline and len(recorder.applied) < len(attackers):
+            time.sleep(0.2)
+        drained = time.perf_counter() - started - seconds
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        for server in servers:
+            server.shutdown()
+        suricata.close()
+
+    samples = recorder.stage_samples()
+    print("=" * 72)
+    print(f"📈 재생: {written:,}줄 / {seconds:.2f}초 ({written / max(seconds, 1e-9):,.0f} 줄/초)")
+    print(f"📦 장치 2 수신 Flow: {recorder.flows_received:,} "
+          f"({recorder.flows_received / max(seconds, 1e-9):,.0f} Flow/초)")
+    print(f"🛡️  룰 적용: {len(recorder.applied)}/{len(attackers)} 공격 "
+          f"(룰 {recorder.rules_added}건, 재생 종료 후 {drained:.1f}초 대기)")
+    print("=" * 72)
+    print(f"{'stage':10} {'n':>6} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for stage in STAGES:
+        values = samples[stage]
+        print(f"{stage:10} {len(values):6} {percentile(values, 50):10.1f} {percentile(values, 95):10.1f} "
+              f"{percentile(values, 99):10.1f} {max(values) if values else float('nan'):10.1f}")
+
+    if args.keep:
+        print(f"📁 로그: {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+tools/bench_eve_decoder.py
+eve.json 디코딩 마이크로벤치마크 (초당 처리 줄 수, 변경 전/후 비교)
+
+- before: 모든 줄을 json.loads 후 event_type 확인 (기존 방식)
+- after : eve_decoder (바이트 사전 필터 + 빠른 JSON 백엔드 + 필드 추출)
+
+사용법:
+    python tools/bench_eve_decoder.py --eve /var/log/suricata/eve.json
+    python tools/bench_eve_decoder.py --synthetic 200000
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from eve_decoder import ALERT_FIELDS, JSON_BACKEND, EveDecoder, event_type_of  # noqa: E402
+from eve_synth import synthetic_eve_lines  # noqa: E402
+
+
+# ---------- 기존 방식 (before) ----------
+
+def before_flow(lines):
+    count = 0
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if event.get('event_type') == 'flow':
+            count += 1
+    return count
+
+
+def before_alert(lines):
+    count = 0
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if event.get('event_type') == 'alert':
+            alert = event.get('alert')
+            if not alert:
+                continue
+            {
+                'timestamp': event.get('timestamp'), 'src_ip': event.get('src_ip'),
+                'dest_ip': event.get('dest_ip'), 'src_port': event.get('src_port'),
+                'dest_port': event.get('dest_port'), 'proto': event.get('proto'),
+                'signature': alert.get('signature'), 'severity': alert.get('severity'),
+                'category': alert.get('category'), 'gid': alert.get('gid'),
+                'sid': alert.get('signature_id'),
+            }
+            count += 1
+    return count
+
+
+def before_stats(lines):
+    event_types = {}
+    for line in lines:
+        try:
+            event_type = json.loads(line).get('event_type', 'unknown')
+        except json.JSONDecodeError:
+            continue
+        event_types[event_type] = event_types.get(event_type, 0) + 1
+    return sum(event_types.values())
+
+
+# ---------- 공용 디코더 (after) ----------
+
+FLOW_DECODER = EveDecoder(event_types=('flow',))
+ALERT_DECODER = EveDecoder(event_types=('alert',), fields=ALERT_FIELDS, require='alert')
+
+
+def after_flow(lines):
+    decode = FLOW_DECODER.decode
+    return sum(1 for line in lines if decode(line) is not None)
+
+
+def after_alert(lines):
+    decode = ALERT_DECODER.decode
+    return sum(1 for line in lines if decode(line) is not None)
+
+
+def after_stats(lines):
+    event_types = {}
+    for line in lines:
+        event_type = event_type_of(line) or 'unknown'
+        event_types[event_type] = event_types.get(event_type, 0) + 1
+    return sum(event_types.values())
+
+
+CASES = [
+    ('flow_extractor (flow)', before_flow, after_flow),
+    ('api/main load_alerts (alert)', before_alert, after_alert),
+    ('device1_api get_stats (event_type)', before_stats, after_stats),
+]
+
+
+def measure(func, lines, repeat):
+    """가장 빠른 실행 기준 초당 줄 수"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(lines)
+        best = min(best, time.perf_counter() - started)
+    return len(lines) / best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='eve.json 디코딩 벤치마크')
+    parser.add_argument('--eve', help='기록된 eve.json 경로')
+    parser.add_argument('--synthetic', type=int, default=200000, help='--eve가 없을 때 생성할 합성 줄 수')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.eve:
+        with open(args.eve, 'rb') as f:
+            lines = [line for line in f if line.strip()]
+        source = args.eve
+    else:
+        lines = [line.encode() for line in synthetic_eve_lines(args.synthetic)]
+        source = f'synthetic ({args.synthetic:,} lines)'
+
+    print("=" * 72)
+    print(f"📁 입력: {source}")
+    print(f"🧩 JSON 백엔드: {JSON_BACKEND}")
+    print("=" * 72)
+    print(f"{'consumer':38} {'before l/s':>11} {'after l/s':>11} {'speedup':>8}")
+
+    for name, before, after in CASES:
+        before_rate, before_count = measure(before, lines, args.repeat)
+        after_rate, after_count = measure(after, lines, args.repeat)
+        mismatch = '' if before_count == after_count else f'  ⚠ 결과 불일치 {before_count} != {after_count}'
+        print(f"{name:38} {before_rate:11,.0f} {after_rate:11,.0f} {after_rate / before_rate:7.1f}x{mismatch}")
+
+
+if __name__ == '__main__':
+    main()
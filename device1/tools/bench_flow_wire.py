@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+tools/bench_flow_wire.py
+Flow 배치 전송 포맷 벤치마크 (10k Flow당 전송 바이트 / 인코딩·디코딩 CPU 시간)
+
+- json        : 기존 방식 {"flows": [...]} (requests json= 와 같은 직렬화)
+- json+gzip   : 참고용 (HTTP 압축을 붙였을 때)
+- binary      : flow_wire 컬럼 포맷 (압축 없음)
+- binary+zlib : flow_wire 컬럼 포맷 + zlib (flow_extractor 기본값)
+
+사용법:
+    python tools/bench_flow_wire.py
+    python tools/bench_flow_wire.py --flows 10000 --batch 200
+"""
+
+import argparse
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from eve_synth import synthetic_eve_lines  # noqa: E402
+from flow_wire import decode_flows, encode_flows  # noqa: E402
+
+
+def synthetic_flows(count):
+    """합성 eve.json에서 flow_extractor와 같은 13개 필드 Flow 생성"""
+    flows = []
+    for line in synthetic_eve_lines(count * 6, seed=7):
+        event = json.loads(line)
+        if event.get('event_type') != 'flow':
+            continue
+        flow = event['flow']
+        flows.append({
+            'timestamp': event.get('timestamp'),
+            'flow_id': event.get('flow_id'),
+            'src_ip': event.get('src_ip'),
+            'dest_ip': event.get('dest_ip'),
+            'src_port': event.get('src_port'),
+            'dest_port': event.get('dest_port'),
+            'proto': event.get('proto'),
+            'flow_age': flow.get('age', 0),
+            'flow_state': flow.get('state', ''),
+            'pkts_toserver': flow.get('pkts_toserver', 0),
+            'pkts_toclient': flow.get('pkts_toclient', 0),
+            'bytes_toserver': flow.get('bytes_toserver', 0),
+            'bytes_toclient': flow.get('bytes_toclient', 0),
+        })
+        if len(flows) >= count:
+            break
+    return flows
+
+
+FORMATS = [
+    ('json', lambda b: json.dumps({'flows': b}).encode(), lambda d: json.loads(d)['flows']),
+    ('json+gzip', lambda b: gzip.compress(json.dumps({'flows': b}).encode(), 1),
+     lambda d: json.loads(gzip.decompress(d))['flows']),
+    ('binary', lambda b: encode_flows(b, compress=False), decode_flows),
+    ('binary+zlib', lambda b: encode_flows(b, compress=True), decode_flows),
+]
+
+
+def measure(batches, encode, decode, repeat):
+    """(총 바이트, 인코딩 초, 디코딩 초) - 가장 빠른 실행 기준"""
+    best_encode = best_decode = float('inf')
+    total_bytes = 0
+    for _ in range(repeat):
+        started = time.process_time()
+        payloads = [encode(batch) for batch in batches]
+        best_encode = min(best_encode, time.process_time() - started)
+
+        started = time.process_time()
+        decoded = [decode(payload) for payload in payloads]
+        best_decode = min(best_decode, time.process_time() - started)
+
+        total_bytes = sum(len(p) for p in payloads)
+    assert decoded == batches, "왕복 결과 불일치"
+    return total_bytes, best_encode, best_decode
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Flow 배치 전송 포맷 벤치마크')
+    parser.add_argument('--flows', type=int, default=10000)
+    parser.add_argument('--batch', type=int, default=200, help='배치당 Flow 수 (flow_extractor BATCH_SIZE)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    flows = synthetic_flows(args.flows)
+    batches = [flows[i:i + args.batch] for i in range(0, len(flows), args.batch)]
+    scale = 10000 / len(flows)
+
+    print("=" * 72)
+    print(f"📦 {len(flows):,} Flow, 배치 {args.batch}개 ({len(batches)} 배치) - 10k Flow 기준으로 환산")
+    print("=" * 72)
+    print(f"{'format':12} {'bytes/10k':>12} {'ratio':>7} {'encode ms':>10} {'decode ms':>10}")
+
+    baseline = None
+    for name, encode, decode in FORMATS:
+        total_bytes, encode_s, decode_s = measure(batches, encode, decode, args.repeat)
+        baseline = baseline or total_bytes
+        print(f"{name:12} {total_bytes * scale:12,.0f} {total_bytes / baseline:7.2f} "
+              f"{encode_s * scale * 1000:10.1f} {decode_s * scale * 1000:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
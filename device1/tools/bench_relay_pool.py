@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+tools/bench_relay_pool.py
+suricata_tcp_relay 명령 지연 벤치마크 - Suricata 연결 풀 사용 / 미사용 비교
+
+Suricata 명령 소켓 대역(버전 핸드셰이크 필수, 연결 수락 지연 설정 가능)을 띄우고
+relay를 RELAY_POOL_SIZE=0 (명령마다 새 연결) / N (풀)으로 각각 실행해
+같은 수의 rule-add 명령을 보낸 뒤 클라이언트 왕복 지연과 relay가 기록한 Suricata 명령 지연을 비교.
+
+사용법:
+    python tools/bench_relay_pool.py --commands 2000 --clients 8 --pool 4
+    python tools/bench_relay_pool.py --accept-delay 0.002   # Suricata 연결 수락/핸드셰이크 비용 흉내
+"""
+
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEVICE1_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+
+def start_suricata_stub(path, accept_delay):
+    """Suricata 명령 소켓 대역 - 버전 핸드셰이크 후에만 명령 처리, 응답은 개행 없이 JSON"""
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(128)
+    stats = {'connections': 0, 'commands': 0}
+
+    def handle(conn):
+        with conn:
+            if accept_delay:
+                time.sleep(accept_delay)
+            reader = conn.makefile('rb')
+            greeted = False
+            for line in reader:
+                command = json.loads(line)
+                if not greeted:
+                    greeted = 'version' in command
+                    conn.sendall(json.dumps({'return': 'OK' if greeted else 'NOK'}).encode())
+                    continue
+                stats['commands'] += 1
+                conn.sendall(json.dumps({'return': 'OK', 'message': 'done'}).encode())
+
+    def serve():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            stats['connections'] += 1
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return server, stats
+
+
+def send_command(port, sid):
+    """relay에 rule-add 하나 전송 (rule_command_client와 같은 방식) → 왕복 ms"""
+    started = time.perf_counter()
+    with socket.create_connection(('127.0.0.1', port), timeout=10) as sock:
+        sock.sendall((json.dumps({
+            'command': 'rule-add',
+            'rule': f'drop ip 10.0.{sid // 256 % 256}.{sid % 256} any -> $HOME_NET any (msg:"bench"; sid:{sid}; rev:1;)',
+            'sid': sid,
+        }) + '\n').encode())
+        data = b''
+        while True:
+            chunk = sock.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    if json.loads(data).get('return') != 'OK':
+        raise RuntimeError(data)
+    return (time.perf_counter() - started) * 1000
+
+
+def run(pool_size, args, socket_path, workdir):
+    port, metrics_port = free_port(), free_port()
+    env = {
+        **os.environ,
+        'RELAY_LISTEN_IP': '127.0.0.1', 'RELAY_LISTEN_PORT': str(port),
+        'SURICATA_SOCKET_PATH': socket_path, 'RELAY_POOL_SIZE': str(pool_size),
+        'RELAY_MAX_INFLIGHT': str(max(args.pool, 1)),
+        'RELAY_METRICS_PORT': str(metrics_port), 'RELAY_STATS_INTERVAL': '0',
+    }
+    process = subprocess.Popen(
+        [sys.executable, str(DEVICE1_DIR / 'suricata_tcp_relay.py')], cwd=workdir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 15
+        while True:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    raise RuntimeError('relay 시작 실패')
+                time.sleep(0.1)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(args.clients) as executor:
+            latencies = list(executor.map(lambda sid: send_command(port, sid), range(1, args.commands + 1)))
+        elapsed = time.perf_counter() - started
+
+        with urllib.request.urlopen(f'http://127.0.0.1:{metrics_port}/metrics.json', timeout=5) as response:
+            metrics = json.load(response)
+    finally:
+        process.terminate()
+        process.wait(10)
+    return latencies, elapsed, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='relay Suricata 연결 풀 벤치마크')
+    parser.add_argument('--commands', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=8, help='동시 클라이언트 수')
+    parser.add_argument('--pool', type=int, default=4, help='풀 크기 (= 동시 Suricata 명령 수)')
+    parser.add_argument('--accept-delay', type=float, default=0.0, help='Suricata 대역 연결당 수락 지연 (초)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_relay_')
+    socket_path = os.path.join(workdir, 'suricata-command.socket')
+    server, stats = start_suricata_stub(socket_path, args.accept_delay)
+
+    print("=" * 78)
+    print(f"🔌 명령 {args.commands:,}건, 클라이언트 {args.clients}개, 풀 {args.pool}개")
+    print("=" * 78)
+    print(f"{'mode':8} {'cmd/s':>8} {'client p50':>11} {'p95':>8} {'p99':>8} "
+          f"{'suricata p50':>13} {'p95':>8} {'p99':>8} {'conns':>7}")
+    try:
+        for mode, pool_size in (('direct', 0), ('pooled', args.pool)):
+            connections = stats['connections']
+            latencies, elapsed, metrics = run(pool_size, args, socket_path, workdir)
+            print(
+                f"{mode:8} {len(latencies) / elapsed:8,.0f} {percentile(latencies, 50):9.2f}ms "
+                f"{percentile(latencies, 95):6.2f}ms {percentile(latencies, 99):6.2f}ms "
+                f"{metrics.get(f'command_latency_{mode}_p50_ms', 0):11.2f}ms "
+                f"{metrics.get(f'command_latency_{mode}_p95_ms', 0):6.2f}ms "
+                f"{metrics.get(f'command_latency_{mode}_p99_ms', 0):6.2f}ms "
+                f"{stats['connections'] - connections:7,}"
+            )
+    finally:
+        server.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+tools/bench_search.py
+검색 인덱스 벤치마크 - alert N개 / 룰 M개에서 인덱스 검색과 전체 훑기(이전 방식) 비교
+
+가상 alert를 alert_store(용량 N) + search_index.AlertSearch에 넣으면서 적재 속도를 재고,
+같은 질의를 인덱스와 전체 부분 문자열 검색으로 실행해 결과 개수가 같은지 확인하고 시간을 비교.
+룰은 ET Open 형식의 가상 룰 M개로 RuleSearch를 만들어 같은 방식으로 비교.
+
+사용법:
+    python tools/bench_search.py --alerts 1000000 --rules 40000
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+DEVICE1_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(DEVICE1_DIR))
+
+from alert_store import AlertStore  # noqa: E402
+from search_index import AlertSearch, RuleSearch, parse_network  # noqa: E402
+
+CATEGORIES = (
+    'Attempted Information Leak', 'Attempted Recon', 'Potentially Bad Traffic', 'Misc activity',
+    'Web Application Attack', 'Attempted Administrator Privilege Gain', 'Detection of a Network Scan',
+    'A Network Trojan was detected', 'Denial of Service', 'Generic Protocol Command Decode',
+)
+WORDS = (
+    'SCAN', 'WEB_SERVER', 'SQL', 'Injection', 'Attempt', 'EXPLOIT', 'MALWARE', 'Trojan', 'CnC',
+    'Beacon', 'POLICY', 'DNS', 'Query', 'TLS', 'Suspicious', 'User-Agent', 'Nmap', 'SSH',
+    'BruteForce', 'HTTP', 'Outbound', 'Inbound', 'Possible', 'Shellcode', 'XSS', 'Apache', 'Log4j',
+)
+ALERT_QUERIES = ('sql injection', 'nmap', 'trojan', '10.20.', '10.20.*', '10.20.0.0/16',
+                 '192.168.1.7', 'no-such-thing', 'recon')
+RULE_QUERIES = ('sql injection', 'log4j', 'classtype:trojan-activity', 'cve_2021', 'sid:2010000;', 'xss',
+                'no-such-thing')
+
+
+def make_signatures(rng, count):
+    return [f"ET {' '.join(rng.sample(WORDS, rng.randint(2, 5)))} {index}" for index in range(count)]
+
+
+def make_alerts(count, seed):
+    """가상 alert - 소수의 출발지가 대부분을 차지하고 목적지는 내부망"""
+    rng = random.Random(seed)
+    signatures = make_signatures(rng, 2000)
+    sources = [f'10.{rng.randrange(16, 32)}.{rng.randrange(256)}.{rng.randrange(1, 255)}' for _ in range(20000)]
+    sources += [f'{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}'
+                for _ in range(30000)]
+    targets = [f'192.168.{rng.randrange(4)}.{rng.randrange(1, 255)}' for _ in range(500)]
+    for index in range(count):
+        number = min(int(rng.paretovariate(1.2)) - 1, len(signatures) - 1)
+        yield {
+            'timestamp': f'2026-10-18T{index // 3600 % 24:02d}:{index // 60 % 60:02d}:{index % 60:02d}.000000+0000',
+            'src_ip': sources[min(int(rng.expovariate(1 / 3000)), len(sources) - 1)],
+            'dest_ip': rng.choice(targets),
+            'signature': signatures[number],
+            'category': CATEGORIES[number % len(CATEGORIES)],
+            'severity': rng.randint(1, 3),
+            'sid': 2000000 + number,
+        }
+
+
+def make_rules(count, seed):
+    """ET Open 형식 가상 룰 (api/main.py load_rules() 결과 형식)"""
+    rng = random.Random(seed)
+    rules = []
+    for index, signature in enumerate(make_signatures(rng, count)):
+        sid = 2000000 + index
+        classtype = rng.choice(('trojan-activity', 'web-application-attack', 'attempted-recon', 'policy-violation'))
+        cve = f' cve CVE_{rng.randrange(2010, 2025)}_{rng.randrange(10000, 99999)},' if rng.random() < 0.3 else ''
+        rule = (f'alert http $EXTERNAL_NET any -> $HOME_NET any (msg:"{signature}"; flow:established,to_server; '
+                f'content:"{rng.choice(WORDS).lower()}"; http_uri; classtype:{classtype}; sid:{sid}; rev:1; '
+                f'metadata:{cve} created_at {rng.randrange(2015, 2026)}_01_01;)')
+        rules.append({'sid': str(sid), 'action': 'alert', 'message': signature, 'category': classtype,
+                      'file': 'emerging-all.rules', 'rule': rule, 'timestamp': ''})
+    return rules
+
+
+def timed(function, repeat):
+    """함수를 repeat번 실행한 중앙값 (ms)과 마지막 결과"""
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def scan_alerts(store, query):
+    """이전 /api/logs/search - 최신순 전체 부분 문자열 검색"""
+    query_lower = query.lower()
+    results = [alert for alert in reversed(store)
+               if query_lower in alert['src_ip'].lower() or query_lower in alert['dest_ip'].lower()
+               or query_lower in alert['signature'].lower() or query_lower in alert['category'].lower()]
+    return len(results), results[:50]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='alert / 룰 검색 인덱스 벤치마크')
+    parser.add_argument('--alerts', type=int, default=1000000, help='alert 수 (저장소 용량)')
+    parser.add_argument('--rules', type=int, default=40000, help='룰 수')
+    parser.add_argument('--repeat', type=int, default=5, help='질의별 반복 횟수 (중앙값)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    alerts = list(make_alerts(args.alerts, args.seed))
+
+    store = AlertStore(args.alerts)
+    started = time.perf_counter()
+    for alert in alerts:
+        store.add(alert)
+    store_seconds = time.perf_counter() - started
+
+    indexed = AlertStore(args.alerts)
+    search = AlertSearch(indexed)
+    started = time.perf_counter()
+    for alert in alerts:
+        indexed.add(alert)
+    indexed_seconds = time.perf_counter() - started
+
+    print("=" * 78)
+    print(f"🔎 alert {args.alerts:,}개 검색 (서로 다른 값: {search.stats()})")
+    print("=" * 78)
+    print(f"ingest       저장소만 {args.alerts / store_seconds:>10,.0f}/s   "
+          f"검색 인덱스 포함 {args.alerts / indexed_seconds:>10,.0f}/s")
+    print(f"{'query':<22}{'matches':>10}{'scan ms':>12}{'index ms':>12}{'speedup':>10}")
+    for query in ALERT_QUERIES:
+        index_ms, (count, results) = timed(lambda: search.search(query), args.repeat)
+        if parse_network(query) or query.endswith('*'):
+            scan_ms, scan_count = None, None  # 이전 방식에는 없는 질의
+        else:
+            scan_ms, (scan_count, scan_results) = timed(lambda: scan_alerts(indexed, query), 1)
+            if scan_count != count or scan_results != results:
+                raise SystemExit(f"결과 불일치: {query!r} (인덱스 {count}, 전체 검색 {scan_count})")
+        scan_text = f"{scan_ms:>12,.1f}" if scan_ms is not None else f"{'-':>12}"
+        speedup = f"{scan_ms / max(index_ms, 1e-3):>9,.0f}x" if scan_ms is not None else f"{'-':>10}"
+        print(f"{query!r:<22}{count:>10,}{scan_text}{index_ms:>12,.2f}{speedup}")
+
+    rules = make_rules(args.rules, args.seed)
+    started = time.perf_counter()
+    rule_search = RuleSearch(rules)
+    build_seconds = time.perf_counter() - started
+
+    print("=" * 78)
+    print(f"📜 룰 {args.rules:,}개 검색 (인덱스 생성 {build_seconds:.2f}s, {rule_search.stats()})")
+    print("=" * 78)
+    print(f"{'query':<28}{'matches':>10}{'scan ms':>10}{'index ms':>12}{'speedup':>10}")
+    for query in RULE_QUERIES:
+        index_ms, found = timed(lambda: rule_search.search(query), args.repeat)
+        scan_ms, expected = timed(lambda: [r for r in rules if query.lower() in r['rule'].lower()], args.repeat)
+        if found != expected:
+            raise SystemExit(f"결과 불일치: {query!r} (인덱스 {len(found)}, 전체 검색 {len(expected)})")
+        print(f"{query!r:<28}{len(found):>10,}{scan_ms:>10,.1f}{index_ms:>12,.2f}"
+              f"{scan_ms / max(index_ms, 1e-3):>9,.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+tools/eve_socket_replay.py
+기록된 eve.json (또는 합성 이벤트)을 EVE 소켓으로 재생 - Suricata unix_stream 출력 대역
+
+Suricata와 같은 방식(클라이언트로 접속 후 줄 단위 기록)으로 동작하므로
+FLOW_EVE_SOURCE=socket 으로 실행한 flow_extractor를 Suricata 없이 테스트할 수 있음.
+
+사용법:
+    python tools/eve_socket_replay.py --eve /var/log/suricata/eve.json --rate 5000
+    python tools/eve_socket_replay.py --synthetic 100000 --socket /tmp/eve.sock
+"""
+
+import argparse
+import socket
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from eve_synth import synthetic_eve_lines  # noqa: E402
+
+CHUNK_LINES = 100  # 한 번에 sendall 할 줄 수
+
+
+def connect(path, timeout):
+    """리스너가 뜰 때까지 재시도하며 접속"""
+    deadline = time.monotonic() + timeout
+    while True:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+            return sock
+        except (FileNotFoundError, ConnectionRefusedError):
+            sock.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+
+
+def replay(sock, lines, rate=0.0):
+    """
+    줄들을 소켓으로 전송
+
+    Args:
+        rate (float): 초당 줄 수 (0이면 최대 속도)
+
+    반환:
+        (전송 줄 수, 소요 시간)
+    """
+    started = time.perf_counter()
+    sent = 0
+    chunk = []
+    for line in lines:
+        if isinstance(line, str):
+            line = line.encode()
+        if not line.endswith(b'\n'):
+            line += b'\n'
+        chunk.append(line)
+        if len(chunk) < CHUNK_LINES:
+            continue
+
+        sock.sendall(b''.join(chunk))
+        sent += len(chunk)
+        chunk = []
+        if rate > 0:
+            # 목표 속도보다 앞서 있으면 대기
+            ahead = sent / rate - (time.perf_counter() - started)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    if chunk:
+        sock.sendall(b''.join(chunk))
+        sent += len(chunk)
+    return sent, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description='eve.json → EVE unix 소켓 재생')
+    parser.add_argument('--socket', default='/var/run/suricata/eve.sock', help='flow_extractor EVE 소켓 경로')
+    parser.add_argument('--eve', help='재생할 eve.json 경로')
+    parser.add_argument('--synthetic', type=int, default=100000, help='--eve가 없을 때 생성할 합성 줄 수')
+    parser.add_argument('--rate', type=float, default=0.0, help='초당 줄 수 (0이면 최대 속도)')
+    parser.add_argument('--loop', type=int, default=1, help='반복 횟수')
+    parser.add_argument('--wait', type=float, default=30.0, help='소켓 접속 대기 시간 (초)')
+    args = parser.parse_args()
+
+    sock = connect(args.socket, args.wait)
+    print(f"🔗 접속: {args.socket}")
+
+    total = 0
+    elapsed = 0.0
+    try:
+        for _ in range(args.loop):
+            if args.eve:
+                with open(args.eve, 'rb') as f:
+                    sent, seconds = replay(sock, (line for line in f if line.strip()), args.rate)
+            else:
+                sent, seconds = replay(sock, synthetic_eve_lines(args.synthetic), args.rate)
+            total += sent
+            elapsed += seconds
+    finally:
+        sock.close()
+
+    print(f"✅ {total:,}줄 전송 ({elapsed:.2f}초, {total / max(elapsed, 1e-9):,.0f} 줄/초)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+tools/eve_synth.py
+벤치마크/재생용 합성 eve.json 생성기
+
+실제 센서와 비슷한 이벤트 비율 (dns/http/tls 위주, flow 약 20%, alert 소수)
+
+사용법:
+    python tools/eve_synth.py --lines 100000 --output /tmp/eve.json
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+# (event_type, 비율)
+EVENT_MIX = [
+    ('dns', 0.38),
+    ('http', 0.14),
+    ('tls', 0.14),
+    ('flow', 0.22),
+    ('fileinfo', 0.05),
+    ('alert', 0.02),
+    ('anomaly', 0.04),
+    ('stats', 0.01),
+]
+
+SIGNATURES = [
+    (2001219, 'ET SCAN Potential SSH Scan', 'Attempted Information Leak', 2),
+    (2010935, 'ET SCAN Suspicious inbound to MSSQL port 1433', 'Potentially Bad Traffic', 2),
+    (2024897, 'ET USER_AGENTS Go HTTP Client User-Agent', 'Misc activity', 3),
+    (2100498, 'GPL ATTACK_RESPONSE id check returned root', 'Potentially Bad Traffic', 1),
+    (2019401, 'ET POLICY Vulnerable Java Version 1.8.x Detected', 'Potential Corporate Privacy Violation', 3),
+]
+
+
+def _ip(rng, internal):
+    if internal:
+        return f"192.168.0.{rng.randint(2, 254)}"
+    return f"{rng.randint(11, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}"
+
+
+def make_event(rng, event_type, ts, flow_id, attacker=None):
+    """event_type 하나에 해당하는 eve 레코드(dict) 생성"""
+    src_ip = attacker or _ip(rng, internal=False)
+    event = {
+        'timestamp': ts.strftime('%Y-%m-%dT%H:%M:%S.%f') + '+0000',
+        'flow_id': flow_id,
+        'in_iface': 'eth0',
+        'event_type': event_type,
+        'src_ip': src_ip,
+        'src_port': rng.randint(1024, 65535),
+        'dest_ip': _ip(rng, internal=True),
+        'dest_port': rng.choice([22, 53, 80, 443, 1433, 3389, 8080]),
+        'proto': rng.choice(['TCP', 'TCP', 'TCP', 'UDP']),
+    }
+
+    if event_type == 'dns':
+        event['dns'] = {
+            'type': 'query', 'id': rng.randint(1, 65535),
+            'rrname': f"host{rng.randint(1, 9999)}.example.com", 'rrtype': 'A', 'tx_id': 0,
+        }
+    elif event_type == 'http':
+        event['http'] = {
+            'hostname': f"site{rng.randint(1, 500)}.example.org", 'url': f"/path/{rng.randint(1, 10 ** 6)}",
+            'http_user_agent': 'Mozilla/5.0 (X11; Linux x86_64)', 'http_content_type': 'text/html',
+            'http_method': 'GET', 'protocol': 'HTTP/1.1', 'status': 200, 'length': rng.randint(100, 50000),
+        }
+    elif event_type == 'tls':
+        event['tls'] = {
+            'subject': 'CN=*.example.net', 'issuerdn': "C=US, O=Let's Encrypt, CN=R3",
+            'serial': '04:A1:7F:00:12', 'fingerprint': 'ab:cd:ef:01:23:45:67:89',
+            'sni': f"api{rng.randint(1, 99)}.example.net", 'version': 'TLS 1.3',
+            'notbefore': '2025-01-01T00:00:00', 'notafter': '2025-04-01T00:00:00',
+        }
+    elif event_type == 'flow':
+        age = rng.choice([0, 1, 3, 6, 12, 30, 120])
+        pkts_ts = rng.randint(1, 2000)
+        pkts_tc = rng.randint(0, 2000)
+        event['app_proto'] = rng.choice(['http', 'tls', 'dns', 'failed'])
+        event['flow'] = {
+            'pkts_toserver': pkts_ts, 'pkts_toclient': pkts_tc,
+            'bytes_toserver': pkts_ts * rng.randint(60, 1400), 'bytes_toclient': pkts_tc * rng.randint(60, 1400),
+            'start': event['timestamp'], 'end': event['timestamp'], 'age': age,
+            'state': rng.choice(['new', 'established', 'closed', 'closed']),
+            'reason': 'timeout', 'alerted': False,
+        }
+        event['tcp'] = {'tcp_flags': '1b', 'syn': True, 'fin': True, 'psh': True, 'ack': True, 'state': 'closed'}
+    elif event_type == 'fileinfo':
+        event['fileinfo'] = {
+            'filename': f"/download/{rng.randint(1, 999)}.bin", 'gaps': False, 'state': 'CLOSED',
+            'stored': False, 'size': rng.randint(100, 10 ** 6), 'tx_id': 0,
+        }
+    elif event_type == 'alert':
+        sid, signature, category, severity = rng.choice(SIGNATURES)
+        event['alert'] = {
+            'action': 'allowed', 'gid': 1, 'signature_id': sid, 'rev': 3,
+            'signature': signature, 'category': category, 'severity': severity,
+        }
+    elif event_type == 'anomaly':
+        event['anomaly'] = {'type': 'stream', 'event': 'stream.pkt_invalid_timestamp'}
+    elif event_type == 'stats':
+        event = {
+            'timestamp': event['timestamp'], 'event_type': 'stats',
+            'stats': {
+                'uptime': rng.randint(1, 10 ** 6),
+                'capture': {'kernel_packets': rng.randint(1, 10 ** 9), 'kernel_drops': rng.randint(0, 1000)},
+                'decoder': {k: rng.randint(0, 10 ** 8) for k in (
+                    'pkts', 'bytes', 'ipv4', 'ipv6', 'ethernet', 'tcp', 'udp', 'icmpv4', 'vlan', 'avg_pkt_size'
+                )},
+                'flow': {k: rng.randint(0, 10 ** 6) for k in ('memcap', 'tcp', 'udp', 'icmpv4', 'spare')},
+                'app_layer': {'flow': {k: rng.randint(0, 10 ** 6) for k in ('http', 'tls', 'dns_udp', 'smb')}},
+            },
+        }
+    return event
+
+
+def synthetic_eve_lines(count, seed=42, start=None, rate=1000.0, attackers=()):
+    """
+    합성 eve.json 줄(str, 줄바꿈 포함) generator
+
+    Args:
+        count (int): 생성할 줄 수
+        seed (int): 난수 seed (재현 가능)
+        start (datetime): 첫 이벤트 시각 (기본: 현재 UTC)
+        rate (float): 초당 이벤트 수 (타임스탬프 간격 계산용)
+        attackers (iterable): 주어지면 flow/alert 이벤트의 일부를 이 IP들에서 발생시킴
+    """
+    rng = random.Random(seed)
+    types, weights = zip(*EVENT_MIX)
+    ts = start or datetime.now(timezone.utc)
+    step = timedelta(seconds=1.0 / rate)
+    attackers = list(attackers)
+
+    for i in range(count):
+        event_type = rng.choices(types, weights)[0]
+        attacker = None
+        if attackers and event_type in ('flow', 'alert') and rng.random() < 0.3:
+            attacker = rng.choice(attackers)
+        yield json.dumps(make_event(rng, event_type, ts, 10 ** 15 + i, attacker), separators=(',', ':')) + '\n'
+        ts += step
+
+
+def main():
+    parser = argparse.ArgumentParser(description='합성 eve.json 생성')
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='synthetic_eve.json')
+    args = parser.parse_args()
+
+    with open(args.output, 'w') as f:
+        f.writelines(synthetic_eve_lines(args.lines, seed=args.seed))
+    print(f"✅ {args.lines:,}줄 생성: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+command_framing.py
+relay / rule_command_client / 장치 2 rule_channel 공용 명령 프레이밍 (줄 단위 JSON, NDJSON)
+(device1/, device2/에 같은 파일로 유지)
+
+    요청:  {"id": 1, "command": "rule-add", ...}\n
+    응답:  {"id": 1, "return": "OK", ...}\n
+
+- 메시지 하나 = JSON 객체 한 줄 (최대 MAX_FRAME_SIZE), 규칙 길이와 무관하게 잘리지 않음
+- "id"가 있는 요청: 연결을 유지하고 여러 요청을 이어 보낼 수 있음 (파이프라이닝).
+  응답은 처리가 끝난 순서대로 오며 같은 "id"로 짝을 맞춤
+- "id"가 없는 요청: 기존 방식 - 개행 없이 JSON 하나를 보내도 되고, 응답 후 서버가 연결을 닫음
+"""
+
+import itertools
+import json
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+MAX_FRAME_SIZE = 1024 * 1024  # 메시지 1건 최대 크기
+RECV_SIZE = 65536
+
+
+class FrameError(ValueError):
+    """잘못된 프레임 (JSON 오류 / 크기 초과)"""
+
+
+def encode_frame(message):
+    """dict → 한 줄 JSON (bytes)"""
+    return json.dumps(message, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+def reply(request, response):
+    """요청의 id를 응답에 붙임 (id 없는 기존 방식 요청은 그대로)"""
+    if isinstance(request, dict) and 'id' in request:
+        return {**response, 'id': request['id']}
+    return response
+
+
+def is_pipelined(request):
+    """id가 있으면 연결 유지 (파이프라이닝) 요청"""
+    return isinstance(request, dict) and 'id' in request
+
+
+class FrameDecoder:
+    """
+    수신 바이트 → 메시지 dict 리스트
+
+    개행으로 끝나지 않은 버퍼도 완전한 JSON 객체면 메시지로 처리 (개행 없이 보내는 기존 클라이언트)
+    """
+
+    def __init__(self, max_size=MAX_FRAME_SIZE):
+        self.max_size = max_size
+        self.buffer = bytearray()
+
+    @property
+    def partial(self):
+        """처리되지 않은 데이터가 남아 있는지"""
+        return bool(self.buffer.strip())
+
+    def feed(self, data):
+        """
+        Raises:
+            FrameError: 크기 초과 (연결을 닫아야 함)
+
+        반환:
+            list: 메시지 dict 또는 잘못된 줄이면 FrameError 인스턴스 (해당 줄만 버리고 계속 진행 가능)
+        """
+        self.buffer += data
+        frames = []
+        while True:
+            end = self.buffer.find(b'\n')
+            if end < 0:
+                break
+            line = bytes(self.buffer[:end])
+            del self.buffer[:end + 1]
+            if line.strip():
+                frames.append(self._parse(line))
+
+        if len(self.buffer) > self.max_size:
+            raise FrameError(f"메시지 크기 초과 ({self.max_size} 바이트)")
+
+        if self.buffer.rstrip().endswith(b'}'):
+            try:
+                message = json.loads(self.buffer)
+            except ValueError:
+                pass
+            else:
+                if isinstance(message, dict):
+                    frames.append(message)
+                    self.buffer.clear()
+        return frames
+
+    def _parse(self, line):
+        if len(line) > self.max_size:
+            return FrameError(f"메시지 크기 초과 ({self.max_size} 바이트)")
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            return FrameError(f"JSON 파싱 오류: {e}")
+        if not isinstance(message, dict):
+            return FrameError("JSON 객체가 아님")
+        return message
+
+
+class FramedClient:
+    """
+    프레이밍 프로토콜 클라이언트 (스레드 안전, 연결 하나에서 여러 요청을 동시에 진행)
+
+    요청마다 id를 붙여 보내고 수신 스레드가 응답을 id로 찾아 돌려줌.
+    연결이 끊기면 다음 요청에서 다시 연결하며, 서버가 유휴 연결을 먼저 닫지 않도록
+    idle_timeout 동안 쓰지 않은 연결은 새로 연결.
+
+    Args:
+        host (str), port (int): 서버 주소
+        timeout (float): 응답 대기 시간 (초)
+        idle_timeout (float): 이 시간 이상 쉰 연결은 닫고 새로 연결 (초)
+    """
+
+    def __init__(self, host, port, timeout=5.0, idle_timeout=30.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending = {}  # id → (소켓, Future)
+        self._sock = None
+        self._last_used = 0.0
+
+    def request(self, message, timeout=None):
+        """
+        요청 하나 전송 후 응답 대기
+
+        반환:
+            dict: 응답 (id 제외)
+
+        Raises:
+            OSError: 연결/전송 실패, 응답 전 연결 종료
+            TimeoutError: 응답 대기 시간 초과
+        """
+        future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            sock = self._connect()
+            self._pending[request_id] = (sock, future)
+            try:
+                sock.sendall(encode_frame({**message, 'id': request_id}))
+            except OSError:
+                self._pending.pop(request_id, None)
+                self._close(sock)
+                raise
+            self._last_used = time.monotonic()
+
+        try:
+            response = future.result(timeout or self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise TimeoutError(f"응답 대기 시간 초과 ({self.host}:{self.port})") from None
+        response.pop('id', None)
+        return response
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._close(self._sock)
+
+    def _connect(self):
+        """현재 연결 반환 (없거나 오래 쉬었으면 새로 연결) - _lock 안에서 호출"""
+        if self._sock is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            if not any(owner is self._sock for owner, _ in self._pending.values()):
+                self._close(self._sock)
+        if self._sock is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.settimeout(None)
+            self._sock = sock
+            threading.Thread(
+                target=self._read_loop, args=(sock,), name=f'framed-{self.host}:{self.port}', daemon=True
+            ).start()
+        return self._sock
+
+    def _close(self, sock):
+        """연결 닫고 그 연결에서 대기 중인 요청 실패 처리 - _lock 안에서 호출"""
+        if self._sock is sock:
+            self._sock = None
+        try:
+            sock.close()
+        except OSError:
+            pass
+        for request_id, (owner, future) in list(self._pending.items()):
+            if owner is sock:
+                del self._pending[request_id]
+                future.set_exception(ConnectionError(f"응답 전 연결 종료 ({self.host}:{self.port})"))
+
+    def _read_loop(self, sock):
+        decoder = FrameDecoder()
+        try:
+            while True:
+                data = sock.recv(RECV_SIZE)
+                if not data:
+                    break
+                for frame in decoder.feed(data):
+                    if isinstance(frame, FrameError):
+                        logging.error(f"잘못된 응답 ({self.host}:{self.port}): {frame}")
+                        continue
+                    with self._lock:
+                        entry = self._pending.pop(frame.get('id'), None)
+                    if entry:
+                        entry[1].set_result(frame)
+        except (OSError, FrameError):
+            pass
+        finally:
+            with self._lock:
+                self._close(sock)
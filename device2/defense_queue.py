@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+defense_queue.py
+악성 Flow 방어 작업 큐 (룰 생성 / 장치 1 적용을 HTTP 요청 밖에서 처리)
+
+/receive-flows 요청 안에서 Ollama 룰 생성(최대 30초)과 룰 적용 ack 대기(최대 60초)를
+하면 장치 1의 전송 제한 시간(2초)을 넘겨 배치가 실패로 처리되고 스풀 재전송 때마다
+같은 룰이 다시 만들어짐. 요청은 예측 결과만 바로 돌려주고 방어 작업은 여기로 넘김:
+
+- 워커 스레드 N개가 우선순위 순(Suricata 경보 심각도가 높은 Flow 먼저)으로 처리
+- 같은 키(출발지 IP)는 대기/처리 중이거나 성공 후 dedupe_ttl 안이면 다시 넣지 않음
+  (실패하면 바로 다시 받을 수 있음)
+- 큐가 가득 차면 거부 (요청은 기다리지 않음)
+"""
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+QUEUED = 'queued'
+DUPLICATE = 'duplicate'
+FULL = 'full'
+
+
+class DefenseQueue:
+    """
+    키 중복 제거 우선순위 작업 큐
+
+    Args:
+        handler (callable): handler(item) → 성공 여부 (워커 스레드에서 호출)
+        workers (int): 워커 스레드 수
+        maxsize (int): 대기 가능한 작업 수
+        dedupe_ttl (float): 성공한 키를 다시 받지 않는 시간 (초)
+    """
+
+    def __init__(self, handler, workers=2, maxsize=1000, dedupe_ttl=600.0):
+        self.handler = handler
+        self.dedupe_ttl = dedupe_ttl
+        self.counts = {QUEUED: 0, DUPLICATE: 0, FULL: 0, 'succeeded': 0, 'failed': 0}
+
+        self._queue = queue.PriorityQueue(maxsize)
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._active = set()  # 대기/처리 중인 키
+        self._done = OrderedDict()  # 성공한 키 → 만료 시각 (넣은 순서 = 만료 순서)
+        self._threads = [
+            threading.Thread(target=self._run, name=f'defense-{i}', daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def submit(self, key, item, priority=0):
+        """
+        작업 하나 추가 (기다리지 않음)
+
+        반환:
+            str: QUEUED / DUPLICATE (같은 키가 처리 중이거나 최근 성공) / FULL
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._done and next(iter(self._done.values())) <= now:
+                self._done.popitem(last=False)
+            if key in self._active or key in self._done:
+                self.counts[DUPLICATE] += 1
+                return DUPLICATE
+            try:
+                self._queue.put_nowait((priority, next(self._order), key, item))
+            except queue.Full:
+                self.counts[FULL] += 1
+                return FULL
+            self._active.add(key)
+            self.counts[QUEUED] += 1
+        return QUEUED
+
+    def _run(self):
+        while True:
+            _, _, key, item = self._queue.get()
+            try:
+                success = bool(self.handler(item))
+            except Exception as e:
+                logging.error(f"방어 작업 오류 ({key}): {e}")
+                success = False
+            with self._lock:
+                self._active.discard(key)
+                if success:
+                    self._done[key] = time.monotonic() + self.dedupe_ttl
+                    self._done.move_to_end(key)
+                self.counts['succeeded' if success else 'failed'] += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self.counts, 'pending': self.pending, 'active': len(self._active)}
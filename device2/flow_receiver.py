@@ -10,9 +10,18 @@ import joblib
 import requests
 import json
 import logging
+import os
+import time
 import numpy as np
+from collections import OrderedDict
 from threading import Lock
 
+from defense_queue import QUEUED, DefenseQueue
+from flow_wire import (
+    BATCH_ID_HEADER, CONTENT_TYPE as WIRE_CONTENT_TYPE, UnsupportedVersion, WireError, decode_flows
+)
+from rule_channel import RuleChannel
+
 app = Flask(__name__)
 
 # 로깅 설정
@@ -25,15 +34,38 @@ logging.basicConfig(
     ]
 )
 
-# 설정
-DEVICE1_RULE_CLIENT = 'http://192.168.0.42:10002'
-OLLAMA_URL = 'http://localhost:11434/api/generate'
-OLLAMA_MODEL = 'qwen2.5:7b'
+# 설정 (환경 변수로 변경 가능)
+DEVICE1_RULE_HOST = os.environ.get('DEVICE1_RULE_HOST', '192.168.0.42')
+DEVICE1_RULE_PORT = int(os.environ.get('DEVICE1_RULE_PORT', 10002))
+DEVICE1_RULE_CLIENT = f'{DEVICE1_RULE_HOST}:{DEVICE1_RULE_PORT}'
+OLLAMA_URL = os.environ.get('OLLAMA_URL', 'http://localhost:11434/api/generate')
+OLLAMA_MODEL = os.environ.get('OLLAMA_MODEL', 'qwen2.5:7b')
+RECEIVER_PORT = int(os.environ.get('FLOW_RECEIVER_PORT', 5001))
+RULE_ACK_TIMEOUT = float(os.environ.get('RULE_CHANNEL_ACK_TIMEOUT', 60))  # 룰 적용 응답 대기 (초, 재로드 포함)
+RULE_HEARTBEAT = float(os.environ.get('RULE_CHANNEL_HEARTBEAT', 20))  # 유휴 연결 PING 주기 (초)
+
+# 차단 방식: 'rule' (Ollama로 공격마다 drop 룰 생성) / 'dataset' (장치 1 차단 데이터셋에 출발지 IP 추가, 재로드 없음)
+BLOCK_MODE = os.environ.get('FLOW_BLOCK_MODE', 'rule')
+
+# 악성 Flow 방어 작업 (룰 생성/적용은 요청 밖 워커에서, 같은 출발지 IP는 한 번만)
+DEFENSE_WORKERS = int(os.environ.get('FLOW_DEFENSE_WORKERS', 2))  # 방어 워커 스레드 수
+DEFENSE_QUEUE_SIZE = int(os.environ.get('FLOW_DEFENSE_QUEUE_SIZE', 1000))  # 대기 가능한 방어 작업 수
+DEFENSE_DEDUPE_TTL = float(os.environ.get('FLOW_DEFENSE_DEDUPE_TTL', 600))  # 차단 성공한 IP를 다시 처리하지 않는 시간 (초)
+
+# 최근 처리한 배치 ID 수 (장치 1 스풀 재전송 중복 제거, 배치별 판정 결과를 그대로 재응답)
+SEEN_BATCHES = int(os.environ.get('FLOW_SEEN_BATCHES', 1024))
+
+# 장치 1이 붙여 보낸 Suricata 경보 심각도가 이 값 이하(1: 가장 높음)면 ML 추론 생략
+ALERT_TRUST_SEVERITY = 1
 
 # 전역 변수
 current_sid = 900000001
 sid_lock = Lock()
 
+# 배치 ID → 판정 결과 (LRU)
+seen_batches = OrderedDict()
+seen_lock = Lock()
+
 # ML 모델 로드
 try:
     model = joblib.load('models/random_forest_model.joblib')
@@ -50,6 +82,12 @@ except Exception as e:
     model = None
 
 
+# 장치 1 rule_command_client로 가는 영구 연결 (요청 파이프라이닝, 끊기면 재연결 후 미확인 요청 재전송)
+rule_channel = RuleChannel(
+    DEVICE1_RULE_HOST, DEVICE1_RULE_PORT, ack_timeout=RULE_ACK_TIMEOUT, heartbeat=RULE_HEARTBEAT
+)
+
+
 def get_next_sid():
     """Thread-safe SID 생성"""
     global current_sid
@@ -114,48 +152,61 @@ def predict_attack(flow_data):
     반환:
         dict: 예측 결과
     """
+    return predict_attacks([flow_data])[0]
+
+
+def predict_attacks(flows):
+    """
+    ML 모델로 여러 Flow를 한 번에 예측 (스케일링/예측을 배치 단위로 1회 수행)
+    
+    Args:
+        flows (list): Flow 데이터 리스트
+    
+    반환:
+        list: Flow 순서와 동일한 예측 결과 리스트
+    """
     if model is None:
-        return {
+        return [{
             'is_malicious': False,
             'attack_type': 'UNKNOWN',
             'confidence': 0.0,
             'error': 'Model not loaded'
-        }
+        } for _ in flows]
+    
+    if not flows:
+        return []
     
     try:
         # Feature 변환
-        features = convert_to_77_features(flow_data)
+        X = np.array([convert_to_77_features(f) for f in flows], dtype=float)
         
         # Infinity/NaN 처리
-        features = [0.0 if (np.isnan(f) or np.isinf(f)) else f for f in features]
+        X[~np.isfinite(X)] = 0.0
         
         # 스케일링
-        X_scaled = scaler.transform([features])
+        X_scaled = scaler.transform(X)
         
         # 예측
-        prediction = model.predict(X_scaled)[0]
-        predicted_label = le.inverse_transform([prediction])[0]
+        predictions = model.predict(X_scaled)
+        predicted_labels = le.inverse_transform(predictions)
         
         # 신뢰도
-        probabilities = model.predict_proba(X_scaled)[0]
-        confidence = probabilities.max()
+        confidences = model.predict_proba(X_scaled).max(axis=1)
         
-        is_malicious = (predicted_label != 'BENIGN')
-        
-        return {
-            'is_malicious': is_malicious,
-            'attack_type': predicted_label,
+        return [{
+            'is_malicious': (label != 'BENIGN'),
+            'attack_type': label,
             'confidence': float(confidence)
-        }
+        } for label, confidence in zip(predicted_labels, confidences)]
     
     except Exception as e:
         logging.error(f"예측 오류: {e}")
-        return {
+        return [{
             'is_malicious': False,
             'attack_type': 'ERROR',
             'confidence': 0.0,
             'error': str(e)
-        }
+        } for _ in flows]
 
 
 def generate_suricata_rule(attack_type, flow_data):
@@ -225,9 +276,9 @@ Rule:"""
                     # 백틱 제거
                     line = line.replace('```', '').strip()
                     
-                    # 세미콜론으로 끝나는지 확인
-                    if not line.endswith(';'):
-                        line += ';'
+                    # 옵션이 닫히지 않았으면 닫기 (형식 검증은 장치 1 rule_validator에서)
+                    if '(' in line and not line.endswith(')'):
+                        line = line.rstrip(';') + ';)'
                     
                     return line, sid
             
@@ -245,6 +296,16 @@ Rule:"""
         return None, sid
 
 
+def send_to_device1(message):
+    """
+    장치 1 rule_command_client로 명령 1건 전송 (룰 채널, 응답까지 대기)
+    
+    반환:
+        dict: 응답
+    """
+    return rule_channel.request(message)
+
+
 def apply_rule_to_device1(rule, sid):
     """
     생성된 룰을 장치 1에 적용
@@ -257,26 +318,16 @@ def apply_rule_to_device1(rule, sid):
         bool: 성공 여부
     """
     try:
-        response = requests.post(
-            DEVICE1_RULE_CLIENT,
-            json={
-                "type": "ADD_RULE",
-                "rule": rule,
-                "sid": sid
-            },
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('return') == 'OK':
-                logging.info(f"✅ 룰 적용 완료: SID {sid}")
-                return True
-            else:
-                logging.error(f"❌ 룰 적용 실패: {result.get('message')}")
-                return False
+        result = send_to_device1({
+            "type": "ADD_RULE",
+            "rule": rule,
+            "sid": sid
+        })
+        if result.get('return') == 'OK':
+            logging.info(f"✅ 룰 적용 완료: SID {sid}")
+            return True
         else:
-            logging.error(f"❌ 장치 1 응답 오류: {response.status_code}")
+            logging.error(f"❌ 룰 적용 실패: {result.get('message')}")
             return False
     
     except Exception as e:
@@ -284,17 +335,187 @@ def apply_rule_to_device1(rule, sid):
         return False
 
 
+def block_ip_on_device1(ip):
+    """
+    장치 1 차단 데이터셋에 IP 추가 (룰 생성/재로드 없음)
+    
+    반환:
+        bool: 성공 여부
+    """
+    try:
+        result = send_to_device1({"type": "BLOCK_IP", "ip": ip})
+        if result.get('return') == 'OK':
+            logging.info(f"✅ IP 차단 완료: {ip}")
+            return True
+        else:
+            logging.error(f"❌ IP 차단 실패: {result.get('message')}")
+            return False
+    
+    except Exception as e:
+        logging.error(f"❌ IP 차단 오류: {e}")
+        return False
+
+
 @app.route('/health', methods=['GET'])
 def health():
     """헬스 체크"""
     return jsonify({
         'status': 'healthy',
         'service': 'flow_receiver',
-        'port': 5001,
-        'model_loaded': model is not None
+        'port': RECEIVER_PORT,
+        'model_loaded': model is not None,
+        'rule_channel': {
+            'connected': rule_channel.connected,
+            'pending': rule_channel.pending,
+            'resent': rule_channel.resent
+        },
+        'defense': defense_queue.stats(),
+        'seen_batches': len(seen_batches)
     })
 
 
+def alert_severity(flow_data):
+    """Flow에 붙은 Suricata 경보 중 가장 높은 심각도 (경보가 없으면 None)"""
+    severities = [
+        alert.get('severity') for alert in flow_data.get('alerts') or ()
+        if isinstance(alert, dict) and isinstance(alert.get('severity'), int)
+    ]
+    return min(severities) if severities else None
+
+
+def predict_flows(flows):
+    """
+    경보 정보를 고려한 배치 예측
+    
+    심각도가 높은 Suricata 경보가 붙은 Flow는 ML 추론 없이 악성으로 판정하고,
+    나머지만 predict_attacks로 한 번에 예측
+    
+    반환:
+        list: Flow 순서와 동일한 예측 결과 리스트
+    """
+    predictions = [None] * len(flows)
+    pending = []
+    
+    for i, flow_data in enumerate(flows):
+        severity = alert_severity(flow_data)
+        if severity is not None and severity <= ALERT_TRUST_SEVERITY:
+            alert = flow_data['alerts'][0]
+            predictions[i] = {
+                'is_malicious': True,
+                'attack_type': alert.get('category') or alert.get('signature') or 'Suricata Alert',
+                'confidence': 1.0,
+                'source': 'suricata_alert',
+                'sid': alert.get('sid')
+            }
+        else:
+            pending.append(i)
+    
+    classify_ms = 0.0
+    if pending:
+        started = time.perf_counter()
+        for i, prediction in zip(pending, predict_attacks([flows[i] for i in pending])):
+            predictions[i] = prediction
+        classify_ms = (time.perf_counter() - started) * 1000
+    
+    # 단계별 소요 시간 (배치 예측은 배치 전체 시간이 각 Flow의 대기 시간)
+    predicted = set(pending)
+    for i, prediction in enumerate(predictions):
+        prediction['classify_ms'] = classify_ms if i in predicted else 0.0
+    
+    return predictions
+
+
+def defend(task):
+    """
+    방어 작업 1건: 룰 생성 → 장치 1 적용 (데이터셋 모드는 IP 추가) - 방어 워커 스레드에서 실행
+    
+    Args:
+        task (tuple): (Flow 데이터, 예측 결과)
+    
+    반환:
+        bool: 적용 성공 여부
+    """
+    flow_data, prediction = task
+    src_ip = flow_data.get('src_ip', 'unknown')
+    attack_type = prediction['attack_type']
+    
+    if BLOCK_MODE == 'dataset':
+        # 2-3. 룰 생성 없이 출발지 IP를 차단 데이터셋에 추가
+        started = time.perf_counter()
+        success = block_ip_on_device1(src_ip)
+        logging.info(f"⏱️ 차단 {src_ip}: apply {(time.perf_counter() - started) * 1000:.0f}ms")
+        return success
+    
+    # 2. Ollama 룰 생성
+    logging.info(f"📝 Suricata 룰 생성 중... ({src_ip})")
+    started = time.perf_counter()
+    rule, sid = generate_suricata_rule(attack_type, flow_data)
+    generate_ms = (time.perf_counter() - started) * 1000
+    
+    if not rule:
+        logging.error(f"❌ 룰 생성 실패 ({src_ip})")
+        return False
+    
+    logging.info(f"✓ 룰 생성 완료: {rule[:80]}...")
+    
+    # 3. 장치 1에 적용
+    started = time.perf_counter()
+    success = apply_rule_to_device1(rule, sid)
+    logging.info(f"⏱️ SID {sid}: generate {generate_ms:.0f}ms, apply {(time.perf_counter() - started) * 1000:.0f}ms")
+    return success
+
+
+# 방어 작업 큐 (defend를 워커 스레드에서 실행)
+defense_queue = DefenseQueue(
+    defend, workers=DEFENSE_WORKERS, maxsize=DEFENSE_QUEUE_SIZE, dedupe_ttl=DEFENSE_DEDUPE_TTL
+)
+
+
+def handle_prediction(flow_data, prediction):
+    """
+    예측 결과로 판정 응답 dict 생성 (악성이면 방어 작업을 큐에 넣고 기다리지 않음)
+    
+    Args:
+        flow_data (dict): Flow 데이터
+        prediction (dict): predict_attack 결과
+    
+    반환:
+        dict: Flow 1개에 대한 판정 결과
+    """
+    timings = {'classify_ms': prediction.get('classify_ms', 0.0)}
+    
+    if not prediction['is_malicious']:
+        # 정상 트래픽
+        return {
+            'is_malicious': False,
+            'attack_type': 'BENIGN',
+            'timings': timings
+        }
+    
+    src_ip = flow_data.get('src_ip', 'unknown')
+    dest_ip = flow_data.get('dest_ip', 'unknown')
+    attack_type = prediction['attack_type']
+    confidence = prediction['confidence']
+    
+    # 경보 심각도가 높은 Flow부터 처리, 같은 출발지 IP는 한 번만
+    severity = alert_severity(flow_data)
+    defense = defense_queue.submit(src_ip, (flow_data, prediction), priority=severity or 9)
+    
+    if defense == QUEUED:
+        logging.warning(
+            f"🚨 악성 탐지! {attack_type} (신뢰도: {confidence:.2%}) "
+            f"- {src_ip} → {dest_ip}"
+        )
+    
+    return {
+        'is_malicious': True,
+        'attack_type': attack_type,
+        'confidence': confidence,
+        'defense': defense,
+        'timings': timings
+    }
+
+
 @app.route('/receive-flow', methods=['POST'])
 def receive_flow():
     """
@@ -308,68 +529,80 @@ def receive_flow():
     if not flow_data:
         return jsonify({'error': 'No data'}), 400
     
-    src_ip = flow_data.get('src_ip', 'unknown')
-    dest_ip = flow_data.get('dest_ip', 'unknown')
+    # 1. ML 예측 (심각도 높은 경보가 붙어 있으면 생략)
+    prediction = predict_flows([flow_data])[0]
     
-    # 1. ML 예측
-    prediction = predict_attack(flow_data)
+    return jsonify(handle_prediction(flow_data, prediction))
+
+
+@app.route('/receive-flows', methods=['POST'])
+def receive_flows():
+    """
+    장치 1로부터 Flow 배치 수신 및 처리
     
-    if prediction['is_malicious']:
-        attack_type = prediction['attack_type']
-        confidence = prediction['confidence']
-        
-        logging.warning(
-            f"🚨 악성 탐지! {attack_type} (신뢰도: {confidence:.2%}) "
-            f"- {src_ip} → {dest_ip}"
-        )
-        
-        # 2. Ollama 룰 생성
-        logging.info(f"📝 Suricata 룰 생성 중...")
-        rule, sid = generate_suricata_rule(attack_type, flow_data)
-        
-        if rule:
-            logging.info(f"✓ 룰 생성 완료: {rule[:80]}...")
-            
-            # 3. 장치 1에 적용
-            success = apply_rule_to_device1(rule, sid)
-            
-            return jsonify({
-                'is_malicious': True,
-                'attack_type': attack_type,
-                'confidence': confidence,
-                'rule_generated': True,
-                'rule': rule,
-                'sid': sid,
-                'rule_applied': success
-            })
-        else:
-            logging.error(f"❌ 룰 생성 실패")
-            return jsonify({
-                'is_malicious': True,
-                'attack_type': attack_type,
-                'confidence': confidence,
-                'rule_generated': False,
-                'error': 'Rule generation failed'
-            })
+    POST /receive-flows
+    Body: {"flows": [Flow 데이터, ...]}
+          또는 Content-Type: application/x-flow-batch (flow_wire 바이너리 포맷)
+    반환: {"count": N, "results": [Flow 순서와 동일한 판정 결과, ...]}
+          (요청 시간은 예측까지만, 악성 Flow의 룰 생성/적용은 방어 큐에서 비동기 처리)
+    
+    X-Flow-Batch-Id 헤더가 이미 처리한 배치이면 예측/방어 없이 이전 판정 결과를 그대로 반환
+    """
+    batch_id = request.headers.get(BATCH_ID_HEADER)
+    if batch_id:
+        with seen_lock:
+            results = seen_batches.get(batch_id)
+            if results is not None:
+                seen_batches.move_to_end(batch_id)
+        if results is not None:
+            logging.info(f"♻️ 이미 처리한 배치 재전송 무시: {batch_id} ({len(results)}개)")
+            return jsonify({'count': len(results), 'results': results, 'duplicate': True})
     
+    if request.mimetype == WIRE_CONTENT_TYPE:
+        try:
+            flows = decode_flows(request.get_data())
+        except UnsupportedVersion as e:
+            # 송신 측은 415를 받으면 JSON으로 재전송
+            return jsonify({'error': str(e)}), 415
+        except WireError as e:
+            return jsonify({'error': f'Invalid flow batch: {e}'}), 400
     else:
-        # 정상 트래픽
-        return jsonify({
-            'is_malicious': False,
-            'attack_type': 'BENIGN'
-        })
+        payload = request.json or {}
+        flows = payload.get('flows')
+    
+    if not isinstance(flows, list) or not flows:
+        return jsonify({'error': 'No flows'}), 400
+    
+    if not all(isinstance(f, dict) for f in flows):
+        return jsonify({'error': 'Invalid flow entry'}), 400
+    
+    # 1. ML 예측 (배치 1회, 심각도 높은 경보가 붙은 Flow는 생략)
+    predictions = predict_flows(flows)
+    
+    # 2. 판정은 바로 반환, 룰 생성/적용은 방어 큐에서 (경보 심각도 높은 순)
+    results = [handle_prediction(f, p) for f, p in zip(flows, predictions)]
+    
+    if batch_id and SEEN_BATCHES > 0:
+        with seen_lock:
+            seen_batches[batch_id] = results
+            seen_batches.move_to_end(batch_id)
+            while len(seen_batches) > SEEN_BATCHES:
+                seen_batches.popitem(last=False)
+    
+    return jsonify({'count': len(results), 'results': results})
 
 
 if __name__ == '__main__':
     print("=" * 60)
     print("🛡️ Flow Receiver & 자동 방어 시스템")
     print("=" * 60)
-    print(f"📡 포트: 5001")
+    print(f"📡 포트: {RECEIVER_PORT}")
     print(f"🤖 ML 모델: {'✅ 로드됨' if model else '❌ 없음'}")
     print(f"🧠 Ollama: {OLLAMA_URL}")
     print(f"   모델: {OLLAMA_MODEL}")
     print(f"🎯 장치 1: {DEVICE1_RULE_CLIENT}")
+    print(f"🧱 차단 방식: {'데이터셋 (IP 추가)' if BLOCK_MODE == 'dataset' else '룰 생성'}")
     print("=" * 60)
     print("✅ 대기 중...\n")
     
-    app.run(host='0.0.0.0', port=5001, debug=False)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=RECEIVER_PORT, debug=False)
\ No newline at end of file
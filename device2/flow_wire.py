@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+flow_wire.py
+장치 1 → 장치 2 Flow 배치 바이너리 포맷 (device1/, device2/에 같은 파일로 유지)
+
+JSON은 Flow마다 'pkts_toserver' 같은 키 이름이 반복되므로, 배치를 컬럼 단위로 저장:
+
+    헤더 (8바이트, little-endian)
+        magic   b'FW'
+        version uint8   (현재 1)
+        flags   uint8   (bit0: 본문 zlib 압축, bit1: extras 컬럼 있음)
+        count   uint32  (Flow 수)
+    본문 (flags bit0이면 zlib 압축)
+        문자열 테이블: uint32 개수, [uint16 길이 + UTF-8]...  (IP, proto, 상태, 타임스탬프)
+        COLUMNS 순서대로 컬럼 배열 (array 모듈 typecode, 값 없음은 NULL 값)
+        extras: uint32 길이 + JSON 배열 (스키마에 없는 키/형식이 다른 값, Flow별 dict 또는 null)
+
+알 수 없는 버전은 UnsupportedVersion → 수신 측은 415를 반환하고 송신 측은 JSON으로 재전송.
+"""
+
+import json
+import struct
+import sys
+import zlib
+from array import array
+
+CONTENT_TYPE = 'application/x-flow-batch'
+BATCH_ID_HEADER = 'X-Flow-Batch-Id'  # 재전송 중복 제거용 배치 ID (JSON 배치에도 사용)
+MAGIC = b'FW'
+VERSION = 1
+
+MAX_BATCH_BYTES = 16 * 1024 * 1024  # 압축 해제한 본문 최대 크기 (압축 폭탄 방지)
+
+FLAG_ZLIB = 0x01
+FLAG_EXTRAS = 0x02
+
+HEADER = struct.Struct('<2sBBI')
+STRING_LENGTH = struct.Struct('<H')
+UINT32 = struct.Struct('<I')
+
+# (키, typecode) - 's'는 문자열 테이블 인덱스 (uint32)
+COLUMNS = [
+    ('timestamp', 's'),
+    ('flow_id', 'q'),
+    ('src_ip', 's'),
+    ('dest_ip', 's'),
+    ('src_port', 'i'),
+    ('dest_port', 'i'),
+    ('proto', 's'),
+    ('flow_age', 'q'),
+    ('flow_state', 's'),
+    ('pkts_toserver', 'q'),
+    ('pkts_toclient', 'q'),
+    ('bytes_toserver', 'q'),
+    ('bytes_toclient', 'q'),
+]
+COLUMN_KEYS = frozenset(key for key, _ in COLUMNS)
+
+TYPECODES = {'s': 'I', 'q': 'q', 'i': 'i'}
+NULLS = {'s': 0xFFFFFFFF, 'q': -2 ** 63, 'i': -2 ** 31}
+LIMITS = {'q': (-2 ** 63 + 1, 2 ** 63 - 1), 'i': (-2 ** 31 + 1, 2 ** 31 - 1)}
+
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+class WireError(ValueError):
+    """잘못된 바이너리 배치"""
+
+
+class UnsupportedVersion(WireError):
+    """지원하지 않는 포맷 버전"""
+
+
+def _to_bytes(values):
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode, data):
+    values = array(typecode)
+    values.frombytes(data)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _encode_fast(kind, column, strings):
+    """모든 값이 형식에 맞는 컬럼 (대부분의 경우) - 맞지 않으면 None"""
+    if kind == 's':
+        for value in column:
+            if type(value) is not str or len(value) >= 16384:
+                return None
+        return array('I', [strings.setdefault(value, len(strings)) for value in column])
+
+    low, high = LIMITS[kind]
+    for value in column:
+        if type(value) is not int or not low <= value <= high:
+            return None
+    return array(TYPECODES[kind], column)
+
+
+def _encode_slow(key, kind, column, strings, extras):
+    """None / 형식이 다른 값이 섞인 컬럼 (맞지 않는 값은 extras로)"""
+    null = NULLS[kind]
+    values = array(TYPECODES[kind], bytes(array(TYPECODES[kind]).itemsize * len(column)))
+
+    for i, value in enumerate(column):
+        if value is None:
+            values[i] = null
+            continue
+
+        if kind == 's':
+            if type(value) is str and len(value) < 16384:
+                values[i] = strings.setdefault(value, len(strings))
+                continue
+        else:
+            low, high = LIMITS[kind]
+            if type(value) is int and low <= value <= high:
+                values[i] = value
+                continue
+
+        # 문자열/정수가 아니거나 범위를 벗어난 값은 extras로 그대로 전달
+        values[i] = null
+        extras[i] = extras[i] or {}
+        extras[i][key] = value
+    return values
+
+
+def encode_flows(flows, compress=True, level=1):
+    """
+    Flow dict 리스트 → 바이너리 배치
+
+    Args:
+        flows (list): Flow 데이터 리스트
+        compress (bool): 본문 zlib 압축 여부
+        level (int): zlib 압축 레벨 (1: 빠름)
+
+    반환:
+        bytes
+    """
+    strings = {}
+    extras = [None] * len(flows)
+    has_extras = False
+    columns = []
+
+    for key, kind in COLUMNS:
+        column = [flow.get(key) for flow in flows]
+        values = _encode_fast(kind, column, strings)
+        if values is None:
+            values = _encode_slow(key, kind, column, strings, extras)
+            has_extras = has_extras or any(extras)
+        columns.append(_to_bytes(values))
+
+    for i, flow in enumerate(flows):
+        if not COLUMN_KEYS.issuperset(flow):
+            other = {key: value for key, value in flow.items() if key not in COLUMN_KEYS}
+            if other:
+                extras[i] = {**(extras[i] or {}), **other}
+                has_extras = True
+
+    parts = [UINT32.pack(len(strings))]
+    for value in strings:
+        encoded = value.encode('utf-8')
+        parts.append(STRING_LENGTH.pack(len(encoded)))
+        parts.append(encoded)
+    parts.extend(columns)
+
+    flags = 0
+    if has_extras:
+        flags |= FLAG_EXTRAS
+        encoded = json.dumps(extras, separators=(',', ':')).encode('utf-8')
+        parts.append(UINT32.pack(len(encoded)))
+        parts.append(encoded)
+
+    body = b''.join(parts)
+    if compress:
+        flags |= FLAG_ZLIB
+        body = zlib.compress(body, level)
+
+    return HEADER.pack(MAGIC, VERSION, flags, len(flows)) + body
+
+
+def decode_flows(data):
+    """
+    바이너리 배치 → Flow dict 리스트
+
+    Raises:
+        UnsupportedVersion: 알 수 없는 버전
+        WireError: 형식 오류
+    """
+    if len(data) < HEADER.size:
+        raise WireError("헤더가 너무 짧음")
+
+    magic, version, flags, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise WireError("magic 불일치")
+    if version != VERSION:
+        raise UnsupportedVersion(f"지원하지 않는 버전: {version}")
+
+    body = memoryview(data)[HEADER.size:]
+    if flags & FLAG_ZLIB:
+        # 압축 해제 크기를 MAX_BATCH_BYTES로 제한 - 남은 입력이 있으면 상한 초과
+        decompressor = zlib.decompressobj()
+        try:
+            body = memoryview(decompressor.decompress(body, MAX_BATCH_BYTES))
+        except zlib.error as e:
+            raise WireError(f"압축 해제 실패: {e}") from e
+        if decompressor.unconsumed_tail:
+            raise WireError(f"압축 해제 크기가 {MAX_BATCH_BYTES}바이트 초과")
+        if not decompressor.eof:
+            raise WireError("압축 해제 실패: 압축 데이터가 잘림")
+
+    try:
+        (string_count,) = UINT32.unpack_from(body, 0)
+        position = UINT32.size
+        strings = []
+        for _ in range(string_count):
+            (length,) = STRING_LENGTH.unpack_from(body, position)
+            position += STRING_LENGTH.size
+            strings.append(str(body[position:position + length], 'utf-8'))
+            position += length
+
+        columns = []
+        for key, kind in COLUMNS:
+            typecode = TYPECODES[kind]
+            size = array(typecode).itemsize * count
+            if position + size > len(body):
+                raise WireError(f"컬럼 데이터 부족: {key}")
+            values = _from_bytes(typecode, body[position:position + size])
+            position += size
+
+            null = NULLS[kind]
+            if null not in values:
+                columns.append([strings[v] for v in values] if kind == 's' else values.tolist())
+            elif kind == 's':
+                columns.append([strings[v] if v != null else None for v in values])
+            else:
+                columns.append([v if v != null else None for v in values])
+
+        extras = None
+        if flags & FLAG_EXTRAS:
+            (length,) = UINT32.unpack_from(body, position)
+            position += UINT32.size
+            extras = json.loads(bytes(body[position:position + length]))
+            if not isinstance(extras, list) or len(extras) != count:
+                raise WireError("extras 길이 불일치")
+            if not all(extra is None or isinstance(extra, dict) for extra in extras):
+                raise WireError("extras 항목은 dict 또는 null이어야 함")
+    except (struct.error, IndexError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise WireError(f"형식 오류: {e}") from e
+
+    keys = [key for key, _ in COLUMNS]
+    flows = [dict(zip(keys, row)) for row in zip(*columns)]
+    if extras:
+        for flow, extra in zip(flows, extras):
+            if extra:
+                flow.update(extra)
+    return flows
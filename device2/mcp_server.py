@@ -11,17 +11,23 @@ import json
 import numpy as np
 import logging
 
+from rule_channel import RuleChannel
+
 mcp = FastMCP("suricata-defense-server")
 
 # 설정
 DEVICE1_API = "http://192.168.0.42:8000"
-DEVICE1_RULE_CLIENT = "http://192.168.0.42:10002"
+DEVICE1_RULE_HOST = "192.168.0.42"
+DEVICE1_RULE_PORT = 10002
 OLLAMA_URL = "http://localhost:11434/api/generate"
 OLLAMA_MODEL = "qwen2.5:7b"
 
 # 로깅
 logging.basicConfig(level=logging.INFO)
 
+# 장치 1 rule_command_client 영구 연결 (룰 채널)
+rule_channel = RuleChannel(DEVICE1_RULE_HOST, DEVICE1_RULE_PORT)
+
 # ML 모델 로드
 try:
     model = joblib.load('models/random_forest_model.joblib')
@@ -194,22 +200,12 @@ def apply_rule_to_suricata(rule: str, sid: int = 900000001) -> str:
         JSON 문자열: 적용 결과
     """
     try:
-        response = requests.post(
-            DEVICE1_RULE_CLIENT,
-            json={
-                "type": "ADD_RULE",
-                "rule": rule,
-                "sid": sid
-            },
-            timeout=5
-        )
-        
-        if response.status_code == 200:
-            return json.dumps(response.json(), ensure_ascii=False)
-        else:
-            return json.dumps({
-                'error': f'HTTP {response.status_code}'
-            })
+        response = rule_channel.request({
+            "type": "ADD_RULE",
+            "rule": rule,
+            "sid": sid
+        })
+        return json.dumps(response, ensure_ascii=False)
     
     except Exception as e:
         return json.dumps({
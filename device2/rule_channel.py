@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+rule_channel.py
+장치 2 → 장치 1 rule_command_client 룰 전달 채널 (연결 하나를 계속 유지)
+
+command_framing 프로토콜(줄 단위 JSON + id)로 ADD_RULE / BLOCK_IP 등을 이어 보내고
+응답(ack)은 처리가 끝나는 대로 id로 짝을 맞춰 Future로 돌려줌:
+
+- 연결은 하나만 유지, 쉬는 동안에는 heartbeat마다 PING (장치 1 유휴 타임아웃 방지 + 끊김 감지)
+- 연결이 끊기면 backoff로 다시 연결하고 아직 ack를 못 받은 요청을 같은 id로 다시 전송
+  (장치 1에서 ADD_RULE은 같은 룰이 이미 적용 중이면 재로드 없이 OK, dataset-add도 중복 무해)
+- ack_timeout 안에 ack가 없으면 Future 실패 (재전송 중단)
+"""
+
+import itertools
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from command_framing import FrameDecoder, FrameError, encode_frame
+
+RECV_SIZE = 65536
+
+
+class RuleChannel:
+    """
+    rule_command_client 영구 연결 (스레드 안전)
+
+    Args:
+        host (str), port (int): rule_command_client 주소
+        connect_timeout (float): 연결 제한 시간 (초)
+        ack_timeout (float): 요청별 ack 대기 최대 시간, 재전송 포함 (초)
+        heartbeat (float): 이 시간 동안 수신이 없으면 PING (초, 장치 1 유휴 타임아웃보다 짧게)
+        max_backoff (float): 재연결 대기 최대 시간 (초)
+    """
+
+    def __init__(self, host, port, connect_timeout=5.0, ack_timeout=60.0, heartbeat=20.0, max_backoff=10.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.ack_timeout = ack_timeout
+        self.heartbeat = heartbeat
+        self.max_backoff = max_backoff
+        self.connects = 0
+        self.resent = 0
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._ids = itertools.count(1)
+        self._unacked = OrderedDict()  # id → (프레임, Future, 만료 시각)
+        self._sock = None
+        self._last_rx = 0.0
+        self._ping = None  # 응답을 기다리는 PING Future
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'rule-channel-{host}:{port}', daemon=True)
+        self._thread.start()
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    @property
+    def pending(self):
+        """ack를 기다리는 요청 수"""
+        return len(self._unacked)
+
+    def send(self, message):
+        """
+        요청 하나 전송 (연결이 없으면 연결되는 대로 전송)
+
+        반환:
+            Future: ack 응답 dict (id 제외), ack_timeout 초과나 채널 종료 시 예외
+        """
+        future = Future()
+        with self._lock:
+            if self._closed:
+                future.set_exception(ConnectionError('룰 채널 종료됨'))
+                return future
+            request_id = next(self._ids)
+            frame = encode_frame({**message, 'id': request_id})
+            self._unacked[request_id] = (frame, future, time.monotonic() + self.ack_timeout)
+            sock = self._sock
+            if sock is not None:
+                try:
+                    sock.sendall(frame)
+                except OSError as e:
+                    logging.warning(f"룰 채널 전송 실패, 재연결 후 재전송: {e}")
+                    self._drop(sock)
+                    sock = None
+        if sock is None:
+            self._wake.set()
+        return future
+
+    def request(self, message, timeout=None):
+        """
+        요청 하나 전송 후 ack 대기
+
+        반환:
+            dict: 응답
+
+        Raises:
+            TimeoutError: ack 대기 시간 초과
+            ConnectionError: 채널 종료
+        """
+        try:
+            return self.send(message).result(timeout or self.ack_timeout + 1)
+        except FutureTimeout:
+            raise TimeoutError(f"ack 대기 시간 초과 ({self.host}:{self.port})") from None
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._sock is not None:
+                self._drop(self._sock)
+            unacked, self._unacked = self._unacked, OrderedDict()
+        for _, future, _ in unacked.values():
+            if not future.done():
+                future.set_exception(ConnectionError('룰 채널 종료됨'))
+        self._wake.set()
+
+    def _drop(self, sock):
+        """연결 닫기 (ack 못 받은 요청은 남겨 두고 재연결 후 재전송) - _lock 안에서 호출"""
+        if self._sock is sock:
+            self._sock = None
+            self._ping = None
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def _run(self):
+        backoff = 0.5
+        while not self._closed:
+            if self._sock is None:
+                if self._connect():
+                    backoff = 0.5
+                else:
+                    self._expire()
+                    self._wake.wait(backoff)
+                    self._wake.clear()
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+
+            self._wake.wait(min(1.0, self.heartbeat))
+            self._wake.clear()
+            self._expire()
+            self._check_heartbeat()
+
+    def _connect(self):
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+            sock.settimeout(None)
+        except OSError as e:
+            if self.connects == 0 or self._unacked:
+                logging.warning(f"룰 채널 연결 실패 ({self.host}:{self.port}): {e}")
+            return False
+
+        with self._lock:
+            if self._closed:
+                sock.close()
+                return False
+            frames = [frame for frame, _, _ in self._unacked.values()]
+            try:
+                for frame in frames:
+                    sock.sendall(frame)
+            except OSError as e:
+                logging.warning(f"룰 채널 재전송 실패: {e}")
+                sock.close()
+                return False
+            self._sock = sock
+            self._last_rx = time.monotonic()
+            self.connects += 1
+            if self.connects > 1:
+                self.resent += len(frames)
+                logging.info(f"🔁 룰 채널 재연결 ({self.host}:{self.port}), 미확인 요청 {len(frames)}건 재전송")
+            else:
+                logging.info(f"🔗 룰 채널 연결: {self.host}:{self.port}")
+
+        threading.Thread(target=self._read_loop, args=(sock,), name='rule-channel-reader', daemon=True).start()
+        return True
+
+    def _read_loop(self, sock):
+        decoder = FrameDecoder()
+        try:
+            while True:
+                data = sock.recv(RECV_SIZE)
+                if not data:
+                    break
+                self._last_rx = time.monotonic()
+                for frame in decoder.feed(data):
+                    if isinstance(frame, FrameError):
+                        logging.error(f"룰 채널 잘못된 응답: {frame}")
+                        continue
+                    with self._lock:
+                        entry = self._unacked.pop(frame.pop('id', None), None)
+                    if entry and not entry[1].done():
+                        entry[1].set_result(frame)
+        except (OSError, FrameError):
+            pass
+        finally:
+            with self._lock:
+                if self._sock is sock:
+                    logging.warning(f"룰 채널 연결 끊김 ({self.host}:{self.port}), 재연결")
+                self._drop(sock)
+            self._wake.set()
+
+    def _expire(self):
+        """ack_timeout이 지난 요청 실패 처리"""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            for request_id, (_, future, deadline) in list(self._unacked.items()):
+                if deadline <= now:
+                    del self._unacked[request_id]
+                    expired.append(future)
+        for future in expired:
+            if not future.done():
+                future.set_exception(TimeoutError(f"ack 대기 시간 초과 ({self.host}:{self.port})"))
+
+    def _check_heartbeat(self):
+        """수신이 heartbeat 동안 없으면 PING, PING 후에도 heartbeat 동안 없으면 끊긴 것으로 보고 재연결"""
+        if self._ping is not None and self._ping.done():
+            self._ping = None
+        silent = time.monotonic() - self._last_rx
+        if silent < self.heartbeat:
+            return
+        if self._ping is None:
+            self._ping = self.send({'type': 'PING'})
+        elif silent >= self.heartbeat * 2:
+            with self._lock:
+                sock = self._sock
+                if sock is not None:
+                    logging.warning(f"룰 채널 응답 없음 ({silent:.0f}초), 재연결")
+                    self._drop(sock)
@@ -4,10 +4,12 @@ train_model.py
 Random Forest 모델 훈련 (CICIDS2017 데이터셋)
 """
 
+import json
 import pandas as pd
 import numpy as np
 import joblib
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder, MinMaxScaler
 from sklearn.metrics import classification_report, accuracy_score
@@ -35,6 +37,17 @@ DATASET_FILES = [
 # 출력 디렉토리
 OUTPUT_DIR = Path('models')
 
+# 장치 1 엣지 사전 분류 모델 (얕은 결정 트리, JSON으로 내보냄)
+EDGE_MAX_DEPTH = 6
+EDGE_TARGET_RECALL = 0.99  # 공격 Flow 중 장치 2로 전달되어야 하는 최소 비율
+
+# 장치 1이 13개 Flow 필드만으로 계산할 수 있는 Feature
+# (device1/edge_model.py의 edge_features와 같은 순서/계산식이어야 함)
+EDGE_FEATURES = [
+    'duration_s', 'fwd_pkts', 'bwd_pkts', 'fwd_bytes', 'bwd_bytes',
+    'bytes_per_s', 'pkts_per_s', 'fwd_pkt_len_mean', 'bwd_pkt_len_mean', 'avg_pkt_size',
+]
+
 
 def load_and_clean_data(file_list):
     """
@@ -252,6 +265,117 @@ def train_and_save_model(X, y, scaler, le, feature_names):
         logging.info(f"  {file_path.name}: {size_mb:.2f} MB")
 
 
+def build_edge_features(data):
+    """
+    CICIDS2017 원본 컬럼 → 엣지 Feature (장치 1의 Flow 필드로 계산 가능한 값만)
+    
+    Args:
+        data (DataFrame): 스케일링 전 Feature (Flow_Duration은 마이크로초)
+    
+    Returns:
+        DataFrame: EDGE_FEATURES 컬럼
+    """
+    # Suricata flow.age는 초 단위 정수 → 같은 해상도로 맞춤
+    duration = np.maximum(np.floor(data['Flow_Duration'].clip(lower=0) / 1_000_000), 1)
+    fwd_pkts = data['Total_Fwd_Packets']
+    bwd_pkts = data['Total_Backward_Packets']
+    fwd_bytes = data['Total_Length_of_Fwd_Packets']
+    bwd_bytes = data['Total_Length_of_Bwd_Packets']
+    total_pkts = fwd_pkts + bwd_pkts
+    total_bytes = fwd_bytes + bwd_bytes
+    
+    edge = pd.DataFrame({
+        'duration_s': duration,
+        'fwd_pkts': fwd_pkts,
+        'bwd_pkts': bwd_pkts,
+        'fwd_bytes': fwd_bytes,
+        'bwd_bytes': bwd_bytes,
+        'bytes_per_s': total_bytes / duration,
+        'pkts_per_s': total_pkts / duration,
+        'fwd_pkt_len_mean': fwd_bytes / np.maximum(fwd_pkts, 1),
+        'bwd_pkt_len_mean': bwd_bytes / np.maximum(bwd_pkts, 1),
+        'avg_pkt_size': total_bytes / np.maximum(total_pkts, 1),
+    })
+    return edge[EDGE_FEATURES].astype(float)
+
+
+def train_and_export_edge_model(X, y):
+    """
+    장치 1용 얕은 결정 트리 훈련 후 JSON으로 내보내기
+    
+    BENIGN / 공격 이진 분류. 리프 값은 공격 확률(의심 점수)이며,
+    테스트 세트에서 공격 재현율이 EDGE_TARGET_RECALL 이상이 되는 가장 높은 점수를 임계값으로 저장.
+    
+    Args:
+        X (DataFrame): 스케일링 전 Feature
+        y (Series): Label
+    """
+    logging.info("\n" + "=" * 60)
+    logging.info("엣지 모델 훈련 (장치 1 사전 분류)")
+    logging.info("=" * 60)
+    
+    X_edge = build_edge_features(X)
+    y_malicious = (y != 'BENIGN').astype(int).to_numpy()
+    
+    X_train, X_test, y_train, y_test = train_test_split(
+        X_edge.to_numpy(), y_malicious,
+        test_size=0.2,
+        random_state=42,
+        stratify=y_malicious
+    )
+    
+    tree = DecisionTreeClassifier(
+        max_depth=EDGE_MAX_DEPTH,
+        class_weight='balanced',  # 공격 Flow를 놓치지 않는 쪽으로
+        random_state=42
+    )
+    tree.fit(X_train, y_train)
+    
+    # 임계값 선택: 재현율 목표를 지키는 가장 높은 점수
+    scores = tree.predict_proba(X_test)[:, 1]
+    attack_scores = np.sort(scores[y_test == 1])
+    if len(attack_scores):
+        index = int(np.floor(len(attack_scores) * (1 - EDGE_TARGET_RECALL)))
+        threshold = float(attack_scores[min(index, len(attack_scores) - 1)])
+    else:
+        threshold = 0.5
+    
+    forwarded = scores >= threshold
+    recall = float(forwarded[y_test == 1].mean()) if (y_test == 1).any() else 1.0
+    forward_ratio = float(forwarded.mean())
+    
+    logging.info(f"  - max_depth: {EDGE_MAX_DEPTH}, 노드 수: {tree.tree_.node_count}")
+    logging.info(f"  - 임계값: {threshold:.4f}")
+    logging.info(f"  - 공격 재현율: {recall:.4f}")
+    logging.info(f"  - 전달 비율: {forward_ratio:.4f} (나머지는 장치 1에서 걸러짐)")
+    
+    # sklearn 트리 구조를 그대로 평탄화 (리프: feature = -1)
+    t = tree.tree_
+    value = t.value[:, 0, :]
+    value = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+    malicious_index = list(tree.classes_).index(1) if 1 in tree.classes_ else None
+    
+    edge_model = {
+        'version': 1,
+        'type': 'decision_tree',
+        'features': EDGE_FEATURES,
+        'feature': [int(f) for f in t.feature],
+        'threshold': [float(v) for v in t.threshold],
+        'left': [int(i) for i in t.children_left],
+        'right': [int(i) for i in t.children_right],
+        'score': [float(v[malicious_index]) if malicious_index is not None else 0.0 for v in value],
+        'forward_threshold': threshold,
+        'test_recall': recall,
+        'test_forward_ratio': forward_ratio,
+    }
+    
+    OUTPUT_DIR.mkdir(exist_ok=True)
+    edge_path = OUTPUT_DIR / 'edge_model.json'
+    with open(edge_path, 'w') as f:
+        json.dump(edge_model, f)
+    logging.info(f"✓ 엣지 모델: {edge_path} ({edge_path.stat().st_size / 1024:.1f} KB)")
+
+
 def main():
     """메인 함수"""
     print("=" * 60)
@@ -269,6 +393,9 @@ def main():
         # 3. 훈련 및 저장
         train_and_save_model(X_scaled, y_encoded, scaler, le, feature_names)
         
+        # 4. 장치 1 엣지 모델 (스케일링 전 Feature 사용)
+        train_and_export_edge_model(X, y)
+        
         print("\n" + "=" * 60)
         print("✅ 훈련 완료!")
         print("=" * 60)
@@ -278,6 +405,7 @@ def main():
         print("  - models/min_max_scaler.joblib")
         print("  - models/label_encoder.joblib")
         print("  - models/feature_names.joblib")
+        print("  - models/edge_model.json (장치 1 flow_extractor로 복사)")
         print()
         print("다음 단계:")
         print("  python flow_receiver.py")